@@ -2,9 +2,21 @@ from PIL import Image, ImageDraw, ImageFont
 import barcode
 from barcode.writer import ImageWriter
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 import os
 
+# Subdirectory of the labels directory holding the printer command files, one per UPC and language
+PRINTER_COMMANDS_DIR = "printer_commands"
+
+# Printer command languages a label can be written in, next to its PNG
+PRINTER_LANGUAGES = ("zpl", "epl")
+
+# EPL2 resident fonts: font number -> (character width, height) in dots, per printer resolution
+EPL_FONTS = {
+    203: {3: (12, 20), 4: (14, 24), 5: (32, 48)},
+    300: {3: (20, 36), 4: (24, 44), 5: (48, 80)},
+}
+
 def sanitize_filename(name: str) -> str:
     """Remove invalid characters from filename"""
     # Replace invalid characters with underscores
@@ -22,6 +34,18 @@ class LabelData:
     variant: str
     upc_code: str
 
+def printer_command_path(save_dir: str, upc_code: str, language: str) -> str:
+    """Path of the cached printer command file for a UPC"""
+    return os.path.join(save_dir, PRINTER_COMMANDS_DIR, f"{upc_code}.{language}")
+
+def _zpl_field(text: str) -> str:
+    """Escape text for a ZPL ^FH field (caret, tilde and the escape character itself)"""
+    return text.replace("\\", "\\5C").replace("^", "\\5E").replace("~", "\\7E")
+
+def _epl_field(text: str) -> str:
+    """Escape text for a quoted EPL field"""
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
 class BarcodeGenerator:
     def __init__(self, settings):
         self.settings = settings
@@ -212,8 +236,145 @@ class BarcodeGenerator:
         text_width = font.getlength(text)
         return (width - text_width) // 2
 
-    def generate_and_save(self, data: LabelData, save_dir: str):
-        """Generate and save label with consistent filename format"""
+    def _printer_layout(self, data: LabelData) -> Dict[str, object]:
+        """Text and positions shared by the ZPL and EPL output, scaled from the 300 DPI PNG layout"""
+        dpi = self.settings.printer_dpi
+        scale = dpi / 300
+        width = int(2 * dpi)
+        height = int(2 * dpi)
+        margin = int(20 * scale)
+
+        # UPC-A is 95 modules wide, use the widest module that fits with the quiet zones
+        module = max(1, (width - 2 * margin) // (95 + 18))
+
+        return {
+            "width": width,
+            "height": height,
+            "margin": margin,
+            "name_line1": self.process_camel_case(data.name_line1) or "",
+            "name_line2": self.process_camel_case(data.name_line2) or "",
+            "variant": self.process_camel_case(data.variant) or "",
+            "text_height": int(self.settings.font_size_large * scale),
+            "variant_y": int(165 * scale),
+            "module": module,
+            "barcode_x": (width - 95 * module) // 2,
+            "barcode_y": int(260 * scale),
+            "barcode_height": int(230 * scale),
+        }
+
+    def generate_zpl(self, data: LabelData) -> Optional[str]:
+        """Generate the label as a ZPL II command stream with a native UPC-A barcode"""
+        try:
+            upc_code = str(data.upc_code).strip()
+            if len(upc_code) != 12 or not upc_code.isdigit():
+                raise ValueError(f"Invalid UPC code: {upc_code}. Must be exactly 12 digits.")
+
+            layout = self._printer_layout(data)
+            text_height = layout["text_height"]
+            variant_height = int(text_height * 2 / 3) if len(layout["variant"]) > 21 else text_height
+            text_width = layout["width"] - 2 * layout["margin"]
+
+            commands = [
+                "^XA",
+                "^CI28",  # UTF-8 field data
+                f"^PW{layout['width']}",
+                f"^LL{layout['height']}",
+                "^LH0,0",
+            ]
+            if layout["name_line1"]:
+                commands.append(
+                    f"^FO{layout['margin']},{layout['margin']}^A0N,{text_height},{text_height}"
+                    f"^FB{text_width},1,0,L^FH\\^FD{_zpl_field(layout['name_line1'])}^FS"
+                )
+            if layout["name_line2"]:
+                commands.append(
+                    f"^FO{layout['margin']},{layout['margin'] + text_height + 4}^A0N,{text_height},{text_height}"
+                    f"^FB{text_width},1,0,L^FH\\^FD{_zpl_field(layout['name_line2'])}^FS"
+                )
+            if layout["variant"]:
+                commands.append(
+                    f"^FO0,{layout['variant_y']}^A0N,{variant_height},{variant_height}"
+                    f"^FB{layout['width']},1,0,C^FH\\^FD{_zpl_field(layout['variant'])}^FS"
+                )
+            # ^BU takes the first 11 digits and prints its own check digit
+            commands.append(
+                f"^FO{layout['barcode_x']},{layout['barcode_y']}^BY{layout['module']}"
+                f"^BUN,{layout['barcode_height']},Y,N^FD{upc_code[:11]}^FS"
+            )
+            commands += ["^PQ1", "^XZ"]
+            return "\n".join(commands) + "\n"
+        except Exception as e:
+            print(f"Error generating ZPL: {e}")
+            return None
+
+    def generate_epl(self, data: LabelData) -> Optional[str]:
+        """Generate the label as an EPL2 command stream with a native UPC-A barcode"""
+        try:
+            upc_code = str(data.upc_code).strip()
+            if len(upc_code) != 12 or not upc_code.isdigit():
+                raise ValueError(f"Invalid UPC code: {upc_code}. Must be exactly 12 digits.")
+
+            layout = self._printer_layout(data)
+            fonts = EPL_FONTS[min(EPL_FONTS, key=lambda dpi: abs(dpi - self.settings.printer_dpi))]
+            name_font = 4
+            variant_font = 3 if len(layout["variant"]) > 21 else 4
+
+            def centered_x(text: str, font: int) -> int:
+                return max(0, (layout["width"] - len(text) * fonts[font][0]) // 2)
+
+            # The leading blank line clears any partial command left in the printer buffer
+            commands = [
+                "",
+                "N",
+                f"q{layout['width']}",
+                f"Q{layout['height']},24",
+            ]
+            if layout["name_line1"]:
+                commands.append(f'A{layout["margin"]},{layout["margin"]},0,{name_font},1,1,N,"{_epl_field(layout["name_line1"])}"')
+            if layout["name_line2"]:
+                y = layout["margin"] + fonts[name_font][1] + 4
+                commands.append(f'A{layout["margin"]},{y},0,{name_font},1,1,N,"{_epl_field(layout["name_line2"])}"')
+            if layout["variant"]:
+                x = centered_x(layout["variant"], variant_font)
+                commands.append(f'A{x},{layout["variant_y"]},0,{variant_font},1,1,N,"{_epl_field(layout["variant"])}"')
+            commands.append(
+                f'B{layout["barcode_x"]},{layout["barcode_y"]},0,UA0,{layout["module"]},{layout["module"]},'
+                f'{layout["barcode_height"]},B,"{upc_code[:11]}"'
+            )
+            commands.append("P1")
+            return "\n".join(commands) + "\n"
+        except Exception as e:
+            print(f"Error generating EPL: {e}")
+            return None
+
+    def save_printer_commands(self, data: LabelData, save_dir: str) -> Dict[str, str]:
+        """Write the command file for the label_output setting (zpl or epl), cached per UPC, returns the paths by language"""
+        saved = {}
+        language = getattr(self.settings, "label_output", "png")
+        if language not in PRINTER_LANGUAGES:
+            # PNG output only
+            return saved
+
+        commands = self.generate_zpl(data) if language == "zpl" else self.generate_epl(data)
+        if not commands:
+            return saved
+        try:
+            path = printer_command_path(save_dir, data.upc_code, language)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # Write to a temporary name first so a printer never gets half a job
+            temp_path = f"{path}.tmp"
+            encoding = "utf-8" if language == "zpl" else "latin-1"
+            with open(temp_path, "w", encoding=encoding, errors="replace", newline="\n") as f:
+                f.write(commands)
+            os.replace(temp_path, path)
+            saved[language] = path
+        except Exception as e:
+            print(f"Error saving {language.upper()} for {data.upc_code}: {e}")
+        return saved
+
+    def generate_and_save(self, data: LabelData, save_dir: str) -> Optional[str]:
+        """Generate and save label with consistent filename format, returns the saved path"""
         # Generate the label
         label_image = self.generate_label(data)
         if label_image:
@@ -229,5 +390,8 @@ class BarcodeGenerator:
             
             filepath = os.path.join(save_dir, filename)
             label_image.save(filepath)
-            return True
-        return False
+
+            # Native printer output for thermal printers (label_output zpl or epl), cached per UPC
+            self.save_printer_commands(data, save_dir)
+            return filepath
+        return None
@@ -19,6 +19,10 @@ class LabelSettings:
     view_files_pin_window: bool = False
     view_files_auto_switch: bool = True
     view_files_print_minimize: bool = False  # Print minimize feature
+    # Resolution of the thermal printer the ZPL/EPL output is laid out for
+    printer_dpi: int = 203
+    # Label output: png only, or png plus a zpl or epl printer command file per label
+    label_output: str = "png"
 
     DPI: int = 300
     LABEL_WIDTH: int = DPI * 2
@@ -61,7 +65,9 @@ class ConfigManager:
                         view_files_mirror_print=data.get('view_files_mirror_print', False),
                         view_files_pin_window=data.get('view_files_pin_window', False),
                         view_files_auto_switch=data.get('view_files_auto_switch', True),
-                        view_files_print_minimize=data.get('view_files_new_feature', False)
+                        view_files_print_minimize=data.get('view_files_new_feature', False),
+                        printer_dpi=data.get('printer_dpi', self.settings.printer_dpi),
+                        label_output=data.get('label_output', self.settings.label_output)
                     )
         except Exception as e:
             print(f"Error loading settings: {e}")
@@ -82,7 +88,9 @@ class ConfigManager:
                 'view_files_mirror_print': self.settings.view_files_mirror_print,
                 'view_files_pin_window': self.settings.view_files_pin_window,
                 'view_files_auto_switch': self.settings.view_files_auto_switch,
-                'view_files_new_feature': self.settings.view_files_print_minimize
+                'view_files_new_feature': self.settings.view_files_print_minimize,
+                'printer_dpi': self.settings.printer_dpi,
+                'label_output': self.settings.label_output
             }
             with open(self.settings_file, 'w') as f:
                 json.dump(settings_dict, f)
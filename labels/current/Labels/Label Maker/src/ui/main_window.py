@@ -10,12 +10,19 @@ from ..utils.logger import setup_logger
 from .window_manager import WindowManager
 from ..barcode_generator import BarcodeGenerator, LabelData
 from ..utils.csv_processor import is_valid_barcode, process_product_name, sanitize_filename
+from ..utils.label_files import LabelFileCatalog
 import time
 import re
 
 # Get logger instance
 logger = setup_logger()
 
+# Delay before a View Files search runs, so a burst of keystrokes runs one search
+SEARCH_DEBOUNCE_MS = 150
+
+# Number of decoded preview images kept in memory by the View Files window
+PREVIEW_CACHE_SIZE = 32
+
 class MainWindow(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -28,6 +35,10 @@ class MainWindow(tk.Tk):
         self.window_manager = WindowManager()
         self.barcode_generator = BarcodeGenerator(self.config_manager.settings)
         
+        # Label PNGs in the labels directory, kept current by a directory watcher
+        self.label_files = LabelFileCatalog()
+        self.label_files.add_listener(lambda: self.after(0, self._refresh_png_count))
+        
         # Add tracking for last printed label
         self.last_print_time = None
         self.last_printed_upc = None
@@ -46,6 +57,9 @@ class MainWindow(tk.Tk):
         
         # Bind focus event to main window
         self.bind("<FocusIn>", lambda e: self._on_window_focus(self))
+        
+        # Start watching the labels directory
+        self.label_files.set_directory(self.config_manager.settings.last_directory)
 
     def view_directory_files(self):
         """View files in the current directory"""
@@ -338,6 +352,9 @@ class MainWindow(tk.Tk):
         
         # Store preview label reference
         self.file_window.preview_label = preview_label
+        
+        # Decoded preview images, so resizing or re-selecting doesn't decode again
+        preview_cache = {}
 
         # Create bottom button frame
         button_frame = tk.Frame(main_content)
@@ -364,48 +381,63 @@ class MainWindow(tk.Tk):
         last_print_label = tk.Label(button_frame, text="", font=('TkDefaultFont', 9), fg='#666666')
         last_print_label.pack(side=tk.RIGHT, padx=(0, 10), pady=5)
 
-        def update_file_list(*args):
+        # Incremental search state: the last query, its results and the catalog
+        # version they were computed from
+        search_state = {'query': None, 'results': [], 'version': None, 'pending': None}
+
+        def find_matches(search_text):
+            """Find the files matching the search text, narrowing the previous results when possible"""
+            version = self.label_files.version
+            
+            # UPC search is an exact lookup by the _label_<upc>.png naming convention
+            if search_text.isdigit() and len(search_text) == 12:
+                search_state.update(query=None, results=[], version=None)
+                return self.label_files.find_by_upc(search_text)
+            
+            # Extending the previous query can only remove matches, so only the
+            # previous results need to be checked
+            previous = search_state['query']
+            if previous is not None and search_state['version'] == version and search_text.startswith(previous):
+                candidates = search_state['results']
+            else:
+                candidates = self.label_files.files()
+            
+            # Check if ALL search terms are in the filename
+            search_terms = search_text.split()
+            if search_terms:
+                matched_files = [f for f in candidates if all(term in f.lower() for term in search_terms)]
+            else:
+                matched_files = list(candidates)
+            
+            search_state.update(query=search_text, results=matched_files, version=version)
+            return matched_files
+
+        def update_file_list(auto_switch=True):
             """Update the listbox based on search text"""
+            search_state['pending'] = None
             search_text = search_var.get().lower()
-            self.listbox.delete(0, tk.END)
             
             try:
-                files = os.listdir(self.config_manager.settings.last_directory)
-                png_files = [f for f in files if f.lower().endswith('.png')]
-                matched_files = []
-                
                 # Check if search is a 12-digit UPC
                 is_upc_search = search_text.isdigit() and len(search_text) == 12
                 
-                # Split search into terms
-                search_terms = [] if is_upc_search else search_text.split()
+                matched_files = find_matches(search_text)
                 
-                for file in sorted(png_files):
-                    file_lower = file.lower()
-                    
-                    # UPC search takes precedence
-                    if is_upc_search:
-                        if search_text in file_lower:
-                            matched_files.append(file)
-                    # If no search terms, include all files
-                    elif not search_terms:
-                        matched_files.append(file)
-                    # Check if ALL search terms are in the filename
-                    elif all(term in file_lower for term in search_terms):
-                        matched_files.append(file)
-                
-                for file in matched_files:
-                    self.listbox.insert(tk.END, file)
+                # Replace the listbox contents in one call
+                self.listbox.delete(0, tk.END)
+                if matched_files:
+                    self.listbox.insert(tk.END, *matched_files)
                     
                 if len(matched_files) == 0:
                     # If it's a UPC search with no matches, switch to main window
-                    if is_upc_search and self.is_auto_switch.get():
+                    if is_upc_search and auto_switch and self.is_auto_switch.get():
                         self.listbox.insert(tk.END, "No matching files found")
                         self.listbox.selection_clear(0, tk.END)
                         self.listbox.select_set(0)
                         self.listbox.see(0)
                         label_count_label.config(text="No Labels", fg='#e74c3c')  # Red text for no labels
                         preview_label.config(image='')  # Clear the preview label
+                        preview_label.preview_key = None
                         
                         # Add a delay before switching to main window
                         self.file_window.after(375, lambda: [
@@ -425,19 +457,12 @@ class MainWindow(tk.Tk):
                     self.listbox.see(0)
                     label_count_label.config(text="No Labels", fg='#e74c3c')  # Red text for no labels
                     preview_label.config(image='')  # Clear the preview label
+                    preview_label.preview_key = None
                 else:
+                    # Select the first item by default
                     self.listbox.selection_clear(0, tk.END)
-                    
-                    # For UPC searches with matches, just select the first match but don't auto-switch
-                    if is_upc_search:
-                        self.listbox.select_set(0)
-                        self.listbox.see(0)
-                        # Show preview of the selected file
-                        show_preview(None)
-                    else:
-                        # Select the first item by default
-                        self.listbox.select_set(0)
-                        self.listbox.see(0)
+                    self.listbox.select_set(0)
+                    self.listbox.see(0)
                     
                     label_count_label.config(text=f"Labels: {len(matched_files)}", fg='#2ecc71')  # Green text for label count
                     # Show preview of first item
@@ -446,27 +471,69 @@ class MainWindow(tk.Tk):
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to read directory: {str(e)}")
 
+        def schedule_search(*args):
+            """Debounce keystrokes so a burst of input (e.g. a scanned UPC) runs one search"""
+            if search_state['pending'] is not None:
+                self.file_window.after_cancel(search_state['pending'])
+            search_state['pending'] = self.file_window.after(SEARCH_DEBOUNCE_MS, update_file_list)
+
+        def flush_search():
+            """Run a pending search right away"""
+            if search_state['pending'] is not None:
+                self.file_window.after_cancel(search_state['pending'])
+            update_file_list()
+
+        def on_label_files_changed():
+            """Refresh the results when label files are added or removed (called from the watcher thread)"""
+            def refresh():
+                if self.file_window and self.file_window.winfo_exists():
+                    update_file_list(auto_switch=False)
+            self.file_window.after(0, refresh)
+
+        self.label_files.add_listener(on_label_files_changed)
+        self.file_window.bind(
+            '<Destroy>',
+            lambda e: self.label_files.remove_listener(on_label_files_changed) if e.widget is self.file_window else None,
+            add='+'
+        )
+
         def show_preview(event):
             """Show preview of selected file in the preview frame"""
             selection = self.listbox.curselection()
             if not selection:
                 preview_label.config(image='')
+                preview_label.preview_key = None
                 return
 
             file_name = self.listbox.get(selection[0])
             # Clear preview if "No matching files found" is selected
             if file_name == "No matching files found":
                 preview_label.config(image='')
+                preview_label.preview_key = None
                 return
                 
             file_path = os.path.join(self.config_manager.settings.last_directory, file_name)
 
             try:
-                img = Image.open(file_path)
                 # Calculate size to fit in preview frame while maintaining aspect ratio
                 preview_width = preview_frame.winfo_width()
                 preview_height = preview_frame.winfo_height()
                 
+                # Nothing to do if this file is already shown at this size
+                file_key = (file_path, os.path.getmtime(file_path))
+                preview_key = (file_key, preview_width, preview_height, preview_size.get())
+                if getattr(preview_label, 'preview_key', None) == preview_key:
+                    return
+                
+                # Decode each file once, resizes and re-selections reuse it
+                img = preview_cache.get(file_key)
+                if img is None:
+                    with Image.open(file_path) as source:
+                        img = source.copy()
+                    if len(preview_cache) >= PREVIEW_CACHE_SIZE:
+                        preview_cache.pop(next(iter(preview_cache)))
+                    preview_cache[file_key] = img
+                
                 if preview_width > 1 and preview_height > 1:  # Only resize if frame has valid dimensions
                     # Adjust preview size based on selected size button (1 = 70%, 2 = 80%, 3 = 95%)
                     size_map = {1: 0.70, 2: 0.80, 3: 0.95}  # Map button numbers to size multipliers
@@ -491,12 +558,14 @@ class MainWindow(tk.Tk):
                 img_tk = ImageTk.PhotoImage(img)
                 preview_label.config(image=img_tk)
                 preview_label.image = img_tk  # Keep reference
+                preview_label.preview_key = preview_key
             except Exception as e:
                 preview_label.config(image='')
+                preview_label.preview_key = None
                 print(f"Failed to preview image: {str(e)}")
 
-        # Connect the search variable to the update function
-        search_var.trace('w', update_file_list)
+        # Connect the search variable to the (debounced) update function
+        search_var.trace('w', schedule_search)
         self.listbox.bind('<<ListboxSelect>>', show_preview)
 
         # Update preview when window is resized
@@ -530,7 +599,7 @@ class MainWindow(tk.Tk):
                 
                 # Make label clickable when there's a time
                 last_print_label.config(cursor="hand2")
-                last_print_label.bind('<Button-1>', lambda e: self.insert_last_upc())
+                last_print_label.bind('<Button-1>', lambda e: insert_last_upc())
             else:
                 last_print_label.config(text="")
                 last_print_label.config(cursor="")
@@ -545,6 +614,7 @@ class MainWindow(tk.Tk):
                 search_entry.focus_set()
                 search_var.set(self.last_printed_upc)
                 search_entry.select_range(0, tk.END)
+                flush_search()
                 
                 # Wait briefly for the listbox to update, then select first item
                 def select_first():
@@ -767,6 +837,7 @@ class MainWindow(tk.Tk):
 
     def on_close(self):
         """Handle window close event"""
+        self.label_files.stop()
         self.config_manager.save_settings()
         self.quit()
 
@@ -1103,6 +1174,7 @@ class MainWindow(tk.Tk):
                     
                     labels_created = 0
                     skipped_labels = 0
+                    existing_labels = 0
                     
                     # Process each row
                     for index, row in df.iterrows():
@@ -1122,6 +1194,11 @@ class MainWindow(tk.Tk):
                         if not is_valid_barcode(barcode):
                             skipped_labels += 1
                             continue
+                        
+                        # Skip if a label already exists for this UPC
+                        if save_dir == self.label_files.directory and self.label_files.has_label_for_upc(barcode):
+                            existing_labels += 1
+                            continue
                             
                         # Get the product name directly from CSV
                         # process_product_name will handle camelCase processing
@@ -1153,17 +1230,19 @@ class MainWindow(tk.Tk):
                             
                             filepath = os.path.join(save_dir, filename)
                             label_image.save(filepath)
+                            self.barcode_generator.save_printer_commands(label_data, save_dir)
                             labels_created += 1
                             
-                            # Update label counter in settings
-                            self.config_manager.settings.label_counter += 1
-                            self.png_count.set(f"Labels: {self.config_manager.settings.label_counter}")
+                            # Update the label count without relisting the directory
+                            self.label_files.add_file(filename)
                     
                     # Save settings
                     self.config_manager.save_settings()
                     
                     # Show completion message
                     message = f"Created {labels_created} labels in:\n{save_dir}"
+                    if existing_labels > 0:
+                        message += f"\n\nSkipped {existing_labels} items that already have a label"
                     if skipped_labels > 0:
                         message += f"\n\nSkipped {skipped_labels} items with invalid barcodes"
                     
@@ -1253,10 +1332,17 @@ class MainWindow(tk.Tk):
     def _update_png_count(self):
         """Update PNG count label"""
         if self.config_manager.settings.last_directory:
-            count = len([f for f in os.listdir(self.config_manager.settings.last_directory)
-                        if f.lower().endswith('.png')])
+            # Follow the current directory; the watcher keeps the count current,
+            # so the directory is never relisted here
+            self.label_files.set_directory(self.config_manager.settings.last_directory)
+            self._refresh_png_count()
+
+    def _refresh_png_count(self):
+        """Show the label count from the label file catalog"""
+        count = self.label_files.count()
+        self.png_count.set(f"Labels: {count}")
+        if count != self.config_manager.settings.label_counter:
             self.config_manager.settings.label_counter = count
-            self.png_count.set(f"Labels: {count}")
             self.config_manager.save_settings()
 
     def show_settings(self):
@@ -1331,6 +1417,18 @@ class MainWindow(tk.Tk):
         barcode_height.insert(0, str(self.config_manager.settings.barcode_height))
         barcode_height.grid(row=1, column=1, padx=5, pady=2)
 
+        # Label Output (png only, or png plus a zpl or epl printer command file)
+        ttk.Label(barcode_frame, text="Label Output:").grid(row=2, column=0, padx=5, pady=2)
+        label_output_var = tk.StringVar(value=self.config_manager.settings.label_output)
+        label_output = ttk.Combobox(
+            barcode_frame,
+            textvariable=label_output_var,
+            values=("png", "zpl", "epl"),
+            state="readonly",
+            width=8
+        )
+        label_output.grid(row=2, column=1, padx=5, pady=2)
+
         # CSV Import Frame
         csv_frame = ttk.LabelFrame(main_frame, text="Batch Import", padding="5")
         csv_frame.pack(fill=tk.X, pady=5)
@@ -1401,6 +1499,7 @@ class MainWindow(tk.Tk):
                 self.config_manager.settings.font_size_medium = new_font_medium
                 self.config_manager.settings.barcode_width = new_barcode_width
                 self.config_manager.settings.barcode_height = new_barcode_height
+                self.config_manager.settings.label_output = label_output_var.get()
                 self.config_manager.settings.always_on_top = always_on_top_var.get()
                 self.config_manager.settings.transparency_level = new_transparency
 
@@ -1437,6 +1536,15 @@ class MainWindow(tk.Tk):
             self.inputs["upc_code"].focus_set()
             return
         
+        # Don't render a duplicate label unless the user asks for it
+        if self.label_files.has_label_for_upc(upc_code):
+            existing = "\n".join(self.label_files.find_by_upc(upc_code))
+            if not messagebox.askyesno(
+                "Label Exists",
+                f"A label for UPC {upc_code} already exists:\n\n{existing}\n\nCreate another one?"
+            ):
+                return
+        
         # Create label data object
         label_data = LabelData(
             name_line1=name_line1,
@@ -1523,10 +1631,12 @@ class MainWindow(tk.Tk):
         
         try:
             # Generate and save the label
-            self.barcode_generator.generate_and_save(
+            filepath = self.barcode_generator.generate_and_save(
                 label_data,
                 self.config_manager.settings.last_directory
             )
+            if filepath:
+                self.label_files.add_file(os.path.basename(filepath))
             
             # Update PNG count
             self._update_png_count()
@@ -131,6 +131,7 @@ def create_batch_labels(csv_path: str, main_window):
         
         labels_created = 0
         skipped_labels = 0
+        existing_labels = 0
         
         # Process each row
         for _, row in df.iterrows():
@@ -146,6 +147,12 @@ def create_batch_labels(csv_path: str, main_window):
                 skipped_labels += 1
                 logger.warning(f"Skipping invalid barcode: {barcode}")
                 continue
+            
+            # Skip if a label already exists for this UPC
+            if save_dir == main_window.label_files.directory and main_window.label_files.has_label_for_upc(barcode):
+                existing_labels += 1
+                logger.info(f"Skipping existing label for barcode: {barcode}")
+                continue
                 
             full_name = str(row['Goods Name'])
             
@@ -188,17 +195,20 @@ def create_batch_labels(csv_path: str, main_window):
                 
                 filepath = os.path.join(save_dir, filename)
                 label_image.save(filepath)
+                main_window.barcode_generator.save_printer_commands(label_data, save_dir)
                 labels_created += 1
                 
-                # Update label counter in settings
-                main_window.config_manager.settings.label_counter += 1
-                main_window.png_count.set(f"Labels: {main_window.config_manager.settings.label_counter}")
+                # Update the label count without relisting the directory
+                if save_dir == main_window.config_manager.settings.last_directory:
+                    main_window.label_files.add_file(filename)
             
         # Save settings
         main_window.config_manager.save_settings()
         
         # Show completion message
         message = f"Created {labels_created} labels in:\n{save_dir}"
+        if existing_labels > 0:
+            message += f"\n\nSkipped {existing_labels} items that already have a label."
         if skipped_labels > 0:
             message += f"\n\nSkipped {skipped_labels} invalid barcodes. Check the logs for details."
         messagebox.showinfo("Complete", message)
@@ -0,0 +1,32 @@
+"""
+Directory watcher for the Label Maker.
+Reports label files added to or removed from the labels directory without
+relisting it. The watcher itself lives in the main application
+(src/utils/directory_watcher.py, one level up), which always ships this
+folder. It is loaded by path because both applications name their package
+"src".
+"""
+import os
+import sys
+import importlib.util
+
+# Name the shared module is registered under, so it is only loaded once
+_SHARED_MODULE_NAME = 'labels_directory_watcher'
+
+def _load_shared_watcher():
+    """Load the main application's directory_watcher module"""
+    module = sys.modules.get(_SHARED_MODULE_NAME)
+    if module is None:
+        path = os.path.abspath(os.path.join(
+            os.path.dirname(__file__), '..', '..', '..', 'src', 'utils', 'directory_watcher.py'
+        ))
+        spec = importlib.util.spec_from_file_location(_SHARED_MODULE_NAME, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[_SHARED_MODULE_NAME] = module
+        spec.loader.exec_module(module)
+    return module
+
+_shared = _load_shared_watcher()
+
+RESCAN = _shared.RESCAN
+DirectoryWatcher = _shared.DirectoryWatcher
@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Set
+from ..utils.logger import setup_logger
+from .directory_watcher import DirectoryWatcher
+
+# Setup logger
+logger = setup_logger()
+
+# Label filenames always end with _label_<12-digit UPC>.png
+UPC_FILENAME_PATTERN = re.compile(r'_label_(\d{12})\.png$', re.IGNORECASE)
+
+def upc_from_filename(filename: str) -> Optional[str]:
+    """Get the UPC from a label filename, or None if it doesn't follow the naming convention"""
+    match = UPC_FILENAME_PATTERN.search(filename)
+    return match.group(1) if match else None
+
+class LabelFileCatalog:
+    """In-memory list of the label PNGs in the labels directory, kept current by a DirectoryWatcher"""
+
+    def __init__(self):
+        self.directory: Optional[str] = None
+        self._files = set()
+        self._by_upc: Dict[str, Set[str]] = {}
+        self._loaded = threading.Event()
+        self._lock = threading.Lock()
+        self._watcher: Optional[DirectoryWatcher] = None
+        self._listeners: List[Callable[[], None]] = []
+        # Incremented on every change, so callers can tell when cached results are stale
+        self.version = 0
+
+    def set_directory(self, directory: Optional[str]) -> None:
+        """Switch the catalog to a new labels directory and start watching it"""
+        if directory == self.directory and self._watcher is not None:
+            return
+
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+        with self._lock:
+            self.directory = directory
+            self._files = set()
+            self._by_upc = {}
+            self._loaded.clear()
+            self.version += 1
+
+        if directory and os.path.isdir(directory):
+            # The watcher does the initial listing in its own thread and reports
+            # every file as added
+            self._watcher = DirectoryWatcher(directory, self._on_changes, extensions=('.png',))
+            self._watcher.start()
+
+    def _on_changes(self, added: List[str], removed: List[str]) -> None:
+        """Apply changes reported by the watcher and notify listeners"""
+        with self._lock:
+            for filename in removed:
+                self._discard(filename)
+            for filename in added:
+                self._add(filename)
+            self.version += 1
+        self._loaded.set()
+        self._notify()
+
+    def _add(self, filename: str) -> None:
+        self._files.add(filename)
+        upc = upc_from_filename(filename)
+        if upc:
+            self._by_upc.setdefault(upc, set()).add(filename)
+
+    def _discard(self, filename: str) -> None:
+        self._files.discard(filename)
+        upc = upc_from_filename(filename)
+        if upc and upc in self._by_upc:
+            self._by_upc[upc].discard(filename)
+            if not self._by_upc[upc]:
+                del self._by_upc[upc]
+
+    def add_file(self, filename: str) -> None:
+        """Record a label saved by this application without waiting for the watcher"""
+        if not filename.lower().endswith('.png'):
+            return
+        with self._lock:
+            if filename in self._files:
+                return
+            self._add(filename)
+            self.version += 1
+        self._notify()
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Register a function called (from any thread) when the file list changes"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], None]) -> None:
+        """Unregister a listener added with add_listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Error in label file listener: {str(e)}")
+
+    def count(self) -> int:
+        """Number of label PNGs in the directory"""
+        with self._lock:
+            return len(self._files)
+
+    def files(self) -> List[str]:
+        """Sorted list of label PNG filenames"""
+        with self._lock:
+            return sorted(self._files)
+
+    def find_by_upc(self, upc: str) -> List[str]:
+        """Sorted label filenames for an exact 12-digit UPC"""
+        with self._lock:
+            return sorted(self._by_upc.get(upc, ()))
+
+    def has_label_for_upc(self, upc: str, timeout: float = 2.0) -> bool:
+        """Check whether a label already exists for a UPC, waiting briefly for the initial listing"""
+        self._loaded.wait(timeout)
+        with self._lock:
+            return upc in self._by_upc
+
+    def stop(self) -> None:
+        """Stop watching the directory"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
@@ -27,6 +27,11 @@ if current_dir not in sys.path:
 
 from src.utils.logger import setup_logger
 from src.ui.welcome_window import WelcomeWindow
+from src.utils.label_watcher import stop_all_label_watchers
+from src.utils.print_queue import stop_print_queue
+from src.utils.mirror_cache import close_mirror_cache
+from src.utils.event_journal import stop_journal_projector
+from src.utils.db_manager import stop_checkpointer
 
 # Setup logger
 logger = setup_logger()
@@ -139,6 +144,31 @@ def handle_exception(exc_type, exc_value, exc_traceback):
 def cleanup():
     """Cleanup resources before exit"""
     logger.info("Application shutting down")
+    try:
+        # Let labels already queued finish printing
+        stop_print_queue()
+    except Exception as e:
+        logger.error(f"Error stopping print queue: {str(e)}")
+    try:
+        # Save when the cached mirrored labels were last used
+        close_mirror_cache()
+    except Exception as e:
+        logger.error(f"Error closing mirror cache: {str(e)}")
+    try:
+        # Commit the queued scans and apply them to the logs, the Records tab and Google Sheets
+        stop_journal_projector()
+    except Exception as e:
+        logger.error(f"Error stopping journal projector: {str(e)}")
+    try:
+        # Checkpoint the WAL files one last time
+        stop_checkpointer()
+    except Exception as e:
+        logger.error(f"Error stopping database checkpointer: {str(e)}")
+    try:
+        # Stop watching the labels directories
+        stop_all_label_watchers()
+    except Exception as e:
+        logger.error(f"Error stopping label watchers: {str(e)}")
     try:
         # Use system temp directory instead of relative path
         temp_dir = os.path.join(os.environ.get('TEMP', os.getcwd()), 'labelmaker_temp')
@@ -1,7 +1,7 @@
 import os
 import json
-from dataclasses import dataclass, asdict
-from typing import Optional
+from dataclasses import dataclass, asdict, field
+from typing import Optional, List
 
 @dataclass
 class Settings:
@@ -11,9 +11,18 @@ class Settings:
     barcode_width: int = 300
     barcode_height: int = 100
     last_directory: Optional[str] = None
+    label_directories: List[str] = field(default_factory=list)  # Additional label roots searched with last_directory
     mirror_print: bool = False
+    mirror_cache_max_mb: int = 200  # Size limit of the persistent mirrored label cache
     enable_advanced_features: bool = False
     default_print_quality: str = "Standard"
+    print_backend: str = "auto"  # auto, spooler, lp, file or shell (see print_backends)
+    printer_name: Optional[str] = None  # None prints to the system default printer
+    print_sink_directory: Optional[str] = None  # Output folder for the file print backend
+    label_output: str = "image"  # image, zpl or epl (printer command files written by the Label Maker)
+    log_durability: str = "grouped"  # grouped (group-commit scan events in the journal) or event (commit each one)
+    database_profile: str = "balanced"  # SQLite PRAGMA profile: balanced, durable or low_memory
+    database_pragmas: dict = field(default_factory=dict)  # synchronous, cache_size, mmap_size or temp_store overriding the profile
     stay_on_top: bool = False  # New setting for window stay-on-top feature
     transparency_enabled: bool = True  # Setting for window transparency feature
     transparency_level: float = 0.7  # Level of transparency when inactive (0.0 to 1.0)
@@ -27,6 +36,9 @@ class Settings:
     google_sheet_steps_column: str = "F"  # New setting for Steps value column
     google_sheet_steps_row: int = 3  # New setting for Steps value row
     google_sheets_connection_status: str = "Not Connected"
+    google_sheet_steps_date_ttl: int = 600  # Seconds the date read from Steps❗️!Q1 is reused (0 reads it for every write)
+    google_sheets_reads_per_minute: int = 60  # Sheets API read budget of this desk
+    google_sheets_writes_per_minute: int = 60  # Sheets API write budget of this desk
 
 class ConfigManager:
     """Manages application configuration and settings"""
@@ -61,9 +73,18 @@ class ConfigManager:
                     barcode_width=data.get('barcode_width', 300),
                     barcode_height=data.get('barcode_height', 100),
                     last_directory=data.get('last_directory'),
+                    label_directories=list(data.get('label_directories') or []),
                     mirror_print=data.get('mirror_print', False),
+                    mirror_cache_max_mb=int(data.get('mirror_cache_max_mb', 200)),
                     enable_advanced_features=data.get('enable_advanced_features', False),
                     default_print_quality=data.get('default_print_quality', "Standard"),
+                    print_backend=data.get('print_backend', "auto"),
+                    printer_name=data.get('printer_name'),
+                    print_sink_directory=data.get('print_sink_directory'),
+                    label_output=data.get('label_output', "image"),
+                    log_durability=data.get('log_durability', "grouped"),
+                    database_profile=data.get('database_profile', "balanced"),
+                    database_pragmas=data.get('database_pragmas', {}),
                     stay_on_top=data.get('stay_on_top', False),  # Load stay_on_top setting
                     transparency_enabled=data.get('transparency_enabled', True),  # Load transparency setting
                     transparency_level=float(data.get('transparency_level', 0.3)),  # Load transparency level
@@ -76,7 +97,10 @@ class ConfigManager:
                     google_sheet_sku_row=data.get('google_sheet_sku_row', 3),
                     google_sheet_steps_column=data.get('google_sheet_steps_column', 'H'),
                     google_sheet_steps_row=data.get('google_sheet_steps_row', 3),
-                    google_sheets_connection_status=data.get('google_sheets_connection_status', "Not Connected")
+                    google_sheets_connection_status=data.get('google_sheets_connection_status', "Not Connected"),
+                    google_sheet_steps_date_ttl=data.get('google_sheet_steps_date_ttl', 600),
+                    google_sheets_reads_per_minute=data.get('google_sheets_reads_per_minute', 60),
+                    google_sheets_writes_per_minute=data.get('google_sheets_writes_per_minute', 60)
                 )
                 return settings
             except Exception as e:
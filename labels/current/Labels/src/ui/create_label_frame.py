@@ -19,13 +19,17 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 
 # Import utility modules
 from src.utils.ui_components import create_title_section, create_colored_button, create_form_field_group
-from src.utils.barcode_operations import process_barcode
-from src.utils.sheets_operations import write_to_google_sheet
+from src.utils.barcode_operations import find_or_create_barcode
 from src.utils.file_utils import get_central_log_file_path, ensure_directory_exists, directory_exists, file_exists, find_files_by_sku
-from src.utils.log_manager import log_shipping_event
+from src.utils.label_index import get_label_directories, suggest_label_files
+from src.utils.print_backends import get_print_backend
+from src.utils.print_queue import PrintJob, get_print_queue, JOB_SENT, JOB_FAILED, JOB_UNCONFIRMED
+from src.utils.mirror_cache import warm_mirror_cache
+from src.utils.event_journal import record_scan, get_journal_projector
 from src.utils.text_context_menu import add_context_menu
 from src.ui.window_transparency import TransparencyManager, create_transparency_toggle_button
 from src.ui.returns_data_dialog import ReturnsDataDialog
+from src.utils.app_logger import get_app_logger
 
 # Configure logging
 logs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs')
@@ -36,6 +40,9 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Get logger
+logger = get_app_logger()
+
 class CreateLabelFrame(tk.Frame):
     """Frame-based implementation of the Create Label functionality"""
     
@@ -65,9 +72,18 @@ class CreateLabelFrame(tk.Frame):
         self.stay_on_top_var = tk.BooleanVar(value=config_manager.settings.stay_on_top if hasattr(config_manager.settings, 'stay_on_top') else False)
         self.transparency_var = tk.BooleanVar(value=config_manager.settings.transparency_enabled if hasattr(config_manager.settings, 'transparency_enabled') else True)
         
+        # Set while a print dialog waits for the Enter that confirms it
+        self._awaiting_print_dialog = False
+        
         # Create UI
         self._create_ui()
         
+        # Follow the print queue so results and failures show up here
+        get_print_queue().add_listener(self._on_print_job_changed)
+        get_journal_projector(config_manager).add_listener(self._post_status)
+        self.bind('<Destroy>', self._on_destroy, add='+')
+        self._update_queue_status()
+        
         # Initialize transparency manager
         self.transparency_manager = TransparencyManager(
             self.winfo_toplevel(),  # Use the top-level window
@@ -83,6 +99,7 @@ class CreateLabelFrame(tk.Frame):
         # Create a frame for the content with reduced vertical padding
         content_frame = tk.Frame(self, bg='white', padx=20, pady=10)
         content_frame.pack(fill='both', expand=True)
+        self.content_frame = content_frame
         
         # Add a return button in the top-left corner
         return_frame = tk.Frame(content_frame, bg='white')
@@ -215,6 +232,10 @@ class CreateLabelFrame(tk.Frame):
         
         # Add auto-copy and tab functionality for tracking number field
         def on_tracking_enter(event):
+            # The Enter confirming a print dialog must not start a scan
+            if self._awaiting_print_dialog:
+                return "break"
+            
             # Get the tracking number
             tracking_number = self.tracking_var.get().strip()
             
@@ -294,6 +315,10 @@ class CreateLabelFrame(tk.Frame):
             # Save the mirror print state
             self.config_manager.settings.mirror_print = current_state
             self.config_manager.save_settings()
+            
+            # Mirror the most printed labels ahead of time
+            if current_state:
+                warm_mirror_cache(self.config_manager.settings)
         
         # Set initial button state based on saved setting
         initial_color = '#90EE90' if self.mirror_print_var.get() else '#C71585'
@@ -459,6 +484,19 @@ class CreateLabelFrame(tk.Frame):
             fg='black'
         )
         self.status_label.pack(anchor='w')
+        
+        # Number of labels waiting in the print queue
+        self.queue_status_var = tk.StringVar(value="")
+        tk.Label(
+            status_frame,
+            textvariable=self.queue_status_var,
+            font=("Arial", 9),
+            bg='white',
+            fg='gray'
+        ).pack(anchor='w')
+        
+        # Side panel for failed print jobs
+        self._create_failures_panel()
     
     def _print_label(self):
         """Handle the print label button click"""
@@ -510,30 +548,9 @@ class CreateLabelFrame(tk.Frame):
         
         # If print is disabled, just log the information without printing
         if not print_enabled:
-            # Log the shipping record using the new logging system
-            log_shipping_event(
-                tracking_number=tracking_number,
-                sku=sku,
-                action="log_only",
-                status="success",
-                details="No print - logging only"
-            )
-            
-            # Also add to the original shipping_records database to ensure records appear in the Records tab
-            from src.utils.database_operations import add_shipping_record
-            add_shipping_record(tracking_number, sku, "No print - logging only")
-            
-            # Write to Google Sheets if configured
-            if (hasattr(self.config_manager.settings, 'google_sheet_url') and 
-                self.config_manager.settings.google_sheet_url and 
-                hasattr(self.config_manager.settings, 'google_sheet_name') and
-                self.config_manager.settings.google_sheet_name):
-                write_to_google_sheet(
-                    self.config_manager, 
-                    tracking_number, 
-                    sku, 
-                    update_status
-                )
+            # Record the scan once in the journal; the logs, the Records tab and
+            # Google Sheets are updated from it in the background
+            record_scan(self.config_manager, tracking_number, sku, "log_only", "No print - logging only")
             
             # Show success message
             self._show_success_message(f"Info for {sku} recorded (no print)")
@@ -547,58 +564,8 @@ class CreateLabelFrame(tk.Frame):
                 
             return True, "Info recorded without printing"
         
-        # Use our utility function to process the barcode
+        # Look up the label here and hand the printing to the background print queue
         try:
-            # Define a function to run after successful printing
-            def after_print_success():
-                # Log the shipping record using the new logging system ONLY after successful printing
-                log_shipping_event(
-                    tracking_number=tracking_number,
-                    sku=sku,
-                    action="print",
-                    status="success",
-                    details="Label printed successfully"
-                )
-                
-                # Also add to the original shipping_records database to ensure records appear in the Records tab
-                from src.utils.database_operations import add_shipping_record
-                add_shipping_record(tracking_number, sku, "Label printed successfully")
-                
-                # Write to Google Sheets ONLY after successful printing
-                if (hasattr(self.config_manager.settings, 'google_sheet_url') and 
-                    self.config_manager.settings.google_sheet_url and 
-                    hasattr(self.config_manager.settings, 'google_sheet_name') and
-                    self.config_manager.settings.google_sheet_name):
-                    # Use a separate thread for Google Sheets to avoid blocking UI
-                    def sheets_task():
-                        try:
-                            write_to_google_sheet(
-                                self.config_manager, 
-                                tracking_number, 
-                                sku, 
-                                update_status
-                            )
-                        except Exception as e:
-                            print(f"Error writing to Google Sheets: {str(e)}")
-                    
-                    import threading
-                    sheets_thread = threading.Thread(target=sheets_task)
-                    sheets_thread.daemon = True
-                    sheets_thread.start()
-                
-                # Show success message in the title
-                self._show_success_message(f"Label for {sku or tracking_number} printed successfully!")
-                
-                # Clear input fields for next label
-                self._clear_fields()
-                
-                # Update the label count
-                if self.update_label_count_callback:
-                    self.update_label_count_callback()
-            
-            # Use the simpler approach from the BAK version
-            from src.utils.barcode_operations import process_barcode
-            
             # Check if we have a valid tracking number or SKU
             if not tracking_number and not sku:
                 error_msg = "Either tracking number or SKU is required"
@@ -606,34 +573,54 @@ class CreateLabelFrame(tk.Frame):
                 messagebox.showerror("Error", error_msg)
                 return False, error_msg
                 
-            # Use our utility function to process the barcode
-            success, message = process_barcode(
+            # Find the label file (searches every label root through the label index)
+            success, label_path, _, message = find_or_create_barcode(
                 tracking_number,
                 sku,
-                labels_dir,
+                get_label_directories(self.config_manager.settings),
                 mirror_print,
-                update_status,
-                after_print_success
+                update_status
             )
             
-            # Use pyautogui to automatically press Enter after a shorter delay
-            if success:
-                try:
-                    # Reduced wait time for the print dialog to appear (from 2000ms to 1000ms)
-                    print("Waiting for print dialog to appear...")
-                    self.after(1000, lambda: self._press_enter_for_print_dialog())
-                except Exception as e:
-                    print(f"Error setting up auto-press Enter: {str(e)}")
-            else:
-                # Show error message if process_barcode failed
+            # No label matches the SKU, offer the closest labels for a mistyped or partial scan
+            if not success and message == "Label creation has been disabled":
+                suggested_path = self._choose_suggested_label(sku)
+                if suggested_path:
+                    success, label_path = True, suggested_path
+                elif suggested_path is not None:
+                    # The operator cancelled the suggestions
+                    self._update_status("", 'black')
+                    return False, "Suggestion cancelled"
+            
+            if not success:
+                # Show error message if no label was found
                 self._update_status(f"Error: {message}", 'red')
                 if message == "Label creation has been disabled":
                     self._show_create_label_dialog(sku)
                 else:
                     messagebox.showerror("Error", message)
                 self._clear_fields()
-                
-            return success, message
+                return False, message
+            
+            # Queue the job; logging and Google Sheets run on the print worker once it printed
+            job = PrintJob(
+                label_path,
+                tracking_number,
+                sku,
+                mirror_print,
+                get_print_backend(self.config_manager.settings),
+                self._record_printed_job
+            )
+            get_print_queue().submit(job)
+            
+            # Clear input fields right away so the next return can be scanned
+            self._clear_fields()
+            if job.backend is not None and job.backend.requires_dialog_confirmation:
+                # The print dialog is confirmed with a synthetic Enter, hold the next
+                # scan until then so the key can't land in the tracking field
+                self._hold_scanning(True)
+            self._update_queue_status()
+            return True, "Label queued for printing"
             
         except Exception as e:
             error_msg = str(e)
@@ -642,14 +629,194 @@ class CreateLabelFrame(tk.Frame):
             self._clear_fields()
             return False, error_msg
     
+    def _record_printed_job(self, job):
+        """
+        Record a printed label in the journal (runs on the print worker thread)
+        
+        Args:
+            job: The PrintJob that was printed
+        """
+        # Only printed labels are recorded; the logs, the Records tab and
+        # Google Sheets are updated from the journal in the background
+        if job.state == JOB_UNCONFIRMED:
+            details = f"Label sent, printer did not confirm: {job.message}"
+        else:
+            details = "Label printed successfully"
+        record_scan(self.config_manager, job.tracking_number, job.sku, "print", details)
+    
+    def _post_status(self, message, color='black'):
+        """Update the status message from a background thread"""
+        try:
+            self.after(0, lambda: self._update_status(message, color))
+        except (tk.TclError, RuntimeError):
+            # The frame was closed
+            pass
+    
+    def _on_print_job_changed(self, job):
+        """Handle a print queue state change (called on the print worker thread)"""
+        try:
+            self.after(0, lambda: self._show_print_job_state(job))
+        except (tk.TclError, RuntimeError):
+            # The frame was closed
+            pass
+    
+    def _show_print_job_state(self, job):
+        """Show the result of a print job in the UI"""
+        if not self.winfo_exists():
+            return
+        
+        if job.state == JOB_SENT:
+            # Show success message in the title
+            self._show_success_message(f"Label for {job.sku or job.tracking_number} printed successfully!")
+            
+            # Only the legacy shell backend opens a print dialog that needs confirming,
+            # the other backends submit the job directly
+            if job.backend is not None and job.backend.requires_dialog_confirmation:
+                logger.info("Waiting for print dialog to appear...")
+                self.after(1000, lambda: self._press_enter_for_print_dialog())
+            
+            # Update the label count
+            if self.update_label_count_callback:
+                self.update_label_count_callback()
+        elif job.state == JOB_UNCONFIRMED:
+            # The scan is recorded and the label may still come out, so it isn't
+            # offered for retry; printing it again could produce a duplicate
+            self._update_status(f"Printer did not confirm {job.describe()}, check the printer before reprinting", 'orange')
+            if self.update_label_count_callback:
+                self.update_label_count_callback()
+        elif job.state == JOB_FAILED:
+            self._add_failed_job(job)
+            self._update_status(f"Print failed: {job.describe()}", 'red')
+        
+        # No print dialog opened for the job, scanning can go on
+        if job.state in (JOB_UNCONFIRMED, JOB_FAILED) and self._awaiting_print_dialog:
+            self._hold_scanning(False)
+        
+        self._update_queue_status()
+    
+    def _update_queue_status(self):
+        """Show how many labels are waiting to print"""
+        pending = get_print_queue().pending_count()
+        self.queue_status_var.set(f"Printing: {pending} waiting" if pending else "")
+    
+    def _create_failures_panel(self):
+        """Create the side panel listing failed print jobs (shown only when there are failures)"""
+        self.failed_jobs = []
+        
+        self.failures_panel = tk.LabelFrame(self, text="Failed Prints", font=("Arial", 10, "bold"), bg='white', fg='#C62828', padx=5, pady=5)
+        
+        self.failures_listbox = tk.Listbox(self.failures_panel, font=("Arial", 9), width=32, selectmode=tk.EXTENDED)
+        self.failures_listbox.pack(fill='both', expand=True)
+        
+        # Show the error of the selected job
+        self.failure_detail_var = tk.StringVar(value="")
+        tk.Label(
+            self.failures_panel,
+            textvariable=self.failure_detail_var,
+            font=("Arial", 8),
+            bg='white',
+            fg='gray',
+            wraplength=220,
+            justify='left'
+        ).pack(fill='x', pady=(5, 0))
+        
+        def on_select(event):
+            selection = self.failures_listbox.curselection()
+            if selection:
+                self.failure_detail_var.set(self.failed_jobs[selection[-1]].message)
+        
+        self.failures_listbox.bind('<<ListboxSelect>>', on_select)
+        
+        buttons = tk.Frame(self.failures_panel, bg='white')
+        buttons.pack(fill='x', pady=(5, 0))
+        
+        tk.Button(buttons, text="Retry", command=self._retry_failed_jobs, width=8).pack(side='left')
+        tk.Button(buttons, text="Dismiss", command=self._dismiss_failed_jobs, width=8).pack(side='right')
+    
+    def _add_failed_job(self, job):
+        """Add a failed job to the failures panel, showing the panel if needed"""
+        if job not in self.failed_jobs:
+            self.failed_jobs.append(job)
+            self.failures_listbox.insert(tk.END, job.describe())
+        self._show_failures_panel(True)
+    
+    def _selected_failed_jobs(self):
+        """Get the selected failed jobs, or all of them if none is selected"""
+        selection = self.failures_listbox.curselection()
+        if not selection:
+            return list(self.failed_jobs)
+        return [self.failed_jobs[index] for index in selection]
+    
+    def _remove_failed_jobs(self, jobs):
+        """Remove jobs from the failures panel, hiding it when it is empty"""
+        for job in jobs:
+            index = self.failed_jobs.index(job)
+            del self.failed_jobs[index]
+            self.failures_listbox.delete(index)
+        self.failure_detail_var.set("")
+        if not self.failed_jobs:
+            self._show_failures_panel(False)
+    
+    def _retry_failed_jobs(self):
+        """Queue the selected failed jobs again"""
+        jobs = self._selected_failed_jobs()
+        self._remove_failed_jobs(jobs)
+        print_queue = get_print_queue()
+        for job in jobs:
+            print_queue.retry(job)
+        self._update_queue_status()
+    
+    def _dismiss_failed_jobs(self):
+        """Remove the selected failed jobs from the panel without printing them"""
+        self._remove_failed_jobs(self._selected_failed_jobs())
+    
+    def _show_failures_panel(self, show):
+        """Show or hide the failures panel, widening the window to make room for it"""
+        if show == bool(self.failures_panel.winfo_manager()):
+            return
+        
+        window = self.winfo_toplevel()
+        window.update_idletasks()
+        if show:
+            self.failures_panel.pack(side='right', fill='y', padx=(0, 10), pady=10, before=self.content_frame)
+            window.update_idletasks()
+            window.geometry(f"{window.winfo_width() + self.failures_panel.winfo_reqwidth() + 10}x{window.winfo_height()}")
+        else:
+            width = self.failures_panel.winfo_width()
+            self.failures_panel.pack_forget()
+            window.geometry(f"{max(window.winfo_width() - width - 10, 400)}x{window.winfo_height()}")
+    
+    def _on_destroy(self, event):
+        """Stop listening to the print queue when the frame is closed"""
+        if event.widget is self:
+            get_print_queue().remove_listener(self._on_print_job_changed)
+            get_journal_projector().remove_listener(self._post_status)
+    
     def _press_enter_for_print_dialog(self):
-        """Press Enter key to confirm print dialog"""
+        """Press Enter key to confirm print dialog, then let the next return be scanned"""
         try:
-            print("Pressing Enter to confirm print dialog...")
+            logger.info("Pressing Enter to confirm print dialog...")
             pyautogui.press('enter')
-            print("Enter key pressed")
         except Exception as e:
-            print(f"Error pressing Enter: {str(e)}")
+            logger.error(f"Error pressing Enter: {str(e)}")
+        finally:
+            self._hold_scanning(False)
+    
+    def _hold_scanning(self, hold):
+        """
+        Stop or resume accepting scans while a print dialog waits for its Enter
+        
+        Args:
+            hold: True to hold the next scan, False to accept scans again
+        """
+        self._awaiting_print_dialog = hold
+        tracking_widget = self.field_widgets["Tracking Number:"]["widget"]
+        tracking_widget.config(state="disabled" if hold else "normal")
+        if hold:
+            self._update_status("Confirming print dialog, wait before scanning...", 'blue')
+        elif self.winfo_exists():
+            self._update_status("", 'black')
+            self._focus_tracking_field()
     
     def _clear_fields(self):
         """Clear all form fields"""
@@ -801,6 +968,114 @@ class CreateLabelFrame(tk.Frame):
         except:
             pass
     
+    def _choose_suggested_label(self, sku):
+        """
+        Show the labels closest to a SKU that matched nothing and let the operator pick one
+        
+        Args:
+            sku: The SKU that was entered
+            
+        Returns:
+            str: Path of the chosen label, "" if the operator cancelled, or None if
+                there are no suggestions or the operator chose to create a new label
+        """
+        suggestions = suggest_label_files(get_label_directories(self.config_manager.settings), sku)
+        if not suggestions:
+            return None
+        
+        result = {"path": ""}
+        
+        # Create a custom dialog
+        dialog = tk.Toplevel(self)
+        dialog.title("Label Not Found")
+        dialog.geometry("460x300")
+        dialog.resizable(False, False)
+        dialog.transient(self)  # Set to be on top of the parent window
+        dialog.grab_set()  # Modal dialog
+        
+        # Make sure the dialog appears in the center of the parent window
+        dialog.update_idletasks()
+        x = self.winfo_rootx() + (self.winfo_width() - dialog.winfo_width()) // 2
+        y = self.winfo_rooty() + (self.winfo_height() - dialog.winfo_height()) // 2
+        dialog.geometry(f"+{x}+{y}")
+        
+        # Create and place the message
+        message = tk.Label(
+            dialog,
+            text=f"No label matches SKU \"{sku}\".\nDid you mean one of these?",
+            font=("Arial", 10),
+            justify="left"
+        )
+        message.pack(anchor="w", padx=20, pady=(15, 5))
+        
+        # List the suggestions, closest first
+        list_frame = tk.Frame(dialog, padx=20)
+        list_frame.pack(fill="both", expand=True)
+        
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side="right", fill="y")
+        
+        listbox = tk.Listbox(list_frame, font=("Arial", 10), yscrollcommand=scrollbar.set, activestyle="dotbox")
+        listbox.pack(side="left", fill="both", expand=True)
+        scrollbar.config(command=listbox.yview)
+        
+        for path, distance in suggestions:
+            listbox.insert(tk.END, os.path.basename(path))
+        listbox.selection_set(0)
+        listbox.activate(0)
+        
+        # Create a frame for the buttons
+        button_frame = tk.Frame(dialog, padx=10, pady=10)
+        button_frame.pack(fill="x", side="bottom")
+        
+        # Function to handle the Print Selected button click
+        def on_print_selected():
+            selection = listbox.curselection()
+            if selection:
+                result["path"] = suggestions[selection[0]][0]
+                dialog.destroy()
+        
+        # Function to handle the Create Label button click
+        def on_create_label():
+            result["path"] = None
+            dialog.destroy()
+        
+        # Create and place the buttons
+        print_button = tk.Button(
+            button_frame,
+            text="Print Selected",
+            command=on_print_selected,
+            width=15,
+            default="active"  # Make this the default button (activated by Enter)
+        )
+        print_button.pack(side="right", padx=5)
+        
+        create_button = tk.Button(
+            button_frame,
+            text="Create Label...",
+            command=on_create_label,
+            width=15
+        )
+        create_button.pack(side="right", padx=5)
+        
+        cancel_button = tk.Button(
+            button_frame,
+            text="Cancel",
+            command=dialog.destroy,
+            width=10
+        )
+        cancel_button.pack(side="right", padx=5)
+        
+        # Keyboard selection: arrows move in the list, Enter prints, Escape cancels
+        listbox.focus_set()
+        listbox.bind("<Double-Button-1>", lambda event: on_print_selected())
+        dialog.bind("<Return>", lambda event: on_print_selected())
+        dialog.bind("<Escape>", lambda event: dialog.destroy())
+        
+        # Make the dialog modal
+        dialog.wait_window()
+        return result["path"]
+    
     def _show_create_label_dialog(self, sku):
         """
         Show a custom dialog with a 'Create Label' button when a label needs to be created
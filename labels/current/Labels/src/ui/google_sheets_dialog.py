@@ -4,13 +4,18 @@ import re
 import os
 import sys
 import json
+import threading
 from dataclasses import asdict
 
 # Add the project root directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from src.config.config_manager import ConfigManager
-from src.utils.sheets_utils import validate_sheet_url, get_sheet_names, test_sheet_connection
+from src.utils.sheets_utils import validate_sheet_url, get_sheet_names, test_sheet_connection, invalidate_sheets_session
+from src.utils.sheets_operations import refresh_steps_date
+from src.utils.sheet_reconcile import reconcile_sheet, push_missing_rows, DEFAULT_DAYS
+from src.utils.event_journal import get_journal_projector
+from src.utils.sheets_scheduler import get_sheets_scheduler
 from src.utils.file_utils import get_credentials_file_path, file_exists
 from src.utils.ui_utils import center_window, create_button, make_window_modal
 from src.utils.config_utils import save_config
@@ -160,7 +165,7 @@ class GoogleSheetsDialog(tk.Toplevel):
         self.sheet_dropdown.pack(side='left')
         
         # Add a refresh button
-        refresh_button = create_button(
+        self.refresh_button = create_button(
             sheet_selection_frame,
             text="Refresh",
             command=self._fetch_sheet_names,
@@ -169,7 +174,7 @@ class GoogleSheetsDialog(tk.Toplevel):
             pady=5,
             font=("Arial", 8)
         )
-        refresh_button.pack(side='left', padx=(10, 0))
+        self.refresh_button.pack(side='left', padx=(10, 0))
         
         # Tracking Number Column
         tracking_frame = tk.Frame(content_frame, bg='white')
@@ -350,6 +355,33 @@ class GoogleSheetsDialog(tk.Toplevel):
         )
         reset_rows_button.pack(side='right')
         
+        # Add a button to read the shift date again instead of waiting for the cache
+        self.refresh_date_button = create_button(
+            reset_button_container,
+            text="Refresh Steps Date",
+            command=self._refresh_steps_date,
+            bg='#2196F3',
+            padx=10,
+            pady=5,
+            font=("Arial", 8)
+        )
+        self.refresh_date_button.pack(side='right', padx=(0, 5))
+        
+        # Add a button to find scans that never reached the sheet
+        reconcile_frame = tk.Frame(content_frame, bg='white')
+        reconcile_frame.pack(fill='x', pady=(0, 10))
+        
+        self.reconcile_button = create_button(
+            reconcile_frame,
+            text=f"Find Missing Rows (last {DEFAULT_DAYS} days)",
+            command=self._reconcile_sheet,
+            bg='#2196F3',
+            padx=10,
+            pady=5,
+            font=("Arial", 8)
+        )
+        self.reconcile_button.pack(side='right')
+        
         # Status Frame
         status_frame = tk.Frame(content_frame, bg='white')
         status_frame.pack(fill='x', pady=(10, 0))
@@ -371,6 +403,27 @@ class GoogleSheetsDialog(tk.Toplevel):
         )
         self.status_label.pack(side='left', padx=(5, 0))
         
+        # Sheets API queue, shows when this desk is waiting for its quota
+        queue_frame = tk.Frame(content_frame, bg='white')
+        queue_frame.pack(fill='x', pady=(5, 0))
+        
+        queue_label_title = tk.Label(
+            queue_frame, 
+            text="Requests:", 
+            font=("Arial", 10, "bold"), 
+            bg='white'
+        )
+        queue_label_title.pack(side='left')
+        
+        self.queue_label = tk.Label(
+            queue_frame, 
+            text="", 
+            font=("Arial", 9), 
+            bg='white', 
+            fg='gray'
+        )
+        self.queue_label.pack(side='left', padx=(5, 0))
+        
         # Update the content frame to ensure it's properly sized for scrolling
         content_frame.update_idletasks()
         canvas.config(scrollregion=canvas.bbox("all"))
@@ -410,6 +463,7 @@ class GoogleSheetsDialog(tk.Toplevel):
         
         # Initialize status
         self._update_status()
+        self._update_queue_status()
     
     def _update_status(self):
         """Update the connection status display"""
@@ -420,50 +474,78 @@ class GoogleSheetsDialog(tk.Toplevel):
         else:
             self.status_label.config(text=self.connection_status, fg="orange")
     
+    def _update_queue_status(self):
+        """Show the Sheets API queue depth, refreshed every second while the dialog is open"""
+        if not self.winfo_exists():
+            return
+        scheduler = get_sheets_scheduler()
+        waiting = sum(scheduler.queue_depth().values())
+        self.queue_label.config(text=scheduler.describe(), fg='orange' if waiting else 'gray')
+        self.after(1000, self._update_queue_status)
+    
     def _fetch_sheet_names(self):
         """Fetch the available sheet names from the Google Sheet"""
-        try:
-            url = self.url_var.get().strip()
-            if not url:
-                messagebox.showerror("Error", "Please enter a Google Sheet URL")
-                return
-                
-            # Validate URL
-            is_valid, result = validate_sheet_url(url)
-            if not is_valid:
-                messagebox.showerror("Error", result)
-                return
-                
-            # Check for credentials file
-            creds_file = get_credentials_file_path()
-            if not file_exists(creds_file):
-                messagebox.showerror("Error", "Credentials file not found.\n\nPlease create a service account and download the credentials file.")
-                return
-                
-            # Get sheet names
-            success, result = get_sheet_names(result)
-            if not success:
-                messagebox.showerror("Error", result)
-                return
-                
-            sheet_names = result
-            if not sheet_names:
-                messagebox.showerror("Error", "No sheets found in the Google Sheet")
-                return
-                
-            # Update dropdown
-            self.sheet_dropdown['values'] = sheet_names
+        url = self.url_var.get().strip()
+        if not url:
+            messagebox.showerror("Error", "Please enter a Google Sheet URL")
+            return
             
-            # Set the selected sheet name to the previously saved one if it exists
-            saved_sheet_name = self.config_manager.settings.google_sheet_name
-            if saved_sheet_name and saved_sheet_name in sheet_names:
-                self.sheet_var.set(saved_sheet_name)
-            else:
-                # Default to the first sheet
-                self.sheet_var.set(sheet_names[0] if sheet_names else "")
+        # Validate URL
+        is_valid, result = validate_sheet_url(url)
+        if not is_valid:
+            messagebox.showerror("Error", result)
+            return
             
-        except Exception as e:
-            messagebox.showerror("Error", f"An unexpected error occurred:\n\n{str(e)}")
+        # Check for credentials file
+        creds_file = get_credentials_file_path()
+        if not file_exists(creds_file):
+            messagebox.showerror("Error", "Credentials file not found.\n\nPlease create a service account and download the credentials file.")
+            return
+        
+        sheet_id = result
+        self.refresh_button.config(state="disabled", text="Loading...")
+        
+        def fetch_task():
+            try:
+                success, result = get_sheet_names(sheet_id)
+            except Exception as e:
+                success, result = False, f"An unexpected error occurred:\n\n{str(e)}"
+            self.after(0, lambda: self._show_sheet_names(success, result))
+        
+        # Open the sheet in the background so the dialog stays responsive
+        threading.Thread(target=fetch_task, name="SheetNames", daemon=True).start()
+    
+    def _show_sheet_names(self, success, result):
+        """
+        Fill the sheet dropdown with the fetched sheet names.
+        
+        Args:
+            success: Whether the names could be read
+            result: List of sheet names, or an error message
+        """
+        if not self.winfo_exists():
+            return
+        self.refresh_button.config(state="normal", text="Refresh")
+        
+        if not success:
+            messagebox.showerror("Error", result, parent=self)
+            return
+            
+        sheet_names = result
+        if not sheet_names:
+            messagebox.showerror("Error", "No sheets found in the Google Sheet", parent=self)
+            return
+            
+        # Update dropdown
+        self.sheet_dropdown['values'] = sheet_names
+        
+        # Set the selected sheet name to the previously saved one if it exists
+        saved_sheet_name = self.config_manager.settings.google_sheet_name
+        if saved_sheet_name and saved_sheet_name in sheet_names:
+            self.sheet_var.set(saved_sheet_name)
+        else:
+            # Default to the first sheet
+            self.sheet_var.set(sheet_names[0] if sheet_names else "")
     
     def _save_settings(self):
         """Save the Google Sheets settings"""
@@ -521,6 +603,9 @@ class GoogleSheetsDialog(tk.Toplevel):
             self.config_manager.settings.google_sheet_steps_column = steps_col
             self.config_manager.settings.google_sheet_steps_row = steps_row
             
+            # Open the sheet again with the new settings
+            invalidate_sheets_session()
+            
             # Save settings
             try:
                 # Convert settings to dictionary
@@ -639,6 +724,120 @@ class GoogleSheetsDialog(tk.Toplevel):
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save settings: {str(e)}")
     
+    def _refresh_steps_date(self):
+        """Read the date from the Steps❗️ sheet again for the next writes"""
+        if not self.config_manager.settings.google_sheet_url:
+            messagebox.showerror("Error", "Please save a Google Sheet URL first")
+            return
+        
+        self.refresh_date_button.config(state="disabled", text="Reading...")
+        
+        def refresh_task():
+            try:
+                success, result = refresh_steps_date(self.config_manager)
+            except Exception as e:
+                success, result = False, str(e)
+            self.after(0, lambda: self._show_steps_date(success, result))
+        
+        # Read the sheet in the background so the dialog stays responsive
+        threading.Thread(target=refresh_task, name="StepsDate", daemon=True).start()
+    
+    def _show_steps_date(self, success, result):
+        """
+        Show the date read from the Steps❗️ sheet.
+        
+        Args:
+            success: Whether the date could be read
+            result: Date from Steps❗️!Q1 (None if the cell is empty), or an error message
+        """
+        if not self.winfo_exists():
+            return
+        self.refresh_date_button.config(state="normal", text="Refresh Steps Date")
+        
+        if not success:
+            messagebox.showerror("Error", result, parent=self)
+        elif result:
+            messagebox.showinfo("Steps Date", f"Using date {result} from Steps❗️!Q1", parent=self)
+        else:
+            messagebox.showinfo("Steps Date", "Steps❗️!Q1 is empty, the scan date will be used", parent=self)
+    
+    def _reconcile_sheet(self):
+        """Compare the shipping logs with the sheet and offer to write the missing rows"""
+        if not (self.config_manager.settings.google_sheet_url and self.config_manager.settings.google_sheet_name):
+            messagebox.showerror("Error", "Please save the Google Sheet settings first")
+            return
+        
+        self.reconcile_button.config(state="disabled", text="Checking...")
+        
+        def reconcile_task():
+            try:
+                # Let recent scans reach the logs and the outbox before comparing
+                get_journal_projector(self.config_manager).wait_until_projected()
+                success, result = reconcile_sheet(self.config_manager)
+            except Exception as e:
+                success, result = False, str(e)
+            self.after(0, lambda: self._show_reconcile_report(success, result))
+        
+        # Read the sheet in the background so the dialog stays responsive
+        threading.Thread(target=reconcile_task, name="SheetReconcile", daemon=True).start()
+    
+    def _show_reconcile_report(self, success, result):
+        """
+        Show the differences found and write the missing rows if confirmed.
+        
+        Args:
+            success: Whether the comparison could be made
+            result: ReconcileReport, or an error message
+        """
+        if not self.winfo_exists():
+            return
+        self.reconcile_button.config(state="normal", text=f"Find Missing Rows (last {DEFAULT_DAYS} days)")
+        
+        if not success:
+            messagebox.showerror("Error", result, parent=self)
+            return
+        if not result.missing:
+            messagebox.showinfo("Sheet Up to Date", result.summary(), parent=self)
+            return
+        if not messagebox.askyesno("Missing Rows", f"{result.summary()}\n\nWrite the missing rows to the end of the sheet?", parent=self):
+            return
+        
+        self.reconcile_button.config(state="disabled", text="Writing...")
+        
+        def push_task():
+            try:
+                written, error = push_missing_rows(self.config_manager, result.missing)
+            except Exception as e:
+                written, error = 0, str(e)
+            self.after(0, lambda: self._show_push_result(written, len(result.missing), error))
+        
+        threading.Thread(target=push_task, name="SheetBackfill", daemon=True).start()
+    
+    def _show_push_result(self, written, total, error):
+        """
+        Show the outcome of writing missing rows.
+        
+        Args:
+            written: Number of rows written
+            total: Number of rows that were missing
+            error: Error message if writing stopped early
+        """
+        if not self.winfo_exists():
+            return
+        self.reconcile_button.config(state="normal", text=f"Find Missing Rows (last {DEFAULT_DAYS} days)")
+        
+        # The row counters moved, show the new starting rows
+        self.tracking_row_var.set(str(self.config_manager.settings.google_sheet_tracking_row))
+        self.sku_row_var.set(str(self.config_manager.settings.google_sheet_sku_row))
+        self.steps_row_var.set(str(self.config_manager.settings.google_sheet_steps_row))
+        if self.update_callback:
+            self.update_callback()
+        
+        if error:
+            messagebox.showwarning("Warning", f"Wrote {written} of {total} row(s), then failed: {error}", parent=self)
+        else:
+            messagebox.showinfo("Success", f"Wrote {written} missing row(s) to the sheet", parent=self)
+    
     def center_window(self):
         """Center the window on the screen"""
         center_window(self)
@@ -17,8 +17,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 
 # Import utility modules
 from src.utils.ui_components import create_colored_button
-from src.utils.file_utils import find_files_by_sku
+from src.utils.label_index import find_label_files, get_label_directories
 from src.utils.barcode_operations import print_barcode
+from src.utils.print_backends import get_print_backend
 
 class LabelDetailsDialog(tk.Toplevel):
     """Dialog for displaying label details"""
@@ -278,17 +279,11 @@ class LabelDetailsDialog(tk.Toplevel):
                 # Update status
                 self.after(0, lambda: self._update_status(f"Searching for label files with SKU: {sku}"))
                 
-                # Find files by SKU
+                # Find files by SKU in every configured label directory
                 label_dirs = []
                 try:
-                    # Try to get label directories from config
-                    if hasattr(self.config_manager, 'settings') and hasattr(self.config_manager.settings, 'label_directories'):
-                        label_dirs = self.config_manager.settings.label_directories
-                    # Fallback to last_directory if label_directories is not available
-                    elif hasattr(self.config_manager, 'settings') and hasattr(self.config_manager.settings, 'last_directory'):
-                        last_dir = self.config_manager.settings.last_directory
-                        if last_dir and os.path.exists(last_dir):
-                            label_dirs = [last_dir]
+                    if hasattr(self.config_manager, 'settings'):
+                        label_dirs = get_label_directories(self.config_manager.settings)
                 except Exception as e:
                     print(f"Error accessing config settings: {e}")
                 
@@ -297,12 +292,8 @@ class LabelDetailsDialog(tk.Toplevel):
                     self.after(0, self._show_no_image)
                     return
                 
-                # Search for label files
-                found_files = []
-                for directory in label_dirs:
-                    if os.path.exists(directory):
-                        files = find_files_by_sku(directory, sku)
-                        found_files.extend(files)
+                # Search all label directories (scanned concurrently, results merged)
+                found_files = find_label_files(label_dirs, sku)
                 
                 # Store the found files
                 self.label_files = found_files
@@ -440,7 +431,8 @@ class LabelDetailsDialog(tk.Toplevel):
             success, message = print_barcode(
                 file_path, 
                 mirror_print=self.mirror_print.get(),
-                status_callback=lambda msg, color: self._update_status(msg)
+                status_callback=lambda msg, color: self._update_status(msg),
+                backend=get_print_backend(getattr(self.config_manager, 'settings', None))
             )
             
             if success:
@@ -18,7 +18,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 # Import utility modules
 from src.utils.ui_components import create_title_section, create_colored_button, create_form_field_group
 from src.utils.barcode_operations import find_or_create_barcode, print_barcode
+from src.utils.print_backends import get_print_backend
 from src.utils.file_utils import directory_exists, file_exists
+from src.utils.label_index import get_label_directories
 
 class NoRecordLabelFrame(tk.Frame):
     """Frame-based implementation of the No Record Label functionality"""
@@ -263,7 +265,7 @@ class NoRecordLabelFrame(tk.Frame):
                 success, barcode_path, is_new, message = find_or_create_barcode(
                     "",  # No tracking number
                     sku,
-                    labels_dir,
+                    get_label_directories(self.config_manager.settings),
                     status_callback=update_status
                 )
                 
@@ -279,15 +281,18 @@ class NoRecordLabelFrame(tk.Frame):
                 print("Starting print process...")
                 
                 # First start the print process
+                print_backend = get_print_backend(self.config_manager.settings)
                 success, message = print_barcode(
                     barcode_file,
                     mirror_print,
-                    update_status
+                    update_status,
+                    print_backend
                 )
                 
-                # Wait longer before trying to handle the print dialog
-                # This ensures the dialog is fully loaded before we try to interact with it
-                self.after(1000, self._press_enter_for_print_dialog)
+                # Only the legacy shell backend opens a print dialog that needs confirming
+                # Wait before trying to handle it so the dialog is fully loaded
+                if success and print_backend.requires_dialog_confirmation:
+                    self.after(1000, self._press_enter_for_print_dialog)
                 
                 if success:
                     # Show success message
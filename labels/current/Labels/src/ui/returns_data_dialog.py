@@ -9,6 +9,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import sys
 import datetime
+import threading
 from datetime import timedelta, date
 from tkcalendar import DateEntry  # Make sure to install this: pip install tkcalendar
 
@@ -22,12 +23,16 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 from src.utils.ui_components import create_title_section, create_colored_button
 from src.utils.database_operations import (
     initialize_database, 
-    get_shipping_records, 
+    get_shipping_records_page,
     get_record_count,
     update_shipping_record,
     delete_shipping_record,
     export_to_csv
 )
+from src.utils.label_index import get_label_directories
+from src.utils.print_backends import get_print_backend
+from src.utils.batch_print import print_skus, LABEL_PRINTED, LABEL_NOT_FOUND, LABEL_UNCONFIRMED
+from src.utils.background_worker import BackgroundWorker
 
 class ReturnsDataDialog(tk.Toplevel):
     """Dialog for viewing and managing shipping records"""
@@ -68,11 +73,23 @@ class ReturnsDataDialog(tk.Toplevel):
         self.end_date_var = tk.StringVar()
         self.status_var = tk.StringVar()
         
-        # Pagination variables
+        # Pagination variables (pages are read by cursor, the count arrives in the background)
         self.current_page = 1
         self.records_per_page = 20
-        self.total_records = 0
-        self.total_pages = 1
+        self.total_records = None
+        self.total_pages = None
+        self._filters = {}
+        self._page_cursors = [None]  # (timestamp, id) each page up to the current one starts after
+        self._next_cursor = None
+        self._has_next = False
+        self._prefetched = None
+        self._query_generation = 0
+        
+        # Prefetches and counts run one after another on a single thread and connection
+        self._worker = BackgroundWorker("RecordsWorker")
+        
+        # Set while an export runs; setting it cancels the export
+        self._export_cancel = None
         
         # Create UI
         self._create_ui()
@@ -271,8 +288,8 @@ class ReturnsDataDialog(tk.Toplevel):
         button_frame = tk.Frame(self.records_tab, bg='white')
         button_frame.pack(fill='x', pady=(10, 0))
         
-        # Export button
-        export_button = tk.Button(
+        # Export button (cancels the export while one is running)
+        self.export_button = tk.Button(
             button_frame,
             text="Export to CSV",
             command=self._export_to_csv,
@@ -280,7 +297,7 @@ class ReturnsDataDialog(tk.Toplevel):
             fg="white",
             width=15
         )
-        export_button.pack(side='left', padx=(0, 10))
+        self.export_button.pack(side='left', padx=(0, 10))
         
         # Delete button
         delete_button = tk.Button(
@@ -293,6 +310,17 @@ class ReturnsDataDialog(tk.Toplevel):
         )
         delete_button.pack(side='left')
         
+        # Reprint button
+        self.reprint_button = tk.Button(
+            button_frame,
+            text="Reprint Selected",
+            command=self._reprint_selected,
+            bg="#4CAF50",
+            fg="white",
+            width=15
+        )
+        self.reprint_button.pack(side='left', padx=(10, 0))
+        
         # Close button
         close_button = tk.Button(
             button_frame,
@@ -303,42 +331,79 @@ class ReturnsDataDialog(tk.Toplevel):
         close_button.pack(side='right')
     
     def _load_data(self):
-        """Load data into the treeview based on current filters"""
-        # Clear existing data
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
+        """Load the first page of records matching the current filters"""
         # Get search parameters
         search_term = self.search_var.get().strip()
         start_date = self.start_date_var.get()
         end_date = self.end_date_var.get()
         
-        # Calculate offset
-        offset = (self.current_page - 1) * self.records_per_page
+        # Later pages use the filters of this search, even if the boxes are edited meanwhile
+        self._filters = {
+            'search_term': search_term if search_term else None,
+            'start_date': start_date if start_date else None,
+            'end_date': end_date if end_date else None
+        }
         
-        # Get total count
-        self.total_records = get_record_count(
-            search_term=search_term if search_term else None,
-            start_date=start_date if start_date else None,
-            end_date=end_date if end_date else None
-        )
+        # Start over at the first page; results of the previous search still
+        # being fetched are dropped
+        self._query_generation += 1
+        self.current_page = 1
+        self._page_cursors = [None]
+        self._prefetched = None
+        self.total_records = None
+        self.total_pages = None
+        
+        self._show_page(self._fetch_page(None))
+        self._start_count()
+    
+    def _reload_page(self):
+        """Reload the current page after records were edited or deleted"""
+        self._query_generation += 1
+        self._prefetched = None
+        self.total_records = None
+        self.total_pages = None
+        
+        records = self._fetch_page(self._page_cursors[-1])
+        if not records and self.current_page > 1:
+            # The page's records are gone, show the one before it
+            self._page_cursors.pop()
+            self.current_page -= 1
+            records = self._fetch_page(self._page_cursors[-1])
+        
+        self._show_page(records)
+        self._start_count()
+    
+    def _fetch_page(self, cursor, filters=None, limit=None):
+        """
+        Get the records of a page.
         
-        # Calculate total pages
-        self.total_pages = max(1, (self.total_records + self.records_per_page - 1) // self.records_per_page)
-        
-        # Adjust current page if needed
-        if self.current_page > self.total_pages:
-            self.current_page = self.total_pages
-            offset = (self.current_page - 1) * self.records_per_page
-        
-        # Get records
-        records = get_shipping_records(
-            limit=self.records_per_page,
-            offset=offset,
-            search_term=search_term if search_term else None,
-            start_date=start_date if start_date else None,
-            end_date=end_date if end_date else None
+        Args:
+            cursor: (timestamp, id) the page starts after, or None for the first page
+            filters: Optional search filters (defaults to those of the current search)
+            limit: Optional page size (defaults to records_per_page)
+            
+        Returns:
+            list: Up to limit + 1 records; the extra one shows there is a next page
+        """
+        return get_shipping_records_page(
+            limit=(limit or self.records_per_page) + 1,
+            after=cursor,
+            **(filters if filters is not None else self._filters)
         )
+    
+    def _show_page(self, records):
+        """
+        Show a page of records in the treeview.
+        
+        Args:
+            records: Records returned by _fetch_page
+        """
+        # Clear existing data
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        
+        self._has_next = len(records) > self.records_per_page
+        records = records[:self.records_per_page]
         
         # Populate treeview
         for record in records:
@@ -355,29 +420,107 @@ class ReturnsDataDialog(tk.Toplevel):
                 )
             )
         
+        # The next page starts after the last record shown
+        self._next_cursor = (records[-1]["timestamp"], records[-1]["id"]) if records else None
+        
         # Update pagination controls
         self._update_pagination()
+        
+        if self._has_next:
+            self._prefetch_next_page()
+    
+    def _prefetch_next_page(self):
+        """Fetch the next page in the background so Next shows it at once"""
+        key = (self._query_generation, self._next_cursor, self.records_per_page)
+        filters = dict(self._filters)
+        
+        def prefetch_task():
+            # Skip pages the dialog has moved past while the task waited
+            if key != (self._query_generation, self._next_cursor, self.records_per_page):
+                return
+            records = self._fetch_page(key[1], filters, key[2])
+            self.after(0, lambda: self._store_prefetched(key, records))
+        
+        self._worker.submit(prefetch_task)
+    
+    def _store_prefetched(self, key, records):
+        """
+        Keep a prefetched page if it still follows the current one.
+        
+        Args:
+            key: (query generation, cursor, page size) the page was fetched for
+            records: Records of the page
+        """
+        if not self.winfo_exists():
+            return
+        # An empty page means the fetch failed, there is a next page
+        if records and key == (self._query_generation, self._next_cursor, self.records_per_page):
+            self._prefetched = (key, records)
+    
+    def _start_count(self):
+        """Count the records matching the current search in the background"""
+        generation = self._query_generation
+        filters = dict(self._filters)
+        
+        def count_task():
+            # Skip counts for searches that were replaced while the task waited
+            if generation != self._query_generation:
+                return
+            total = get_record_count(**filters)
+            self.after(0, lambda: self._set_total_records(generation, total))
+        
+        self._worker.submit(count_task)
+    
+    def _set_total_records(self, generation, total):
+        """
+        Show the number of records once it has been counted.
+        
+        Args:
+            generation: Query generation the count was started for
+            total: Number of matching records
+        """
+        if not self.winfo_exists() or generation != self._query_generation:
+            return
+        self.total_records = total
+        self.total_pages = max(1, (total + self.records_per_page - 1) // self.records_per_page)
+        self._update_pagination()
     
     def _update_pagination(self):
         """Update pagination controls based on current state"""
         # Update page info
-        self.page_info.config(text=f"Page {self.current_page} of {self.total_pages} ({self.total_records} records)")
+        if self.total_records is None:
+            self.page_info.config(text=f"Page {self.current_page} (counting records...)")
+        else:
+            self.page_info.config(text=f"Page {self.current_page} of {self.total_pages} ({self.total_records} records)")
         
         # Update button states
         self.prev_button.config(state="normal" if self.current_page > 1 else "disabled")
-        self.next_button.config(state="normal" if self.current_page < self.total_pages else "disabled")
+        self.next_button.config(state="normal" if self._has_next else "disabled")
     
     def _prev_page(self):
         """Go to the previous page"""
         if self.current_page > 1:
+            self._page_cursors.pop()
             self.current_page -= 1
-            self._load_data()
+            self._prefetched = None
+            self._show_page(self._fetch_page(self._page_cursors[-1]))
     
     def _next_page(self):
         """Go to the next page"""
-        if self.current_page < self.total_pages:
-            self.current_page += 1
-            self._load_data()
+        if not self._has_next:
+            return
+        
+        # Use the prefetched page if it's the one that follows
+        cursor = self._next_cursor
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched and prefetched[0] == (self._query_generation, cursor, self.records_per_page):
+            records = prefetched[1]
+        else:
+            records = self._fetch_page(cursor)
+        
+        self._page_cursors.append(cursor)
+        self.current_page += 1
+        self._show_page(records)
     
     def _change_records_per_page(self, event):
         """Change the number of records displayed per page"""
@@ -492,7 +635,7 @@ class ReturnsDataDialog(tk.Toplevel):
             dialog.destroy()
             
             # Reload data
-            self._load_data()
+            self._reload_page()
         else:
             messagebox.showerror("Error", "Failed to update record")
     
@@ -519,7 +662,7 @@ class ReturnsDataDialog(tk.Toplevel):
             delete_shipping_record(record_id)
         
         # Reload data
-        self._load_data()
+        self._reload_page()
         
         # Show success message
         if len(selection) == 1:
@@ -527,8 +670,90 @@ class ReturnsDataDialog(tk.Toplevel):
         else:
             messagebox.showinfo("Success", f"{len(selection)} records deleted successfully")
     
+    def _reprint_selected(self):
+        """Reprint the labels of the selected record(s) as one batch"""
+        # Get the selected items
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showinfo("Info", "No records selected")
+            return
+        
+        # Collect the SKU and tracking number of each record, in the order shown
+        entries = []
+        for item in selection:
+            values = self.tree.item(item)["values"]
+            entries.append((str(values[3]), str(values[2])))
+        
+        if len(entries) > 1 and not messagebox.askyesno("Confirm", f"Reprint the labels of these {len(entries)} records?"):
+            return
+        
+        settings = self.config_manager.settings
+        directories = get_label_directories(settings)
+        mirror_print = bool(getattr(settings, 'mirror_print', False))
+        backend = get_print_backend(settings)
+        
+        self.reprint_button.config(state="disabled", text="Printing...")
+        
+        def update_progress(done, total):
+            self.after(0, lambda: self.reprint_button.config(text=f"Printing {done}/{total}"))
+        
+        def reprint_task():
+            try:
+                results = print_skus(entries, directories, mirror_print, backend, progress_callback=update_progress)
+                error = None
+            except Exception as e:
+                results, error = [], str(e)
+            self.after(0, lambda: self._show_reprint_results(results, error))
+        
+        # Print in the background so the dialog stays responsive
+        threading.Thread(target=reprint_task, name="ReprintBatch", daemon=True).start()
+    
+    def _show_reprint_results(self, results, error=None):
+        """
+        Show the outcome of a batch reprint.
+        
+        Args:
+            results: BatchLabel objects returned by print_skus
+            error: Error message if the batch could not be printed at all
+        """
+        if not self.winfo_exists():
+            return
+        self.reprint_button.config(state="normal", text="Reprint Selected")
+        
+        if error:
+            messagebox.showerror("Error", f"Failed to reprint labels: {error}", parent=self)
+            return
+        
+        printed = [label for label in results if label.state == LABEL_PRINTED]
+        not_found = [label for label in results if label.state == LABEL_NOT_FOUND]
+        unconfirmed = [label for label in results if label.state == LABEL_UNCONFIRMED]
+        failed = [label for label in results if label.state not in (LABEL_PRINTED, LABEL_NOT_FOUND, LABEL_UNCONFIRMED)]
+        
+        if not not_found and not failed and not unconfirmed:
+            messagebox.showinfo("Success", f"{len(printed)} label(s) sent to the printer", parent=self)
+            return
+        
+        # List the labels that didn't print (the first few of each kind)
+        lines = [f"{len(printed)} of {len(results)} label(s) sent to the printer."]
+        if unconfirmed:
+            # These may still print, reprinting them could produce duplicates
+            lines.append(f"{len(unconfirmed)} label(s) were sent but not confirmed by the printer; "
+                         "check the printer before reprinting them.")
+        for title, labels in (("No label found", not_found), ("Not confirmed", unconfirmed), ("Failed", failed)):
+            if labels:
+                lines.append(f"\n{title}:")
+                lines.extend(f"  {label.describe()}: {label.message}" for label in labels[:10])
+                if len(labels) > 10:
+                    lines.append(f"  ...and {len(labels) - 10} more")
+        messagebox.showwarning("Reprint", "\n".join(lines), parent=self)
+    
     def _export_to_csv(self):
-        """Export current filtered records to CSV"""
+        """Export current filtered records to CSV, or cancel the export in progress"""
+        if self._export_cancel is not None:
+            self._export_cancel.set()
+            self.export_button.config(state="disabled", text="Cancelling...")
+            return
+        
         # Get file path
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
@@ -544,18 +769,67 @@ class ReturnsDataDialog(tk.Toplevel):
         start_date = self.start_date_var.get()
         end_date = self.end_date_var.get()
         
-        # Export to CSV
-        success = export_to_csv(
-            file_path,
-            search_term=search_term if search_term else None,
-            start_date=start_date if start_date else None,
-            end_date=end_date if end_date else None
-        )
+        cancel_event = threading.Event()
+        self._export_cancel = cancel_event
+        self.export_button.config(text="Cancel Export")
+        
+        def update_progress(done, total):
+            self.after(0, lambda: self._show_export_progress(cancel_event, done, total))
+        
+        def export_task():
+            success = export_to_csv(
+                file_path,
+                search_term=search_term if search_term else None,
+                start_date=start_date if start_date else None,
+                end_date=end_date if end_date else None,
+                progress_callback=update_progress,
+                cancel_event=cancel_event
+            )
+            self.after(0, lambda: self._show_export_result(cancel_event, success, file_path))
         
-        if success:
-            messagebox.showinfo("Success", f"Data exported to {file_path}")
+        # Export in the background so the dialog stays responsive
+        threading.Thread(target=export_task, name="RecordsExport", daemon=True).start()
+    
+    def _show_export_progress(self, cancel_event, done, total):
+        """
+        Show how far the export has got on the export button.
+        
+        Args:
+            cancel_event: Cancel event of the export reporting progress
+            done: Records written so far
+            total: Records being exported
+        """
+        if not self.winfo_exists() or cancel_event is not self._export_cancel or cancel_event.is_set():
+            return
+        self.export_button.config(text=f"Cancel {done}/{total}")
+    
+    def _show_export_result(self, cancel_event, success, file_path):
+        """
+        Show the outcome of an export.
+        
+        Args:
+            cancel_event: Cancel event of the finished export
+            success: Whether the export completed
+            file_path: Path of the CSV file
+        """
+        if not self.winfo_exists():
+            return
+        self._export_cancel = None
+        self.export_button.config(state="normal", text="Export to CSV")
+        
+        if cancel_event.is_set():
+            messagebox.showinfo("Export Cancelled", "The export was cancelled", parent=self)
+        elif success:
+            messagebox.showinfo("Success", f"Data exported to {file_path}", parent=self)
         else:
-            messagebox.showerror("Error", "Failed to export data")
+            messagebox.showerror("Error", "Failed to export data", parent=self)
+    
+    def destroy(self):
+        """Cancel a running export and stop the background worker before closing the dialog"""
+        if self._export_cancel is not None:
+            self._export_cancel.set()
+        self._worker.stop()
+        super().destroy()
     
 
 
@@ -9,7 +9,12 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 
 # Import utility modules
 from src.config.config_manager import ConfigManager
-from src.utils.file_utils import directory_exists, count_files_in_directory, get_project_root, file_exists
+from src.utils.file_utils import directory_exists, get_project_root, file_exists
+from src.utils.label_index import count_label_files, get_label_directories
+from src.utils.label_watcher import start_label_watcher, stop_label_watcher, add_label_change_listener
+from src.utils.mirror_cache import warm_mirror_cache
+from src.utils.event_journal import get_journal_projector
+from src.utils.db_manager import set_storage_profile, start_checkpointer
 from src.utils.ui_utils import center_window
 from src.utils.ui_components import (
     create_title_section, create_colored_button, create_button_grid, 
@@ -80,6 +85,13 @@ class WelcomeWindow(tk.Tk):
         # Initialize config manager
         self.config_manager = ConfigManager()
         
+        # Tune the databases opened from here on and checkpoint them in the background
+        set_storage_profile(
+            getattr(self.config_manager.settings, 'database_profile', 'balanced'),
+            getattr(self.config_manager.settings, 'database_pragmas', None)
+        )
+        start_checkpointer()
+        
         # Initialize stay on top variable
         self.stay_on_top_var = tk.BooleanVar(value=self.config_manager.settings.stay_on_top if hasattr(self.config_manager.settings, 'stay_on_top') else False)
         
@@ -137,17 +149,21 @@ class WelcomeWindow(tk.Tk):
         
         # Create the create label frame (initially hidden)
         self.create_label_frame = None
+        
+        # Apply any scans left in the journal by the previous session
+        get_journal_projector(self.config_manager)
+        
+        # Mirror the most printed labels in the background so mirror printing starts warm
+        if getattr(self.config_manager.settings, 'mirror_print', False):
+            warm_mirror_cache(self.config_manager.settings)
     
     def _create_title_section(self):
         """Create the title section of the window"""
-        # Get the labels directory from config
-        labels_dir = self.config_manager.settings.last_directory
+        # Get the label directories from config
+        label_dirs = get_label_directories(self.config_manager.settings)
         
-        # Count labels if directory exists
-        label_count = 0
-        if labels_dir and os.path.exists(labels_dir):
-            # Count files in the directory (assuming all files are labels)
-            label_count = count_files_in_directory(labels_dir)
+        # Count label files across all label directories from the label index
+        label_count = count_label_files(label_dirs) if label_dirs else 0
         
         # Create title section with label count
         title_frame, self.label_count_label, _ = create_title_section(
@@ -157,6 +173,11 @@ class WelcomeWindow(tk.Tk):
         )
         
         title_frame.pack(pady=20)
+        
+        # Keep the label count current as files are added or removed
+        self._watched_label_dirs = []
+        add_label_change_listener(self._on_label_files_changed)
+        self._watch_label_directories(label_dirs)
     
     def _create_button_section(self):
         """Create the button section of the window"""
@@ -596,11 +617,15 @@ class WelcomeWindow(tk.Tk):
     
     def update_label_count(self, directory=None):
         """Update the label count display based on the current directory"""
-        # Get the labels directory from config
-        labels_dir = directory or self.config_manager.settings.last_directory
+        # Get the label directories from config (a directory passed in replaces
+        # the primary labels directory, e.g. while browsing in Settings)
+        label_dirs = get_label_directories(self.config_manager.settings, directory)
         
-        # Count labels if directory exists using our utility function
-        label_count = count_files_in_directory(labels_dir)
+        # Make sure the directories are watched so the count stays current
+        self._watch_label_directories(label_dirs)
+        
+        # Count labels from the label index (no directory listing)
+        label_count = count_label_files(label_dirs) if label_dirs else 0
         
         # Update the label count display
         if hasattr(self, 'label_count_label'):
@@ -609,6 +634,35 @@ class WelcomeWindow(tk.Tk):
         if hasattr(self, 'label_count_var'):
             self.label_count_var.set(str(label_count))
     
+    def _watch_label_directories(self, label_dirs):
+        """
+        Start watching the label directories, replacing any previously watched ones
+        
+        Args:
+            label_dirs: Label directories to watch
+        """
+        if label_dirs == self._watched_label_dirs:
+            return
+        
+        for directory in self._watched_label_dirs:
+            if directory not in label_dirs:
+                stop_label_watcher(directory)
+        
+        self._watched_label_dirs = [d for d in label_dirs if start_label_watcher(d)]
+    
+    def _on_label_files_changed(self, directory, added, removed):
+        """
+        Handle label files being added or removed (called from the watcher thread)
+        
+        Args:
+            directory: Directory that changed
+            added: Filenames that were added
+            removed: Filenames that were removed
+        """
+        if directory in self._watched_label_dirs:
+            # Schedule the count update on the main thread
+            self.after(0, self.update_label_count)
+    
     def center_window(self, window=None):
         """
         Center a window on the screen
@@ -0,0 +1,90 @@
+"""
+Background worker thread for the Label Maker application.
+This module runs short tasks one after another on a single long-lived
+thread, so a window doesn't start a new thread, and open a new database
+connection, for every background query.
+"""
+import os
+import sys
+import queue
+import threading
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.db_manager import get_db_manager
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+class BackgroundWorker:
+    """
+    One worker thread that runs submitted tasks in order.
+
+    The thread starts with the first task and runs until stop(), so every
+    task shares its per-thread database connections, which are closed when
+    the thread ends. Tasks hand their results to the Tk thread themselves
+    (e.g. with widget.after).
+    """
+
+    def __init__(self, name="BackgroundWorker"):
+        """
+        Initialize the worker.
+
+        Args:
+            name: Name of the worker thread (also used in log messages)
+        """
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker thread if it isn't running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, task):
+        """
+        Queue a task behind the ones already waiting.
+
+        Args:
+            task: Function taking no arguments
+        """
+        self.start()
+        self._queue.put(task)
+
+    def _run(self):
+        """Worker thread loop: run tasks until a stop marker is queued."""
+        try:
+            while True:
+                task = self._queue.get()
+                if task is None:
+                    break
+                try:
+                    task()
+                except Exception as e:
+                    logger.error(f"Error in {self.name} task: {str(e)}")
+        finally:
+            get_db_manager().close_connection()
+
+    def stop(self):
+        """
+        Stop the worker thread after the task it is running.
+        Tasks still waiting are dropped; this doesn't wait for the thread.
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put(None)
@@ -7,7 +7,10 @@ import datetime
 from PIL import Image
 import barcode
 from barcode.writer import ImageWriter
-from src.utils.file_utils import ensure_directory_exists, file_exists, find_files_by_sku, log_shipping_record, directory_exists
+from src.utils.file_utils import ensure_directory_exists, file_exists, log_shipping_record, directory_exists
+from src.utils.label_index import find_label_files
+from src.utils.print_backends import get_print_backend, is_raw_label_file, find_printer_command_file, DEFAULT_JOB_TIMEOUT
+from src.utils.mirror_cache import get_mirrored_label
 
 def create_barcode_for_tracking(tracking_number, directory, mirror_print=False, status_callback=None):
     """
@@ -26,17 +29,57 @@ def create_barcode_for_tracking(tracking_number, directory, mirror_print=False,
         status_callback("Label creation has been disabled by administrator", 'orange')
     return False, None, "Label creation has been disabled by administrator"
 
-def print_barcode(barcode_path, mirror_print=False, status_callback=None):
+def resolve_print_path(barcode_path, mirror_print=False, backend=None, status_callback=None):
     """
-    Print a barcode image.
+    Get the file that has to be sent to the printer for a label.
+    
+    Args:
+        barcode_path: The path to the label file
+        mirror_print: Whether the label has to be printed mirrored
+        backend: Print backend the label will be sent to (its label format decides
+            whether the ZPL/EPL command file is used instead of the image)
+        status_callback: Optional callback function to update status messages
+        
+    Returns:
+        str: Path to the printer command file, the mirrored image or the label itself
+    """
+    if backend is None:
+        backend = get_print_backend()
+    
+    # Thermal printers take the ZPL/EPL the Label Maker wrote for the label instead of the image
+    command_path = find_printer_command_file(barcode_path, backend.label_format, mirror_print)
+    if command_path:
+        if status_callback:
+            status_callback(f"Using {backend.label_format.upper()} printer commands", 'blue')
+        return command_path
+    
+    # If mirror print is enabled, print the mirrored copy from the mirror cache
+    if mirror_print and not is_raw_label_file(barcode_path):
+        mirrored_path = get_mirrored_label(barcode_path)
+        if mirrored_path:
+            if status_callback:
+                status_callback("Using mirrored label for printing", 'blue')
+            return mirrored_path
+        if status_callback:
+            # Fall back to the original if the mirrored copy couldn't be created
+            status_callback("Failed to create mirrored image, using original", 'orange')
+    
+    return barcode_path
+
+def print_barcode(barcode_path, mirror_print=False, status_callback=None, backend=None, wait_for_completion=False):
+    """
+    Print a barcode image or raw printer command file.
     
     Args:
         barcode_path: The path to the barcode image
         mirror_print: Whether to create a mirrored version of the barcode before printing
         status_callback: Optional callback function to update status messages
+        backend: Print backend to use (defaults to the automatically chosen backend)
+        wait_for_completion: Wait until the job has left the print queue before returning
         
     Returns:
-        tuple: (success, message)
+        tuple: (success, message), success is None if the job was sent but the
+            printer didn't take it before the wait timed out
     """
     try:
         # First verify the file exists before attempting any operations
@@ -46,54 +89,38 @@ def print_barcode(barcode_path, mirror_print=False, status_callback=None):
                 status_callback(error_msg, 'red')
             return False, error_msg
             
-        # If mirror print is enabled, create a mirrored temporary copy
-        print_path = barcode_path
-        if mirror_print:
-            try:
-                # Use a cached temp directory path to avoid repeated calls
-                temp_dir = os.path.join(os.environ.get('TEMP', os.getcwd()), 'labelmaker_temp')
-                ensure_directory_exists(temp_dir)
-                
-                # Use a simpler filename to reduce path complexity
-                temp_path = os.path.join(temp_dir, f'mirror_{os.path.basename(barcode_path)}')
-                
-                # Only create mirrored image if it doesn't already exist or source has changed
-                if not file_exists(temp_path) or os.path.getmtime(barcode_path) > os.path.getmtime(temp_path):
-                    # Optimize image handling to reduce delay
-                    img = Image.open(barcode_path)
-                    mirrored_img = img.transpose(Image.FLIP_LEFT_RIGHT)
-                    
-                    # Save with optimized settings
-                    mirrored_img.save(temp_path, optimize=True)
-                    
-                # Use the mirrored path if it exists
-                if file_exists(temp_path):
-                    print_path = temp_path
-                    if status_callback:
-                        status_callback("Using mirrored label for printing", 'blue')
-                else:
-                    # Fall back to original if mirrored file wasn't created
-                    if status_callback:
-                        status_callback("Failed to create mirrored image, using original", 'orange')
-                    print_path = barcode_path
-            except Exception as e:
-                if status_callback:
-                    status_callback(f"Error creating mirrored image: {str(e)}", 'red')
-                # Continue with original image if mirroring fails
-                print_path = barcode_path
+        if backend is None:
+            backend = get_print_backend()
+        
+        # Pick the file to send: printer commands, the mirrored copy or the label itself
+        print_path = resolve_print_path(barcode_path, mirror_print, backend, status_callback)
         
         # Update status before printing to provide immediate feedback
         if status_callback:
             status_callback("Sending label to printer...", 'blue')
         
-        # Use a direct printing approach
-        os.startfile(print_path, "print")
+        # Submit the job through the print backend
+        success, message, job_id = backend.print_file(print_path, os.path.basename(barcode_path))
+        if not success:
+            raise RuntimeError(message)
+        
+        # Optionally wait for the printer to take the job
+        if wait_for_completion:
+            success, message = backend.wait_for_job(job_id, DEFAULT_JOB_TIMEOUT)
+            if success is None:
+                # The job is still queued, it may print later so it isn't a failure
+                if status_callback:
+                    status_callback(message, 'orange')
+                return None, message
+            if not success:
+                if status_callback:
+                    status_callback(message, 'red')
+                return False, message
         
-        # Return success immediately without waiting
         if status_callback:
             status_callback("Label sent to printer. Ready for next label.", 'green')
             
-        return True, "Label sent to printer"
+        return True, message
         
     except FileNotFoundError as e:
         # Specific handling for file not found errors
@@ -109,7 +136,9 @@ def print_barcode(barcode_path, mirror_print=False, status_callback=None):
             status_callback(f"Error printing barcode: {error_msg}", 'red')
         print(f"Error printing barcode: {error_msg}")
         
-        # Fallback to opening the file if printing fails
+        # Fallback to opening the file if printing fails (Windows only)
+        if not hasattr(os, 'startfile'):
+            return False, f"Error printing barcode: {error_msg}"
         try:
             # Verify file exists before attempting to open
             if file_exists(barcode_path):
@@ -133,7 +162,7 @@ def find_or_create_barcode(tracking_number, sku, directory, mirror_print=False,
     Args:
         tracking_number: The tracking number to encode in the barcode
         sku: The SKU to search for existing barcodes
-        directory: The directory to save the barcode image to
+        directory: The labels directory, or a list of label directories to search
         mirror_print: Whether to create a mirrored version of the barcode
         status_callback: Optional callback function to update status messages
         
@@ -143,8 +172,8 @@ def find_or_create_barcode(tracking_number, sku, directory, mirror_print=False,
     # Check if a file with this SKU already exists
     existing_file = None
     if sku:
-        # Search for files containing the SKU in the filename
-        matching_files = find_files_by_sku(directory, sku)
+        # Search the label index for files containing the SKU in the filename
+        matching_files = find_label_files(directory, sku)
         if matching_files:
             existing_file = matching_files[0]  # Use the first matching file
             if status_callback:
@@ -157,24 +186,26 @@ def find_or_create_barcode(tracking_number, sku, directory, mirror_print=False,
         status_callback("Label creation has been disabled", 'orange')
     return False, None, False, "Label creation has been disabled"
 
-def process_barcode(tracking_number, sku, directory, mirror_print=False, status_callback=None, after_print_callback=None):
+def process_barcode(tracking_number, sku, directory, mirror_print=False, status_callback=None, after_print_callback=None, backend=None):
     """
     Complete process for handling a barcode - find or create, log, and print.
     
     Args:
         tracking_number: The tracking number to encode in the barcode
         sku: The SKU to search for existing barcodes
-        directory: The directory to save the barcode image to
+        directory: The labels directory, or a list of label directories to search
         mirror_print: Whether to create a mirrored version of the barcode
         status_callback: Optional callback function to update status messages
         after_print_callback: Optional callback function to execute after successful printing
+        backend: Print backend to use (defaults to the automatically chosen backend)
         
     Returns:
         tuple: (success, message)
     """
     try:
         # Check if the directory exists - do this once at the beginning
-        if not directory_exists(directory):
+        directories = [directory] if isinstance(directory, str) else list(directory)
+        if not any(directory_exists(d) for d in directories):
             if status_callback:
                 status_callback(f"Error: Directory not found: {directory}", 'red')
             return False, f"Error: Directory not found: {directory}"
@@ -188,7 +219,7 @@ def process_barcode(tracking_number, sku, directory, mirror_print=False, status_
             return False, message
         
         # Print the barcode - we'll log shipping record only on successful print
-        print_success, print_message = print_barcode(barcode_path, mirror_print, status_callback)
+        print_success, print_message = print_barcode(barcode_path, mirror_print, status_callback, backend)
         
         # Execute the callback if printing was successful and a callback was provided
         if print_success and after_print_callback:
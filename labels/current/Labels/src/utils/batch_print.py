@@ -0,0 +1,318 @@
+"""
+Batch printing for the Label Maker application.
+This module resolves the labels for many SKUs at once, composes them into a
+single print job (a multi-page document for images, one concatenated command
+stream for ZPL/EPL) and reports the result of every label separately.
+"""
+import os
+import sys
+import datetime
+from PIL import Image
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.label_index import find_label_files
+from src.utils.barcode_operations import resolve_print_path
+from src.utils.print_backends import get_print_backend, is_raw_label_file, DEFAULT_JOB_TIMEOUT
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+# Batch label states
+LABEL_PENDING = 'pending'
+LABEL_PRINTED = 'printed'
+LABEL_NOT_FOUND = 'not found'
+LABEL_FAILED = 'failed'
+# Sent, but the printer didn't confirm the job; reprinting could print duplicates
+LABEL_UNCONFIRMED = 'unconfirmed'
+
+# Maximum number of labels spooled as one job; larger batches are split
+MAX_LABELS_PER_JOB = 250
+
+# Resolution stored in composed image documents so printers keep the label size
+BATCH_IMAGE_DPI = 300
+
+# Extra seconds allowed per label when waiting for a batch job to leave the queue
+JOB_TIMEOUT_PER_LABEL = 0.5
+
+class BatchLabel:
+    """One label of a batch print, and what happened to it."""
+
+    def __init__(self, sku, tracking_number='', label_path=None):
+        """
+        Initialize a batch label.
+
+        Args:
+            sku: SKU the label is printed for
+            tracking_number: Optional tracking number the label belongs to
+            label_path: Label file, or None to look it up by SKU
+        """
+        self.sku = sku
+        self.tracking_number = tracking_number
+        self.label_path = label_path
+        self.state = LABEL_PENDING
+        self.message = ""
+
+    def describe(self):
+        """
+        Get a short description of the label for result lists.
+
+        Returns:
+            str: SKU (and tracking number) of the label
+        """
+        if self.tracking_number:
+            return f"{self.sku} ({self.tracking_number})"
+        return self.sku
+
+def resolve_batch_labels(entries, directories):
+    """
+    Find the label file for every entry of a batch.
+
+    Args:
+        entries: SKUs, (sku, tracking_number) tuples or BatchLabel objects
+        directories: Label directories to search in
+
+    Returns:
+        list: BatchLabel objects in the order of the entries; labels without a
+            file are marked as not found
+    """
+    labels = []
+    for entry in entries:
+        if isinstance(entry, BatchLabel):
+            label = entry
+        elif isinstance(entry, (tuple, list)):
+            label = BatchLabel(*entry)
+        else:
+            label = BatchLabel(entry)
+
+        if not label.label_path:
+            # The first match is the file a single scan would print
+            matches = find_label_files(directories, label.sku) if label.sku else []
+            if matches:
+                label.label_path = matches[0]
+
+        if not label.label_path or not os.path.exists(label.label_path):
+            label.state = LABEL_NOT_FOUND
+            label.message = f"No label found for SKU {label.sku}"
+        labels.append(label)
+    return labels
+
+def get_batch_temp_dir():
+    """
+    Get the directory composed batch jobs are written to.
+
+    Returns:
+        str: Path to labelmaker_temp in the temp directory (emptied on exit)
+    """
+    temp_dir = os.path.join(os.environ.get('TEMP', os.getcwd()), 'labelmaker_temp')
+    os.makedirs(temp_dir, exist_ok=True)
+    return temp_dir
+
+def compose_raw_stream(paths, output_path):
+    """
+    Concatenate printer command files into one command stream.
+
+    Args:
+        paths: Paths to ZPL or EPL files of the same language
+        output_path: Path of the combined file
+
+    Returns:
+        list: Paths that could not be read (left out of the stream)
+    """
+    failed = []
+    with open(output_path, 'wb') as output:
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError as e:
+                logger.error(f"Error reading printer commands {path}: {str(e)}")
+                failed.append(path)
+                continue
+
+            # Every label format ends with a newline so the next one starts cleanly
+            output.write(data)
+            if not data.endswith(b'\n'):
+                output.write(b'\n')
+    return failed
+
+def compose_image_document(paths, output_path, image_format='tiff'):
+    """
+    Combine label images into one multi-page document, one label per page.
+
+    Args:
+        paths: Paths to label images
+        output_path: Path of the combined document
+        image_format: "tiff" or "pdf"
+
+    Returns:
+        list: Paths that could not be read (left out of the document)
+    """
+    pages = []
+    failed = []
+    for path in paths:
+        try:
+            with Image.open(path) as img:
+                # Labels are black on white: a bilevel page keeps the barcode
+                # sharp and lets TIFF/PDF use lossless fax compression
+                pages.append(img.convert('L').point(lambda value: 255 if value > 127 else 0, '1'))
+        except Exception as e:
+            logger.error(f"Error reading label image {path}: {str(e)}")
+            failed.append(path)
+
+    if not pages:
+        return failed
+
+    if image_format == 'pdf':
+        pages[0].save(output_path, format='PDF', save_all=True, append_images=pages[1:], resolution=BATCH_IMAGE_DPI)
+    else:
+        pages[0].save(output_path, format='TIFF', save_all=True, append_images=pages[1:],
+                      compression='group4', dpi=(BATCH_IMAGE_DPI, BATCH_IMAGE_DPI))
+    return failed
+
+def _group_by_output(labels, mirror_print, backend):
+    """
+    Group the labels of a batch by the kind of file sent to the printer.
+
+    Args:
+        labels: BatchLabel objects that have a label file
+        mirror_print: Whether to print mirrored labels
+        backend: Print backend the batch is sent to
+
+    Returns:
+        dict: Output extension ("image" for images) -> list of (label, print path),
+            in the order the kinds first appear
+    """
+    groups = {}
+    for label in labels:
+        print_path = resolve_print_path(label.label_path, mirror_print, backend)
+        kind = os.path.splitext(print_path)[1].lower() if is_raw_label_file(print_path) else 'image'
+        groups.setdefault(kind, []).append((label, print_path))
+    return groups
+
+def _print_group(kind, items, backend, title, wait_for_completion):
+    """
+    Compose and print one job for labels of the same kind, updating their states.
+
+    Args:
+        kind: Output extension of the labels, or "image"
+        items: List of (label, print path)
+        backend: Print backend to use
+        title: Document name shown in the print queue
+        wait_for_completion: Wait for the job to leave the print queue
+    """
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    if kind == 'image':
+        extension = '.pdf' if backend.batch_image_format == 'pdf' else '.tif'
+    else:
+        extension = kind
+    job_path = os.path.join(get_batch_temp_dir(), f"batch_{timestamp}{extension}")
+
+    try:
+        paths = [print_path for _, print_path in items]
+        if kind == 'image':
+            failed_paths = set(compose_image_document(paths, job_path, backend.batch_image_format))
+        else:
+            failed_paths = set(compose_raw_stream(paths, job_path))
+    except Exception as e:
+        for label, _ in items:
+            label.state = LABEL_FAILED
+            label.message = f"Error composing batch: {str(e)}"
+        logger.error(f"Error composing batch {title}: {str(e)}")
+        return
+
+    # Labels that couldn't be read are reported on their own, the rest still print
+    included = []
+    for label, print_path in items:
+        if print_path in failed_paths:
+            label.state = LABEL_FAILED
+            label.message = f"Could not read {os.path.basename(print_path)}"
+        else:
+            included.append(label)
+    if not included:
+        return
+
+    success, message, job_id = backend.print_file(job_path, title)
+    if success and backend.requires_dialog_confirmation:
+        # Nothing confirms the print dialog the shell opens for the batch document
+        success, message = None, "Sent to the print dialog, confirm it on screen"
+    elif success and wait_for_completion:
+        timeout = DEFAULT_JOB_TIMEOUT + JOB_TIMEOUT_PER_LABEL * len(included)
+        success, message = backend.wait_for_job(job_id, timeout)
+
+    if success is None:
+        state, outcome = LABEL_UNCONFIRMED, 'unconfirmed'
+    elif success:
+        state, outcome = LABEL_PRINTED, 'sent'
+    else:
+        state, outcome = LABEL_FAILED, 'failed'
+    for label in included:
+        label.state = state
+        label.message = message
+    logger.info(f"Batch job {title}: {len(included)} label(s) {outcome} ({message})")
+
+def print_label_batch(labels, mirror_print=False, backend=None, wait_for_completion=True, progress_callback=None):
+    """
+    Print many labels as a few spooled jobs instead of one job per label.
+
+    Labels are grouped by what is sent to the printer (images, ZPL or EPL)
+    and each group is composed into one document or command stream, split
+    into jobs of at most MAX_LABELS_PER_JOB labels.
+
+    Args:
+        labels: BatchLabel objects, usually from resolve_batch_labels
+        mirror_print: Whether to print mirrored labels
+        backend: Print backend to use (defaults to the automatically chosen backend)
+        wait_for_completion: Wait for each job to leave the print queue
+        progress_callback: Optional function called with (labels done, total) after every job
+
+    Returns:
+        list: The same BatchLabel objects, each marked printed, unconfirmed, not found or failed
+    """
+    if backend is None:
+        backend = get_print_backend()
+
+    printable = [label for label in labels if label.state != LABEL_NOT_FOUND and label.label_path]
+    groups = _group_by_output(printable, mirror_print, backend)
+
+    done = len(labels) - len(printable)
+    job_number = 0
+    for kind, items in groups.items():
+        for start in range(0, len(items), MAX_LABELS_PER_JOB):
+            chunk = items[start:start + MAX_LABELS_PER_JOB]
+            job_number += 1
+            title = f"Label batch {job_number} ({len(chunk)} labels)"
+            try:
+                _print_group(kind, chunk, backend, title, wait_for_completion)
+            except Exception as e:
+                logger.error(f"Error printing {title}: {str(e)}")
+                for label, _ in chunk:
+                    if label.state == LABEL_PENDING:
+                        label.state = LABEL_FAILED
+                        label.message = f"Error printing batch: {str(e)}"
+
+            done += len(chunk)
+            if progress_callback:
+                progress_callback(done, len(labels))
+
+    return labels
+
+def print_skus(skus, directories, mirror_print=False, backend=None, wait_for_completion=True, progress_callback=None):
+    """
+    Print the labels for a list of SKUs as one batch.
+
+    Args:
+        skus: SKUs or (sku, tracking_number) tuples
+        directories: Label directories to search in
+        mirror_print: Whether to print mirrored labels
+        backend: Print backend to use (defaults to the automatically chosen backend)
+        wait_for_completion: Wait for each job to leave the print queue
+        progress_callback: Optional function called with (labels done, total) after every job
+
+    Returns:
+        list: BatchLabel objects with the result of every SKU
+    """
+    labels = resolve_batch_labels(skus, directories)
+    return print_label_batch(labels, mirror_print, backend, wait_for_completion, progress_callback)
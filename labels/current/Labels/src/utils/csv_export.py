@@ -0,0 +1,61 @@
+"""
+CSV export helpers for the Label Maker application.
+Exports stream rows from a database cursor in fixed-size chunks, so memory
+use stays the same however many rows are written.
+"""
+import os
+import csv
+
+# Rows fetched from the cursor and written per chunk
+EXPORT_CHUNK_SIZE = 1000
+
+def write_cursor_to_csv(cursor, file_path, fieldnames, total=None, progress_callback=None,
+                        cancel_event=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Write the rows of a query to a CSV file, one chunk at a time.
+    The cursor is closed afterwards, and the file is removed if the export
+    is cancelled or fails.
+
+    Args:
+        cursor: Cursor of an executed query selecting the fieldnames columns, in order
+        file_path: Path to save the CSV file
+        fieldnames: Column names written as the header
+        total: Optional number of rows the query returns (passed on to progress_callback)
+        progress_callback: Optional function called with (rows written, total) after every chunk
+        cancel_event: Optional threading.Event that stops the export when set
+        chunk_size: Number of rows fetched per chunk
+
+    Returns:
+        int: Number of rows written, or None if the export was cancelled
+
+    Raises:
+        Exception: Any error reading the rows or writing the file
+    """
+    written = 0
+    completed = False
+    try:
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                written += len(rows)
+                if progress_callback:
+                    progress_callback(written, total)
+
+        completed = True
+        return written
+    finally:
+        cursor.close()
+        if not completed:
+            # Don't leave a partial export behind
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
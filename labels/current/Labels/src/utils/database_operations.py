@@ -2,12 +2,17 @@
 Database operations module for the Label Maker application.
 This module provides functions for interacting with a local SQLite database
 to store and retrieve shipping records.
+
+Searches go through an FTS5 trigram index over the searchable columns, kept
+in sync with shipping_records by triggers, so partial matches don't scan the
+whole table. Words shorter than a trigram, and SQLite builds without FTS5,
+fall back to LIKE.
 """
 
 import os
-import sqlite3
 import datetime
 import logging
+import sqlite3
 import sys
 
 # Add the project root directory to the Python path
@@ -15,6 +20,20 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 
 # Import utility modules
 from src.utils.file_utils import ensure_directory_exists
+from src.utils.db_manager import SHIPPING_RECORDS_DB, register_database, get_db_manager, db_connection
+from src.utils.csv_export import write_cursor_to_csv
+
+# Columns matched by searches
+SEARCH_FIELDS = ["tracking_number", "sku", "status", "notes"]
+
+# Shortest word the trigram index can match
+MIN_INDEXED_WORD_LENGTH = 3
+
+# Escape character for LIKE patterns, so % and _ in a search word match literally
+LIKE_ESCAPE = '\\'
+
+# Set once the search index is in place
+_search_index_available = False
 
 def get_database_path():
     """
@@ -37,46 +56,121 @@ def get_database_path():
     
     return database_directory, database_file_path
 
-def initialize_database():
+def _create_schema(conn):
     """
-    Initialize the database with necessary tables if they don't exist.
+    Create the shipping_records table and its indexes if they don't exist.
     
-    Returns:
-        bool: True if successful, False otherwise
+    Args:
+        conn: Connection to the shipping records database
     """
+    cursor = conn.cursor()
+    
+    # Create the shipping_records table if it doesn't exist
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS shipping_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        tracking_number TEXT,
+        sku TEXT NOT NULL,
+        status TEXT NOT NULL,
+        notes TEXT
+    )
+    ''')
+    
+    # Create an index on tracking_number and sku for faster lookups
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tracking_number ON shipping_records (tracking_number)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sku ON shipping_records (sku)')
+    
+    # Records are listed newest first and paged by (timestamp, id)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp_id ON shipping_records (timestamp, id)')
+    
+    _create_search_index(conn)
+
+def _create_search_index(conn):
+    """
+    Create the full-text search index and the triggers keeping it in sync.
+    The index is built from the existing records the first time.
+    
+    Args:
+        conn: Connection to the shipping records database
+    """
+    global _search_index_available
+    
+    cursor = conn.cursor()
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'shipping_records_fts'"
+    ).fetchone()
+    
     try:
-        _, db_path = get_database_path()
-        
-        # Connect to the database (creates it if it doesn't exist)
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Create the shipping_records table if it doesn't exist
+        # External content table: only the trigrams are stored, the text stays in shipping_records
         cursor.execute('''
-        CREATE TABLE IF NOT EXISTS shipping_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            tracking_number TEXT,
-            sku TEXT NOT NULL,
-            status TEXT NOT NULL,
-            notes TEXT
+        CREATE VIRTUAL TABLE IF NOT EXISTS shipping_records_fts USING fts5(
+            tracking_number, sku, status, notes,
+            content='shipping_records', content_rowid='id', tokenize='trigram'
         )
         ''')
-        
-        # Create an index on tracking_number and sku for faster lookups
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_tracking_number ON shipping_records (tracking_number)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sku ON shipping_records (sku)')
-        
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
-        
-        return True
+    except sqlite3.OperationalError as e:
+        # SQLite older than 3.34 or built without FTS5, searches use LIKE
+        logging.warning(f"Full-text search index not available: {str(e)}")
+        return
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS shipping_records_fts_insert AFTER INSERT ON shipping_records BEGIN
+        INSERT INTO shipping_records_fts (rowid, tracking_number, sku, status, notes)
+        VALUES (new.id, new.tracking_number, new.sku, new.status, new.notes);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS shipping_records_fts_delete AFTER DELETE ON shipping_records BEGIN
+        INSERT INTO shipping_records_fts (shipping_records_fts, rowid, tracking_number, sku, status, notes)
+        VALUES ('delete', old.id, old.tracking_number, old.sku, old.status, old.notes);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS shipping_records_fts_update AFTER UPDATE ON shipping_records BEGIN
+        INSERT INTO shipping_records_fts (shipping_records_fts, rowid, tracking_number, sku, status, notes)
+        VALUES ('delete', old.id, old.tracking_number, old.sku, old.status, old.notes);
+        INSERT INTO shipping_records_fts (rowid, tracking_number, sku, status, notes)
+        VALUES (new.id, new.tracking_number, new.sku, new.status, new.notes);
+    END
+    ''')
+    
+    if not exists:
+        # Index the records written before the index existed
+        cursor.execute("INSERT INTO shipping_records_fts (shipping_records_fts) VALUES ('rebuild')")
+        logging.info("Built the shipping records search index")
     
+    _search_index_available = True
+
+def rebuild_search_index():
+    """
+    Rebuild the full-text search index from the shipping records.
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if not initialize_database() or not _search_index_available:
+        return False
+    try:
+        with db_connection(SHIPPING_RECORDS_DB) as conn:
+            conn.execute("INSERT INTO shipping_records_fts (shipping_records_fts) VALUES ('rebuild')")
+        return True
     except Exception as e:
-        logging.error(f"Error initializing database: {str(e)}")
+        logging.error(f"Error rebuilding search index: {str(e)}")
         return False
 
+register_database(SHIPPING_RECORDS_DB, lambda: get_database_path()[1], _create_schema)
+
+def initialize_database():
+    """
+    Initialize the database with necessary tables if they don't exist.
+    The tables are only created once per process.
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    return get_db_manager().ensure_schema(SHIPPING_RECORDS_DB)
+
 def add_shipping_record(tracking_number, sku, status, notes=""):
     """
     Add a new shipping record to the database.
@@ -91,27 +185,15 @@ def add_shipping_record(tracking_number, sku, status, notes=""):
         bool: True if successful, False otherwise
     """
     try:
-        # Ensure database is initialized
-        initialize_database()
-        
-        _, db_path = get_database_path()
-        
         # Create timestamp
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        # Connect to the database
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Insert the record
-        cursor.execute(
-            "INSERT INTO shipping_records (timestamp, tracking_number, sku, status, notes) VALUES (?, ?, ?, ?, ?)",
-            (timestamp, tracking_number, sku, status, notes)
-        )
-        
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
+        # Insert the record (committed when the block ends)
+        with db_connection(SHIPPING_RECORDS_DB) as conn:
+            conn.execute(
+                "INSERT INTO shipping_records (timestamp, tracking_number, sku, status, notes) VALUES (?, ?, ?, ?, ?)",
+                (timestamp, tracking_number, sku, status, notes)
+            )
         
         return True
     
@@ -134,116 +216,103 @@ def get_shipping_records(limit=100, offset=0, search_term=None, start_date=None,
         list: List of shipping records as dictionaries
     """
     try:
-        # Ensure database is initialized
-        initialize_database()
-        
-        _, db_path = get_database_path()
-        
-        # Connect to the database
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row  # This enables column access by name
-        cursor = conn.cursor()
-        
         # Build the query
         query = "SELECT * FROM shipping_records"
-        params = []
         
         # Add WHERE clause if filters are provided
-        where_clauses = []
-        
-        if search_term:
-            # Use the enhanced search functionality
-            search_clause, params = _build_enhanced_search_conditions(search_term, params)
-            if search_clause:
-                where_clauses.append(search_clause)
-        
-        if start_date:
-            where_clauses.append("timestamp >= ?")
-            params.append(f"{start_date} 00:00:00")
-        
-        if end_date:
-            where_clauses.append("timestamp <= ?")
-            params.append(f"{end_date} 23:59:59")
+        where_clauses, params = _build_filter_conditions(search_term, start_date, end_date)
         
         if where_clauses:
             query += " WHERE " + " AND ".join(where_clauses)
         
         # Add ORDER BY, LIMIT, and OFFSET
-        query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+        query += " ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
         params.extend([limit, offset])
         
-        # Execute the query
-        cursor.execute(query, params)
-        
-        # Fetch results
-        rows = cursor.fetchall()
+        # Execute the query (rows allow access by column name)
+        with db_connection(SHIPPING_RECORDS_DB) as conn:
+            rows = conn.execute(query, params).fetchall()
         
         # Convert rows to dictionaries
         records = [dict(row) for row in rows]
         
-        # Close connection
-        conn.close()
-        
         return records
     
     except Exception as e:
         logging.error(f"Error retrieving shipping records: {str(e)}")
         return []
 
-def get_record_count(search_term=None, start_date=None, end_date=None):
+def get_shipping_records_page(limit=100, after=None, search_term=None, start_date=None, end_date=None):
     """
-    Get the total count of shipping records with optional filtering.
+    Retrieve a page of shipping records, newest first, starting after a given record.
+    Unlike an OFFSET, the (timestamp, id) cursor is found through an index, so
+    every page takes the same time however deep it is.
     
     Args:
+        limit (int, optional): Maximum number of records to retrieve
+        after (tuple, optional): (timestamp, id) of the last record of the previous page
         search_term (str, optional): Search term to filter by tracking number or SKU
         start_date (str, optional): Start date for filtering (format: YYYY-MM-DD)
         end_date (str, optional): End date for filtering (format: YYYY-MM-DD)
         
     Returns:
-        int: Total count of matching records
+        list: List of shipping records as dictionaries
     """
     try:
-        # Ensure database is initialized
-        initialize_database()
+        # Build the query
+        query = "SELECT * FROM shipping_records"
         
-        _, db_path = get_database_path()
+        # Add WHERE clause if filters are provided
+        where_clauses, params = _build_filter_conditions(search_term, start_date, end_date)
         
-        # Connect to the database
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        if after:
+            # Records older than the cursor, ties on timestamp broken by id
+            where_clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(after)
         
-        # Build the query
-        query = "SELECT COUNT(*) FROM shipping_records"
-        params = []
+        if where_clauses:
+            query += " WHERE " + " AND ".join(where_clauses)
         
-        # Add WHERE clause if filters are provided
-        where_clauses = []
+        # Add ORDER BY and LIMIT
+        query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit)
         
-        if search_term:
-            # Use the enhanced search functionality
-            search_clause, params = _build_enhanced_search_conditions(search_term, params)
-            if search_clause:
-                where_clauses.append(search_clause)
+        # Execute the query (rows allow access by column name)
+        with db_connection(SHIPPING_RECORDS_DB) as conn:
+            rows = conn.execute(query, params).fetchall()
         
-        if start_date:
-            where_clauses.append("timestamp >= ?")
-            params.append(f"{start_date} 00:00:00")
+        # Convert rows to dictionaries
+        return [dict(row) for row in rows]
+    
+    except Exception as e:
+        logging.error(f"Error retrieving shipping records page: {str(e)}")
+        return []
+
+def get_record_count(search_term=None, start_date=None, end_date=None):
+    """
+    Get the total count of shipping records with optional filtering.
+    
+    Args:
+        search_term (str, optional): Search term to filter by tracking number or SKU
+        start_date (str, optional): Start date for filtering (format: YYYY-MM-DD)
+        end_date (str, optional): End date for filtering (format: YYYY-MM-DD)
         
-        if end_date:
-            where_clauses.append("timestamp <= ?")
-            params.append(f"{end_date} 23:59:59")
+    Returns:
+        int: Total count of matching records
+    """
+    try:
+        # Build the query
+        query = "SELECT COUNT(*) FROM shipping_records"
+        
+        # Add WHERE clause if filters are provided
+        where_clauses, params = _build_filter_conditions(search_term, start_date, end_date)
         
         if where_clauses:
             query += " WHERE " + " AND ".join(where_clauses)
         
         # Execute the query
-        cursor.execute(query, params)
-        
-        # Fetch result
-        count = cursor.fetchone()[0]
-        
-        # Close connection
-        conn.close()
+        with db_connection(SHIPPING_RECORDS_DB) as conn:
+            count = conn.execute(query, params).fetchone()[0]
         
         return count
     
@@ -266,15 +335,6 @@ def update_shipping_record(record_id, tracking_number=None, sku=None, status=Non
         bool: True if successful, False otherwise
     """
     try:
-        # Ensure database is initialized
-        initialize_database()
-        
-        _, db_path = get_database_path()
-        
-        # Connect to the database
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
         # Build the update query
         query = "UPDATE shipping_records SET "
         params = []
@@ -304,12 +364,9 @@ def update_shipping_record(record_id, tracking_number=None, sku=None, status=Non
         query += " WHERE id = ?"
         params.append(record_id)
         
-        # Execute the query
-        cursor.execute(query, params)
-        
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
+        # Execute the query (committed when the block ends)
+        with db_connection(SHIPPING_RECORDS_DB) as conn:
+            conn.execute(query, params)
         
         return True
     
@@ -328,21 +385,9 @@ def delete_shipping_record(record_id):
         bool: True if successful, False otherwise
     """
     try:
-        # Ensure database is initialized
-        initialize_database()
-        
-        _, db_path = get_database_path()
-        
-        # Connect to the database
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Delete the record
-        cursor.execute("DELETE FROM shipping_records WHERE id = ?", (record_id,))
-        
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
+        # Delete the record (committed when the block ends)
+        with db_connection(SHIPPING_RECORDS_DB) as conn:
+            conn.execute("DELETE FROM shipping_records WHERE id = ?", (record_id,))
         
         return True
     
@@ -358,9 +403,6 @@ def import_from_text_log():
         tuple: (success, count) - Whether the import was successful and how many records were imported
     """
     try:
-        # Ensure database is initialized
-        initialize_database()
-        
         # Get the project root directory
         project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
         
@@ -371,65 +413,60 @@ def import_from_text_log():
         if not os.path.exists(log_file_path):
             return True, 0  # No file to import, consider it successful with 0 records
         
-        # Connect to the database
-        _, db_path = get_database_path()
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
         # Read the log file
         with open(log_file_path, 'r', encoding='utf-8') as f:
             lines = f.readlines()
         
-        # Process each line
-        count = 0
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
+        # Insert every record in one transaction (rolled back if anything fails)
+        with db_connection(SHIPPING_RECORDS_DB) as conn:
+            cursor = conn.cursor()
             
-            try:
-                # Parse the line
-                # Expected format: "YYYY-MM-DD HH:MM:SS - Tracking=XXX, SKU=YYY, Status=ZZZ"
-                parts = line.split(' - ', 1)
-                if len(parts) != 2:
+            # Process each line
+            count = 0
+            for line in lines:
+                line = line.strip()
+                if not line:
                     continue
                 
-                timestamp = parts[0]
-                info_part = parts[1]
-                
-                # Extract tracking number, SKU, and status
-                tracking_number = ""
-                sku = ""
-                status = ""
-                
-                info_items = info_part.split(', ')
-                for item in info_items:
-                    if item.startswith("Tracking="):
-                        tracking_number = item[len("Tracking="):]
-                    elif item.startswith("SKU="):
-                        sku = item[len("SKU="):]
-                    elif item.startswith("Status="):
-                        status = item[len("Status="):]
+                try:
+                    # Parse the line
+                    # Expected format: "YYYY-MM-DD HH:MM:SS - Tracking=XXX, SKU=YYY, Status=ZZZ"
+                    parts = line.split(' - ', 1)
+                    if len(parts) != 2:
+                        continue
+                    
+                    timestamp = parts[0]
+                    info_part = parts[1]
+                    
+                    # Extract tracking number, SKU, and status
+                    tracking_number = ""
+                    sku = ""
+                    status = ""
+                    
+                    info_items = info_part.split(', ')
+                    for item in info_items:
+                        if item.startswith("Tracking="):
+                            tracking_number = item[len("Tracking="):]
+                        elif item.startswith("SKU="):
+                            sku = item[len("SKU="):]
+                        elif item.startswith("Status="):
+                            status = item[len("Status="):]
+                    
+                    # Skip if SKU or status is missing
+                    if not sku or not status:
+                        continue
+                    
+                    # Insert the record
+                    cursor.execute(
+                        "INSERT INTO shipping_records (timestamp, tracking_number, sku, status, notes) VALUES (?, ?, ?, ?, ?)",
+                        (timestamp, tracking_number, sku, status, "Imported from text log")
+                    )
+                    
+                    count += 1
                 
-                # Skip if SKU or status is missing
-                if not sku or not status:
+                except Exception as e:
+                    logging.warning(f"Error parsing log line: {line}, Error: {str(e)}")
                     continue
-                
-                # Insert the record
-                cursor.execute(
-                    "INSERT INTO shipping_records (timestamp, tracking_number, sku, status, notes) VALUES (?, ?, ?, ?, ?)",
-                    (timestamp, tracking_number, sku, status, "Imported from text log")
-                )
-                
-                count += 1
-            
-            except Exception as e:
-                logging.warning(f"Error parsing log line: {line}, Error: {str(e)}")
-                continue
-        
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
         
         return True, count
     
@@ -437,10 +474,57 @@ def import_from_text_log():
         logging.error(f"Error importing from text log: {str(e)}")
         return False, 0
 
+def _build_filter_conditions(search_term=None, start_date=None, end_date=None):
+    """
+    Build the WHERE conditions shared by the record queries.
+    
+    Args:
+        search_term (str, optional): Search term to filter by tracking number or SKU
+        start_date (str, optional): Start date for filtering (format: YYYY-MM-DD)
+        end_date (str, optional): End date for filtering (format: YYYY-MM-DD)
+        
+    Returns:
+        tuple: (list of conditions to AND together, list of parameters)
+    """
+    params = []
+    where_clauses = []
+    
+    if search_term:
+        # Use the enhanced search functionality
+        search_clause, params = _build_enhanced_search_conditions(search_term, params)
+        if search_clause:
+            where_clauses.append(search_clause)
+    
+    if start_date:
+        where_clauses.append("timestamp >= ?")
+        params.append(f"{start_date} 00:00:00")
+    
+    if end_date:
+        where_clauses.append("timestamp <= ?")
+        params.append(f"{end_date} 23:59:59")
+    
+    return where_clauses, params
+
+def _like_pattern(word):
+    """
+    Build a LIKE pattern matching a word anywhere in a column.
+    
+    Args:
+        word (str): Search word, matched literally
+        
+    Returns:
+        str: Pattern for "LIKE ? ESCAPE LIKE_ESCAPE"
+    """
+    for char in (LIKE_ESCAPE, '%', '_'):
+        word = word.replace(char, LIKE_ESCAPE + char)
+    return f"%{word}%"
+
 def _build_enhanced_search_conditions(search_term, params):
     """
     Build enhanced search conditions for Google-like searches across multiple fields.
-    Supports partial word matching and multi-word searches.
+    Supports partial word matching and multi-word searches. Words of three or
+    more characters are looked up in the trigram index, shorter ones with LIKE.
+    Every word is matched literally.
     
     Args:
         search_term (str): The search term to process
@@ -458,20 +542,34 @@ def _build_enhanced_search_conditions(search_term, params):
     if not search_words:
         return None, params
     
-    # Define all searchable fields
-    fields = ["tracking_number", "sku", "status", "notes"]
-    
     # Create a list of conditions for each word
     word_conditions = []
     
+    # Make sure the search index has been checked for before deciding how to search
+    initialize_database()
+    
+    # Words the trigram index can match (a trigram matches anywhere in a column, like LIKE '%word%')
+    indexed_words = []
+    if _search_index_available:
+        indexed_words = [word for word in search_words if len(word) >= MIN_INDEXED_WORD_LENGTH]
+    
+    if indexed_words:
+        # One index lookup for all the words, each quoted so it is matched literally
+        match_query = " OR ".join('"' + word.replace('"', '""') + '"' for word in indexed_words)
+        word_conditions.append("id IN (SELECT rowid FROM shipping_records_fts WHERE shipping_records_fts MATCH ?)")
+        params.append(match_query)
+    
     for word in search_words:
+        if word in indexed_words:
+            continue
+        
         # Create a list of conditions for each field for this word
         field_conditions = []
         
-        for field in fields:
+        for field in SEARCH_FIELDS:
             # Add conditions for each field - partial word matching
-            field_conditions.append(f"{field} LIKE ?")
-            params.append(f"%{word}%")
+            field_conditions.append(f"{field} LIKE ? ESCAPE '{LIKE_ESCAPE}'")
+            params.append(_like_pattern(word))
         
         # Join the field conditions with OR (word appears in any field)
         word_condition = "(" + " OR ".join(field_conditions) + ")"
@@ -483,35 +581,45 @@ def _build_enhanced_search_conditions(search_term, params):
     
     return where_clause, params
 
-def export_to_csv(file_path, search_term=None, start_date=None, end_date=None):
+def export_to_csv(file_path, search_term=None, start_date=None, end_date=None,
+                  progress_callback=None, cancel_event=None):
     """
     Export shipping records to a CSV file.
+    Records are streamed from the database in chunks, so memory use stays the
+    same however many are exported.
     
     Args:
         file_path (str): Path to save the CSV file
         search_term (str, optional): Search term to filter by tracking number or SKU
         start_date (str, optional): Start date for filtering (format: YYYY-MM-DD)
         end_date (str, optional): End date for filtering (format: YYYY-MM-DD)
+        progress_callback (callable, optional): Called with (records written, total) after every chunk
+        cancel_event (threading.Event, optional): Stops the export when set
         
     Returns:
-        bool: True if successful, False otherwise
+        bool: True if successful, False if it failed or was cancelled
     """
     try:
-        import csv
+        # Count first so progress can be shown as a fraction
+        total = get_record_count(search_term=search_term, start_date=start_date, end_date=end_date)
         
-        # Get all matching records (no limit)
-        records = get_shipping_records(limit=1000000, offset=0, search_term=search_term, 
-                                      start_date=start_date, end_date=end_date)
+        # Build the query, in the order the Records tab shows
+        query = "SELECT id, timestamp, tracking_number, sku, status, notes FROM shipping_records"
+        where_clauses, params = _build_filter_conditions(search_term, start_date, end_date)
+        if where_clauses:
+            query += " WHERE " + " AND ".join(where_clauses)
+        query += " ORDER BY timestamp DESC, id DESC"
         
-        # Write to CSV
-        with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
+        # Write to CSV straight from the cursor
+        with db_connection(SHIPPING_RECORDS_DB) as conn:
             fieldnames = ['id', 'timestamp', 'tracking_number', 'sku', 'status', 'notes']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for record in records:
-                writer.writerow(record)
+            written = write_cursor_to_csv(
+                conn.execute(query, params), file_path, fieldnames, total, progress_callback, cancel_event
+            )
         
+        if written is None:
+            logging.info("CSV export cancelled")
+            return False
         return True
     
     except Exception as e:
@@ -0,0 +1,695 @@
+"""
+SQLite connection manager for the Label Maker application.
+Every store (shipping_records.db, labels.db and shipping_logs.db) registers
+its path and schema here. The schema is set up once per process, each thread
+keeps one long-lived connection per database (so SQLite's prepared statement
+cache stays warm) and every connection is closed when the application exits.
+
+Every connection the application opens, here or in the journal, outbox and
+cache modules, goes through configure_connection: databases use WAL
+journaling, so readers never block the scan writer, and the PRAGMA profile
+chosen in the settings. WAL files are checkpointed by a background thread
+instead of by whichever commit happens to fill them.
+
+Check that long reads don't hold up writes from the project root:
+
+    python -m src.utils.db_manager --readers 4 --seconds 5
+"""
+import os
+import sys
+import time
+import atexit
+import sqlite3
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+# Database names
+SHIPPING_RECORDS_DB = 'shipping_records'
+LABELS_DB = 'labels'
+SHIPPING_LOGS_DB = 'shipping_logs'
+
+# Prepared statements kept per connection
+STATEMENT_CACHE_SIZE = 256
+
+# Seconds a connection waits for a lock held by another connection
+BUSY_TIMEOUT = 10.0
+
+# PRAGMA profiles (cache_size is in KiB when negative, mmap_size in bytes)
+STORAGE_PROFILES = {
+    # Commits survive an application crash, the last ones may be lost on power loss
+    'balanced': {'synchronous': 'NORMAL', 'cache_size': -16384, 'mmap_size': 64 * 1024 * 1024, 'temp_store': 'MEMORY'},
+    # Every commit is synced to disk before it returns
+    'durable': {'synchronous': 'FULL', 'cache_size': -8192, 'mmap_size': 0, 'temp_store': 'DEFAULT'},
+    # For machines short on memory
+    'low_memory': {'synchronous': 'NORMAL', 'cache_size': -2048, 'mmap_size': 0, 'temp_store': 'FILE'}
+}
+DEFAULT_STORAGE_PROFILE = 'balanced'
+
+# Values accepted for the named PRAGMAs
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+TEMP_STORE_MODES = ('DEFAULT', 'FILE', 'MEMORY')
+
+# Seconds between background WAL checkpoints
+CHECKPOINT_INTERVAL = 30.0
+
+# WAL size (in pages) at which a commit checkpoints by itself; only reached
+# if the background checkpoints can't keep up
+WAL_AUTOCHECKPOINT_PAGES = 10000
+
+# Longest commit (in seconds) the contention check accepts
+CONTENTION_LATENCY_LIMIT = 0.5
+
+class DatabaseManager:
+    """
+    Registry of the application databases and their connections.
+
+    Connections have thread affinity: a thread always gets the same
+    connection for a database, and connections of threads that have ended
+    are closed the next time a connection is opened.
+    """
+
+    def __init__(self):
+        """Initialize an empty manager."""
+        self._lock = threading.RLock()
+        self._databases = {}
+        self._initialized = set()
+        self._local = threading.local()
+        self._connections = []
+        self._profile = dict(STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE])
+        self._wal_paths = set()
+        self._wal_warned = set()
+
+    def register(self, name, path_getter, schema):
+        """
+        Register a database.
+
+        Args:
+            name: Database name used with get_connection
+            path_getter: Function returning the path to the database file
+            schema: Function called with a connection to create the tables (once per process)
+        """
+        with self._lock:
+            self._databases[name] = (path_getter, schema)
+
+    def get_path(self, name):
+        """
+        Get the file path of a registered database.
+
+        Args:
+            name: Database name
+
+        Returns:
+            str: Path to the database file
+        """
+        path_getter, _ = self._databases[name]
+        return path_getter()
+
+    def set_profile(self, name=DEFAULT_STORAGE_PROFILE, overrides=None):
+        """
+        Choose the PRAGMA profile of connections opened from now on.
+
+        Args:
+            name: Key of STORAGE_PROFILES (unknown names fall back to the default)
+            overrides: Optional dictionary of PRAGMA values replacing the profile's
+
+        Returns:
+            dict: The PRAGMA values in use
+        """
+        if name not in STORAGE_PROFILES:
+            logger.warning(f"Unknown database profile '{name}', using '{DEFAULT_STORAGE_PROFILE}'")
+            name = DEFAULT_STORAGE_PROFILE
+        profile = dict(STORAGE_PROFILES[name])
+        for key, value in (overrides or {}).items():
+            if key in profile:
+                profile[key] = value
+            else:
+                logger.warning(f"Ignoring unknown database setting '{key}'")
+        with self._lock:
+            self._profile = profile
+        return dict(profile)
+
+    def configure(self, conn, db_path, synchronous=None):
+        """
+        Switch a new connection to WAL journaling and apply the PRAGMA profile.
+
+        Args:
+            conn: Connection opened outside a transaction
+            db_path: Path to the database file (checkpointed in the background)
+            synchronous: Optional synchronous mode overriding the profile's
+
+        Returns:
+            sqlite3.Connection: The same connection
+        """
+        with self._lock:
+            profile = dict(self._profile)
+        if synchronous:
+            profile['synchronous'] = synchronous
+
+        # PRAGMA values can't be bound as parameters, only known names are used
+        synchronous = str(profile['synchronous']).upper()
+        temp_store = str(profile['temp_store']).upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            synchronous = STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE]['synchronous']
+        if temp_store not in TEMP_STORE_MODES:
+            temp_store = STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE]['temp_store']
+
+        conn.execute(f'PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}')
+        journal_mode = conn.execute('PRAGMA journal_mode = WAL').fetchone()[0]
+        if str(journal_mode).lower() == 'wal':
+            conn.execute(f'PRAGMA wal_autocheckpoint = {WAL_AUTOCHECKPOINT_PAGES}')
+            with self._lock:
+                self._wal_paths.add(os.path.abspath(db_path))
+        elif db_path not in self._wal_warned:
+            # Network drives can't share the WAL index, the database keeps working without it
+            self._wal_warned.add(db_path)
+            logger.warning(f"WAL journaling not available for {db_path}, using {journal_mode}")
+
+        conn.execute(f'PRAGMA synchronous = {synchronous}')
+        conn.execute(f'PRAGMA cache_size = {int(profile["cache_size"])}')
+        conn.execute(f'PRAGMA mmap_size = {int(profile["mmap_size"])}')
+        conn.execute(f'PRAGMA temp_store = {temp_store}')
+        return conn
+
+    def get_wal_paths(self):
+        """
+        Get the databases opened in WAL mode by this process.
+
+        Returns:
+            list: Database file paths
+        """
+        with self._lock:
+            return sorted(self._wal_paths)
+
+    def forget_wal_path(self, db_path):
+        """
+        Stop checkpointing a database (e.g. one that is about to be deleted).
+
+        Args:
+            db_path: Path to the database file
+        """
+        with self._lock:
+            self._wal_paths.discard(os.path.abspath(db_path))
+
+    def _open(self, name):
+        """
+        Open a new connection to a database.
+
+        Args:
+            name: Database name
+
+        Returns:
+            sqlite3.Connection: Database connection
+        """
+        db_path = self.get_path(name)
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        # Only used by the thread that opened it; closed from other threads at exit
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        self.configure(conn, db_path)
+        conn.execute('PRAGMA foreign_keys = ON')
+        return conn
+
+    def ensure_schema(self, name, conn=None):
+        """
+        Create the tables of a database if that hasn't been done in this process.
+
+        Args:
+            name: Database name
+            conn: Optional connection to use (defaults to the calling thread's)
+
+        Returns:
+            bool: True if the schema is in place, False otherwise
+        """
+        if name in self._initialized:
+            return True
+        if conn is None:
+            # Opening the thread's connection sets up the schema, try again if that failed
+            conn = self.get_connection(name)
+
+        with self._lock:
+            if name in self._initialized:
+                return True
+            try:
+                _, schema = self._databases[name]
+                with conn:
+                    schema(conn)
+                self._initialized.add(name)
+                return True
+            except Exception as e:
+                logger.error(f"Error initializing {name} database: {str(e)}")
+                return False
+
+    def get_connection(self, name):
+        """
+        Get the calling thread's connection to a database, opening it if needed.
+
+        Args:
+            name: Database name
+
+        Returns:
+            sqlite3.Connection: Database connection
+        """
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+
+        conn = connections.get(name)
+        if conn is None:
+            conn = self._open(name)
+            connections[name] = conn
+            with self._lock:
+                self._prune()
+                self._connections.append((threading.current_thread(), name, conn))
+            self.ensure_schema(name, conn)
+        return conn
+
+    def _prune(self):
+        """Close the connections of threads that have ended. Must be called with self._lock held."""
+        alive = []
+        for thread, name, conn in self._connections:
+            if thread.is_alive():
+                alive.append((thread, name, conn))
+            else:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        self._connections = alive
+
+    def close_connection(self, name=None):
+        """
+        Close the calling thread's connection(s).
+
+        Args:
+            name: Optional database name (defaults to every database)
+        """
+        connections = getattr(self._local, 'connections', {})
+        names = [name] if name else list(connections)
+        for db_name in names:
+            conn = connections.pop(db_name, None)
+            if conn is None:
+                continue
+            with self._lock:
+                self._connections = [entry for entry in self._connections if entry[2] is not conn]
+            conn.close()
+
+    def rollback(self, name):
+        """
+        Roll back an unfinished transaction on the calling thread's connection.
+        Does nothing if the thread has no connection to the database.
+
+        Args:
+            name: Database name
+        """
+        conn = getattr(self._local, 'connections', {}).get(name)
+        if conn is not None:
+            try:
+                conn.rollback()
+            except Exception as e:
+                logger.error(f"Error rolling back {name} database: {str(e)}")
+
+    def close_all(self):
+        """Close every connection of every thread."""
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+        for _, name, conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.error(f"Error closing {name} database connection: {str(e)}")
+        # Threads still running open a new connection on their next call
+        self._local = threading.local()
+
+class Checkpointer:
+    """
+    Background thread that checkpoints the WAL files of the open databases.
+
+    Checkpoints are PASSIVE: they copy what they can without waiting for
+    readers or writers, so a scan never waits for one.
+    """
+
+    def __init__(self, manager, interval=CHECKPOINT_INTERVAL):
+        """
+        Initialize the checkpointer.
+
+        Args:
+            manager: DatabaseManager whose WAL databases are checkpointed
+            interval: Seconds between checkpoints
+        """
+        self.manager = manager
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._connections = {}
+
+    def start(self):
+        """Start the checkpointer thread if it isn't running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="WalCheckpointer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Checkpointer thread loop: checkpoint every database until stopped."""
+        try:
+            while not self._stop.wait(self.interval):
+                self.checkpoint_all()
+            # Leave small WAL files behind for the next start
+            self.checkpoint_all()
+        finally:
+            for conn in self._connections.values():
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections = {}
+
+    def checkpoint_all(self):
+        """
+        Checkpoint every database opened in WAL mode.
+        Only called from the checkpointer thread.
+
+        Returns:
+            dict: Frames copied into each database file
+        """
+        copied = {}
+        wal_paths = self.manager.get_wal_paths()
+        for db_path in list(self._connections):
+            if db_path not in wal_paths:
+                self._connections.pop(db_path).close()
+
+        for db_path in wal_paths:
+            try:
+                conn = self._connections.get(db_path)
+                if conn is None:
+                    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+                    self._connections[db_path] = conn
+                busy, log_frames, checkpointed = conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchone()
+                copied[db_path] = checkpointed
+                if busy or checkpointed < log_frames:
+                    # A reader still uses older frames, they are copied next time
+                    logger.debug(f"Checkpoint of {db_path} copied {checkpointed} of {log_frames} frame(s)")
+            except Exception as e:
+                logger.error(f"Error checkpointing {db_path}: {str(e)}")
+        return copied
+
+    def stop(self, timeout=5.0):
+        """
+        Stop the checkpointer thread after a last checkpoint.
+
+        Args:
+            timeout: Maximum number of seconds to wait for the last checkpoint
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        self._stop.set()
+        thread.join(timeout)
+
+# Global manager instance
+_manager = DatabaseManager()
+
+# Global checkpointer instance
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+def get_db_manager():
+    """
+    Get the application database manager.
+
+    Returns:
+        DatabaseManager: Shared manager
+    """
+    return _manager
+
+def set_storage_profile(name=DEFAULT_STORAGE_PROFILE, overrides=None):
+    """
+    Choose the PRAGMA profile of the database connections opened from now on.
+
+    Args:
+        name: 'balanced', 'durable' or 'low_memory'
+        overrides: Optional dictionary of PRAGMA values (synchronous, cache_size,
+            mmap_size, temp_store) replacing the profile's
+
+    Returns:
+        dict: The PRAGMA values in use
+    """
+    return _manager.set_profile(name, overrides)
+
+def configure_connection(conn, db_path, synchronous=None):
+    """
+    Switch a connection the caller opened itself to WAL journaling and the PRAGMA profile.
+
+    Args:
+        conn: Connection opened outside a transaction
+        db_path: Path to the database file
+        synchronous: Optional synchronous mode overriding the profile's (e.g. 'FULL')
+
+    Returns:
+        sqlite3.Connection: The same connection
+    """
+    return _manager.configure(conn, db_path, synchronous)
+
+def start_checkpointer(interval=CHECKPOINT_INTERVAL):
+    """
+    Start checkpointing the WAL databases in the background.
+
+    Args:
+        interval: Seconds between checkpoints
+
+    Returns:
+        Checkpointer: Shared checkpointer
+    """
+    global _checkpointer
+
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            _checkpointer = Checkpointer(_manager, interval)
+        _checkpointer.start()
+        return _checkpointer
+
+def stop_checkpointer():
+    """Stop the background checkpointer, if it was started."""
+    global _checkpointer
+
+    with _checkpointer_lock:
+        checkpointer = _checkpointer
+        _checkpointer = None
+    if checkpointer is not None:
+        checkpointer.stop()
+
+def register_database(name, path_getter, schema):
+    """
+    Register a database with the application database manager.
+
+    Args:
+        name: Database name used with get_connection
+        path_getter: Function returning the path to the database file
+        schema: Function called with a connection to create the tables (once per process)
+    """
+    _manager.register(name, path_getter, schema)
+
+def get_connection(name):
+    """
+    Get the calling thread's long-lived connection to a database.
+
+    Args:
+        name: Database name
+
+    Returns:
+        sqlite3.Connection: Database connection (rows support access by column name)
+    """
+    return _manager.get_connection(name)
+
+@contextmanager
+def db_connection(name):
+    """
+    Use the calling thread's connection in a transaction.
+    Changes are committed when the block ends and rolled back if it raises,
+    so a failed statement never leaves a long-lived connection holding a lock.
+
+    Args:
+        name: Database name
+
+    Yields:
+        sqlite3.Connection: Database connection
+    """
+    conn = _manager.get_connection(name)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def close_all_connections():
+    """Close every database connection (called at exit)."""
+    _manager.close_all()
+
+atexit.register(close_all_connections)
+
+def check_contention(readers=4, seconds=5.0, rows=50000, journal_mode='WAL'):
+    """
+    Measure how long scan commits take while other connections run long reads.
+
+    One thread inserts and commits a row at a time, like the scan path, while
+    the reader threads keep full-table queries and read transactions open.
+    The writer doesn't wait for locks at all, so every time a reader would
+    have blocked it counts as a failed write. Runs against a temporary
+    database that is removed afterwards.
+
+    Args:
+        readers: Number of reader threads
+        seconds: How long to run
+        rows: Rows created before the run so the reads take a while
+        journal_mode: 'WAL', or 'DELETE' to compare with rollback journaling
+
+    Returns:
+        dict: writes, reads, busy_errors, max_commit and average_commit (seconds)
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    db_path = os.path.join(temp_dir.name, 'contention.db')
+
+    def connect(wait=True):
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        if journal_mode.upper() == 'WAL':
+            configure_connection(conn, db_path)
+        else:
+            conn.execute(f'PRAGMA journal_mode = {journal_mode}')
+        if not wait:
+            conn.execute('PRAGMA busy_timeout = 0')
+        return conn
+
+    setup = connect()
+    setup.execute('''
+    CREATE TABLE contention_scans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        tracking_number TEXT,
+        notes TEXT
+    )
+    ''')
+    with setup:
+        setup.executemany(
+            'INSERT INTO contention_scans (timestamp, tracking_number, notes) VALUES (?, ?, ?)',
+            [(f'2026-01-01 00:00:{i % 60:02d}', f'1Z{i:016d}', 'x' * 100) for i in range(rows)]
+        )
+    setup.close()
+
+    stop = threading.Event()
+    results = {'writes': 0, 'reads': 0, 'busy_errors': 0, 'max_commit': 0.0, 'total_commit': 0.0}
+    results_lock = threading.Lock()
+
+    def read_loop():
+        conn = connect()
+        try:
+            while not stop.is_set():
+                try:
+                    # Hold a read transaction across two scans of the table, like a paged query
+                    conn.execute('BEGIN')
+                    conn.execute("SELECT COUNT(*), MAX(length(notes)) FROM contention_scans WHERE notes LIKE '%y%'").fetchone()
+                    conn.execute('SELECT tracking_number FROM contention_scans ORDER BY timestamp DESC LIMIT 100').fetchall()
+                    conn.execute('COMMIT')
+                    with results_lock:
+                        results['reads'] += 1
+                except sqlite3.OperationalError:
+                    conn.rollback()
+        finally:
+            conn.close()
+
+    def write_loop():
+        conn = connect(wait=False)
+        try:
+            number = 0
+            while not stop.is_set():
+                number += 1
+                started = time.monotonic()
+                try:
+                    with conn:
+                        conn.execute(
+                            'INSERT INTO contention_scans (timestamp, tracking_number, notes) VALUES (?, ?, ?)',
+                            ('2026-01-02 00:00:00', f'SCAN{number:012d}', 'scan')
+                        )
+                except sqlite3.OperationalError:
+                    with results_lock:
+                        results['busy_errors'] += 1
+                    continue
+                elapsed = time.monotonic() - started
+                with results_lock:
+                    results['writes'] += 1
+                    results['total_commit'] += elapsed
+                    results['max_commit'] = max(results['max_commit'], elapsed)
+
+                # Scans arrive one at a time
+                time.sleep(0.005)
+        finally:
+            conn.close()
+
+    try:
+        threads = [threading.Thread(target=read_loop, daemon=True) for _ in range(readers)]
+        threads.append(threading.Thread(target=write_loop, daemon=True))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        _manager.forget_wal_path(db_path)
+        temp_dir.cleanup()
+
+    results['average_commit'] = results['total_commit'] / results['writes'] if results['writes'] else 0.0
+    del results['total_commit']
+    return results
+
+def main(argv=None):
+    """
+    Command line entry point: run the contention check.
+
+    Args:
+        argv: Optional argument list (defaults to sys.argv)
+
+    Returns:
+        int: Exit code (0 if no commit failed or took longer than CONTENTION_LATENCY_LIMIT)
+    """
+    parser = argparse.ArgumentParser(description="Check that long reads don't block scan commits.")
+    parser.add_argument('--readers', type=int, default=4, help="number of reader threads")
+    parser.add_argument('--seconds', type=float, default=5.0, help="how long to run")
+    parser.add_argument('--rows', type=int, default=50000, help="rows created before the run")
+    parser.add_argument('--profile', default=DEFAULT_STORAGE_PROFILE, choices=sorted(STORAGE_PROFILES),
+                        help="PRAGMA profile to test")
+    parser.add_argument('--journal-mode', default='WAL', choices=['WAL', 'DELETE'],
+                        help="WAL, or DELETE to compare with rollback journaling")
+    args = parser.parse_args(argv)
+
+    set_storage_profile(args.profile)
+    results = check_contention(args.readers, args.seconds, args.rows, args.journal_mode)
+
+    print(f"Journal mode: {args.journal_mode}, profile: {args.profile}, readers: {args.readers}")
+    print(f"Reads: {results['reads']}, writes: {results['writes']}, failed writes: {results['busy_errors']}")
+    print(f"Commit time: average {results['average_commit'] * 1000:.1f} ms, "
+          f"longest {results['max_commit'] * 1000:.1f} ms")
+
+    passed = results['writes'] > 0 and results['busy_errors'] == 0 and results['max_commit'] <= CONTENTION_LATENCY_LIMIT
+    print("PASS: readers never blocked the writer" if passed else "FAIL: the writer waited for readers")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
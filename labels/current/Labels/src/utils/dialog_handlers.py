@@ -128,10 +128,23 @@ def create_settings_dialog_handler(parent, config_manager, update_label_count_ca
         The created settings dialog
     """
     # Function to handle saving settings
-    def save_settings(dialog, directory, transparency_enabled=None, transparency_level=None):
+    def save_settings(dialog, directory, transparency_enabled=None, transparency_level=None, label_directories=None,
+                      print_backend=None, printer_name=None, label_output=None):
         # Save the directory to settings
         config_manager.settings.last_directory = directory
         
+        # Save the additional label directories if provided
+        if label_directories is not None:
+            config_manager.settings.label_directories = list(label_directories)
+        
+        # Save the print settings if provided (the backend is recreated on next print)
+        if print_backend is not None:
+            config_manager.settings.print_backend = print_backend
+        if printer_name is not None:
+            config_manager.settings.printer_name = printer_name or None
+        if label_output is not None:
+            config_manager.settings.label_output = label_output
+        
         # Save transparency settings if provided
         if transparency_enabled is not None:
             config_manager.settings.transparency_enabled = transparency_enabled
@@ -152,6 +165,9 @@ def create_settings_dialog_handler(parent, config_manager, update_label_count_ca
         
         # Close the dialog
         dialog.destroy()
+        
+        # Recount labels across the (possibly changed) label directories
+        update_label_count_callback()
     
     # Function to open Google Sheets dialog
     def open_sheets_dialog():
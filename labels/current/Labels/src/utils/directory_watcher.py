@@ -0,0 +1,428 @@
+"""
+Directory watcher shared by the Label Maker applications.
+This module reports files added to or removed from a directory without
+relisting it, through inotify on Linux, ReadDirectoryChangesW on Windows and
+polling everywhere else. It only depends on the standard library (and
+pywin32 on Windows), so the main application (through label_watcher) and
+the Label Maker sub-application both use it.
+"""
+import os
+import sys
+import select
+import struct
+import logging
+import threading
+import time
+
+# Both applications configure their logger under this name
+logger = logging.getLogger('LabelMaker')
+
+# Returned by a backend when events were lost and the directory must be rescanned
+RESCAN = 'rescan'
+
+class _InotifyBackend:
+    """Change notifications through Linux inotify (via ctypes)."""
+
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = os.O_NONBLOCK
+
+    def __init__(self, directory):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        mask = self.IN_CREATE | self.IN_DELETE | self.IN_MOVED_FROM | self.IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+        # Pipe used to wake up a blocked wait() when the watcher stops
+        self._wake_read, self._wake_write = os.pipe()
+
+    def wait(self, timeout):
+        """
+        Wait for change events.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            list or str: List of ('added'|'removed', filename) tuples, or RESCAN
+        """
+        readable, _, _ = select.select([self.fd, self._wake_read], [], [], timeout)
+        if self.fd not in readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + 16 <= len(data):
+            _, mask, _, name_len = struct.unpack_from('iIII', data, offset)
+            name = os.fsdecode(data[offset + 16:offset + 16 + name_len].rstrip(b'\0'))
+            offset += 16 + name_len
+
+            if mask & self.IN_Q_OVERFLOW:
+                return RESCAN
+            if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                events.append(('added', name))
+            elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                events.append(('removed', name))
+        return events
+
+    def wake(self):
+        """Interrupt a blocked wait()."""
+        os.write(self._wake_write, b'\0')
+
+    def close(self):
+        """Release the inotify and wake-up file descriptors."""
+        for fd in (self.fd, self._wake_read, self._wake_write):
+            os.close(fd)
+
+class _ReadDirectoryChangesBackend:
+    """Change notifications through Windows ReadDirectoryChangesW (via pywin32)."""
+
+    FILE_LIST_DIRECTORY = 0x0001
+    # FILE_NOTIFY_INFORMATION action codes
+    ADDED_ACTIONS = (1, 5)      # FILE_ACTION_ADDED, FILE_ACTION_RENAMED_NEW_NAME
+    REMOVED_ACTIONS = (2, 4)    # FILE_ACTION_REMOVED, FILE_ACTION_RENAMED_OLD_NAME
+
+    def __init__(self, directory):
+        import pywintypes
+        import win32con
+        import win32event
+        import win32file
+
+        self.win32event = win32event
+        self.win32file = win32file
+        self.handle = win32file.CreateFile(
+            directory,
+            self.FILE_LIST_DIRECTORY,
+            win32con.FILE_SHARE_READ | win32con.FILE_SHARE_WRITE | win32con.FILE_SHARE_DELETE,
+            None,
+            win32con.OPEN_EXISTING,
+            win32con.FILE_FLAG_BACKUP_SEMANTICS | win32con.FILE_FLAG_OVERLAPPED,
+            None
+        )
+        self.overlapped = pywintypes.OVERLAPPED()
+        self.overlapped.hEvent = win32event.CreateEvent(None, True, False, None)
+        self.wake_event = win32event.CreateEvent(None, True, False, None)
+        self.buffer = win32file.AllocateReadBuffer(64 * 1024)
+        self.pending = False
+
+    def wait(self, timeout):
+        """
+        Wait for change events.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            list or str: List of ('added'|'removed', filename) tuples, or RESCAN
+        """
+        win32event = self.win32event
+        win32file = self.win32file
+
+        # Keep one overlapped read outstanding between calls
+        if not self.pending:
+            win32event.ResetEvent(self.overlapped.hEvent)
+            win32file.ReadDirectoryChangesW(
+                self.handle,
+                self.buffer,
+                False,
+                win32file.FILE_NOTIFY_CHANGE_FILE_NAME,
+                self.overlapped
+            )
+            self.pending = True
+
+        result = win32event.WaitForMultipleObjects(
+            [self.overlapped.hEvent, self.wake_event], False, int(timeout * 1000)
+        )
+        if result != win32event.WAIT_OBJECT_0:
+            return []
+
+        self.pending = False
+        size = win32file.GetOverlappedResult(self.handle, self.overlapped, True)
+        if size == 0:
+            # The notification buffer overflowed, changes were lost
+            return RESCAN
+
+        events = []
+        for action, name in win32file.FILE_NOTIFY_INFORMATION(self.buffer, size):
+            if action in self.ADDED_ACTIONS:
+                events.append(('added', name))
+            elif action in self.REMOVED_ACTIONS:
+                events.append(('removed', name))
+        return events
+
+    def wake(self):
+        """Interrupt a blocked wait()."""
+        self.win32event.SetEvent(self.wake_event)
+
+    def close(self):
+        """Cancel the outstanding read and close the directory handle."""
+        try:
+            self.win32file.CancelIo(self.handle)
+        except Exception:
+            pass
+        self.handle.Close()
+
+class _PollingBackend:
+    """Fallback that relies on the directory modification time check alone."""
+
+    def __init__(self, directory):
+        self._stop_event = threading.Event()
+
+    def wait(self, timeout):
+        """
+        Sleep until the next poll.
+
+        Args:
+            timeout: Time to sleep in seconds
+
+        Returns:
+            list: Always empty, changes are found by the mtime/scandir diff
+        """
+        self._stop_event.wait(timeout)
+        return []
+
+    def wake(self):
+        """Wake up a sleeping poll."""
+        self._stop_event.set()
+
+    def close(self):
+        """Nothing to release for polling."""
+        self._stop_event.set()
+
+def _create_backend(directory):
+    """
+    Create the best available change notification backend for this platform.
+
+    Args:
+        directory: Directory to watch
+
+    Returns:
+        tuple: (backend, is_native)
+    """
+    candidates = []
+    if sys.platform.startswith('linux'):
+        candidates.append(_InotifyBackend)
+    elif os.name == 'nt':
+        candidates.append(_ReadDirectoryChangesBackend)
+
+    for backend_class in candidates:
+        try:
+            return backend_class(directory), True
+        except Exception as e:
+            logger.warning(f"Native file watching unavailable for {directory}, falling back to polling: {e}")
+
+    return _PollingBackend(directory), False
+
+class DirectoryWatcher:
+    """
+    Background watcher that reports files added to or removed from a directory.
+
+    Native change notifications are used where available. As a safety net (and
+    as the only mechanism when no native backend exists, e.g. some network
+    shares), the directory modification time is checked periodically and the
+    directory is diffed with os.scandir when it changes.
+    """
+
+    def __init__(self, directory, callback, extensions=None, known_files=None,
+                 poll_interval=2.0, verify_interval=30.0):
+        """
+        Initialize the watcher.
+
+        Args:
+            directory: Directory to watch
+            callback: Called as callback(added, removed) with lists of filenames
+            extensions: Optional tuple of lowercase extensions to report
+            known_files: Optional filenames the caller already knows about; the
+                first sync reports the differences against this set
+            poll_interval: Seconds between wake-ups of the watcher thread
+            verify_interval: Seconds between mtime checks when native events are available
+        """
+        self.directory = directory
+        self.callback = callback
+        self.extensions = tuple(ext.lower() for ext in extensions) if extensions else None
+        self.poll_interval = poll_interval
+        self.verify_interval = verify_interval
+
+        self._files = set(known_files or ())
+        self._synced_mtime_ns = None
+        self._backend = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.is_native = False
+
+    def _matches(self, filename):
+        """Check whether a filename has one of the watched extensions."""
+        if self.extensions is None:
+            return True
+        return os.path.splitext(filename)[1].lower() in self.extensions
+
+    def _scan(self):
+        """
+        List the matching files in the directory.
+
+        Returns:
+            set: Matching filenames
+        """
+        files = set()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and self._matches(entry.name):
+                        files.add(entry.name)
+                except OSError:
+                    continue
+        return files
+
+    def _resync(self, always_notify=False):
+        """
+        Diff the directory against the known files and report the changes.
+
+        Args:
+            always_notify: Invoke the callback even if nothing changed
+        """
+        try:
+            # Read the mtime before listing so changes made during the scan are seen next time
+            mtime_ns = os.stat(self.directory).st_mtime_ns
+            current = self._scan()
+        except OSError as e:
+            logger.error(f"Error scanning watched directory {self.directory}: {e}")
+            return
+
+        added = sorted(current - self._files)
+        removed = sorted(self._files - current)
+        self._files = current
+        self._synced_mtime_ns = mtime_ns
+
+        if added or removed or always_notify:
+            self._notify(added, removed)
+
+    def _verify(self):
+        """Rescan the directory if its modification time changed since the last sync."""
+        try:
+            mtime_ns = os.stat(self.directory).st_mtime_ns
+        except OSError as e:
+            logger.error(f"Error checking watched directory {self.directory}: {e}")
+            return
+
+        if mtime_ns != self._synced_mtime_ns:
+            self._resync()
+
+    def _apply_events(self, events):
+        """
+        Apply native change events to the known files and report them.
+
+        Args:
+            events: List of ('added'|'removed', filename) tuples
+        """
+        added = []
+        removed = []
+        for kind, name in events:
+            if not self._matches(name):
+                continue
+            if kind == 'added':
+                if name not in self._files and os.path.isfile(os.path.join(self.directory, name)):
+                    self._files.add(name)
+                    added.append(name)
+            elif name in self._files:
+                self._files.discard(name)
+                removed.append(name)
+
+        if added or removed:
+            self._notify(added, removed)
+
+    def _notify(self, added, removed):
+        """Invoke the callback, keeping the watcher alive if it fails."""
+        try:
+            self.callback(added, removed)
+        except Exception as e:
+            logger.error(f"Error in directory watcher callback for {self.directory}: {e}")
+
+    def _run(self):
+        """Watcher thread main loop."""
+        self._resync(always_notify=True)
+
+        verify_interval = self.verify_interval if self.is_native else self.poll_interval
+        last_verify = time.time()
+
+        while not self._stop_event.is_set():
+            try:
+                events = self._backend.wait(self.poll_interval)
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                logger.error(f"Error waiting for directory changes in {self.directory}: {e}")
+                self._stop_event.wait(self.poll_interval)
+                events = RESCAN
+
+            if self._stop_event.is_set():
+                break
+
+            if events == RESCAN:
+                self._resync()
+                last_verify = time.time()
+                continue
+
+            if events:
+                self._apply_events(events)
+
+            if time.time() - last_verify >= verify_interval:
+                self._verify()
+                last_verify = time.time()
+
+    def start(self):
+        """Start watching in a background thread."""
+        if self._thread is not None:
+            return
+
+        self._backend, self.is_native = _create_backend(self.directory)
+        self._thread = threading.Thread(target=self._run, name=f"DirectoryWatcher({self.directory})")
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info(f"Watching {self.directory} ({'native events' if self.is_native else 'polling'})")
+
+    def stop(self):
+        """Stop watching and release the backend."""
+        self._stop_event.set()
+        backend = self._backend
+
+        if backend is not None:
+            try:
+                backend.wake()
+            except Exception as e:
+                logger.error(f"Error waking directory watcher for {self.directory}: {e}")
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+        if backend is not None:
+            try:
+                backend.close()
+            except Exception as e:
+                logger.error(f"Error closing directory watcher for {self.directory}: {e}")
+
+        self._thread = None
+        self._backend = None
+
+    def is_running(self):
+        """
+        Check whether the watcher thread is running.
+
+        Returns:
+            bool: True if the watcher is running
+        """
+        return self._thread is not None and self._thread.is_alive()
@@ -0,0 +1,828 @@
+"""
+Scan event journal for the Label Maker application.
+Every scan is written once to an append-only SQLite journal in a single
+transaction. The shipping logs, the Returns Data records and the Google
+Sheets outbox are projections of the journal, brought up to date by a
+background thread, so the stores can't drift apart and the UI only waits
+for one write.
+"""
+import os
+import sys
+import time
+import queue
+import sqlite3
+import datetime
+import threading
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.log_manager import get_logs_db_path, initialize_logs_db
+from src.utils.database_operations import get_database_path, initialize_database
+from src.utils.db_manager import configure_connection
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+# Event types
+EVENT_SCAN = 'scan'
+
+# Number of events applied to a projection in one transaction
+PROJECTION_BATCH_SIZE = 200
+
+# Seconds between checks for new events when nothing wakes the projector
+PROJECTION_POLL_INTERVAL = 1.0
+
+# Longest wait (in seconds) before retrying a projection that failed
+MAX_RETRY_DELAY = 60.0
+
+# Number of seconds to wait for the projections to catch up when the application closes
+STOP_TIMEOUT = 5.0
+
+# Durability modes for appends: commit every event before returning, or
+# queue it and commit it together with the events around it
+DURABILITY_EVENT = 'event'
+DURABILITY_GROUPED = 'grouped'
+
+# A group commit happens after this many milliseconds or this many events, whichever comes first
+GROUP_COMMIT_INTERVAL_MS = 50
+GROUP_COMMIT_MAX_EVENTS = 100
+
+# Number of seconds flush() waits for the queued events to be committed
+FLUSH_TIMEOUT = 5.0
+
+# Global journal and projector instances
+_journal = None
+_projector = None
+_journal_lock = threading.Lock()
+
+def get_journal_db_path():
+    """
+    Get the path to the event journal database.
+
+    Returns:
+        tuple: (journal_dir, db_path)
+    """
+    # Get the project root directory
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+    # Keep the journal next to the shipping logs
+    journal_dir = os.path.join(project_root, 'logs', 'journal')
+    os.makedirs(journal_dir, exist_ok=True)
+
+    return journal_dir, os.path.join(journal_dir, 'events.db')
+
+class _PendingEvent:
+    """An event queued for a group commit, or a flush request when values is None."""
+
+    def __init__(self, values=None):
+        """
+        Initialize the pending event.
+
+        Args:
+            values: Row values for the events table, or None for a flush request
+        """
+        self.values = values
+        self.done = threading.Event() if values is None else None
+        self.success = False
+
+class EventJournal:
+    """
+    Append-only journal of scan events.
+
+    The journal runs in WAL mode with synchronous=FULL, so a committed event
+    survives a crash or power loss. With DURABILITY_EVENT each append is its
+    own transaction and costs one fsync before it returns. With
+    DURABILITY_GROUPED appends are queued in memory and a writer thread
+    commits them every GROUP_COMMIT_INTERVAL_MS milliseconds or
+    GROUP_COMMIT_MAX_EVENTS events, so a burst of scans costs one fsync;
+    flush() waits until everything queued is committed.
+    """
+
+    def __init__(self, db_path=None, durability=DURABILITY_EVENT,
+                 interval_ms=GROUP_COMMIT_INTERVAL_MS, max_events=GROUP_COMMIT_MAX_EVENTS):
+        """
+        Initialize the journal.
+
+        Args:
+            db_path: Optional path to the journal database (defaults to logs/journal/events.db)
+            durability: DURABILITY_EVENT or DURABILITY_GROUPED
+            interval_ms: Longest time (in milliseconds) a grouped event waits for its commit
+            max_events: Largest number of events committed in one group
+        """
+        self.db_path = db_path or get_journal_db_path()[1]
+        self.durability = DURABILITY_GROUPED if durability == DURABILITY_GROUPED else DURABILITY_EVENT
+        self.interval = interval_ms / 1000.0
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._conn = None
+        self._listeners = []
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def _get_connection(self):
+        """
+        Get the connection to the journal, creating it if needed.
+        Must be called with self._lock held.
+
+        Returns:
+            sqlite3.Connection: Database connection
+        """
+        if self._conn is None:
+            # Shared by the UI, the print worker and the projector, guarded by self._lock
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+
+            # The journal is the record of every scan, each append is synced to disk
+            configure_connection(conn, self.db_path, synchronous='FULL')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                event_type TEXT NOT NULL,
+                tracking_number TEXT,
+                sku TEXT,
+                action TEXT NOT NULL,
+                status TEXT NOT NULL,
+                details TEXT
+            )
+            ''')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def append(self, tracking_number, sku, action, status, details=None, event_type=EVENT_SCAN):
+        """
+        Append an event to the journal.
+
+        Args:
+            tracking_number: The tracking number (can be empty)
+            sku: The SKU (can be empty)
+            action: The action (e.g., 'print', 'log_only')
+            status: The status (e.g., 'success', 'error')
+            details: Additional details about the event
+            event_type: Kind of event (defaults to a scan)
+
+        Returns:
+            int: Id of the new event, or None if it was queued for a group commit
+        """
+        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        values = (timestamp, event_type, tracking_number, sku, action, status, details)
+        if self.durability == DURABILITY_GROUPED:
+            self._start_writer()
+            self._queue.put(_PendingEvent(values))
+            return None
+
+        return self._insert([values])
+
+    def _insert(self, rows):
+        """
+        Insert events in one transaction and notify the listeners.
+
+        Args:
+            rows: Row values for the events table, in order
+
+        Returns:
+            int: Id of the last inserted event
+        """
+        with self._lock:
+            conn = self._get_connection()
+            with conn:
+                for values in rows:
+                    cursor = conn.execute(
+                        """
+                        INSERT INTO events
+                        (timestamp, event_type, tracking_number, sku, action, status, details)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        values
+                    )
+            event_id = cursor.lastrowid
+
+        for listener in list(self._listeners):
+            listener(event_id)
+        return event_id
+
+    def set_durability(self, durability):
+        """
+        Choose how appends are committed.
+
+        Args:
+            durability: DURABILITY_EVENT to commit every event before append returns,
+                or DURABILITY_GROUPED to group-commit events on the writer thread
+        """
+        durability = DURABILITY_GROUPED if durability == DURABILITY_GROUPED else DURABILITY_EVENT
+        if durability == self.durability:
+            return
+        self.durability = durability
+        if durability == DURABILITY_EVENT:
+            # Keep the order: queued events are committed before the next direct append
+            self.flush()
+
+    def _start_writer(self):
+        """Start the group commit thread if it isn't running."""
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run_writer, name="JournalWriter", daemon=True)
+                self._writer.start()
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """
+        Commit every event queued so far.
+
+        Args:
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            bool: True if the events were committed in time
+        """
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                return self._queue.empty()
+        pending = _PendingEvent()
+        self._queue.put(pending)
+        return pending.done.wait(timeout) and pending.success
+
+    def _run_writer(self):
+        """Writer thread loop: collect queued events into groups and commit them."""
+        while True:
+            batch = [self._queue.get()]
+            stopping = batch[0] is None
+
+            # Keep collecting until the interval is over, the group is full
+            # or someone is waiting for the commit
+            deadline = time.time() + self.interval
+            while not stopping and batch[-1].done is None and len(batch) < self.max_events:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stopping = True
+                else:
+                    batch.append(pending)
+
+            self._commit([pending for pending in batch if pending is not None])
+            if stopping:
+                # Commit whatever was queued behind the stop marker
+                remaining = []
+                while not self._queue.empty():
+                    pending = self._queue.get_nowait()
+                    if pending is not None:
+                        remaining.append(pending)
+                self._commit(remaining)
+                break
+
+    def _commit(self, batch):
+        """
+        Insert a group of queued events and release the flush requests among them.
+
+        Args:
+            batch: _PendingEvent objects in queue order
+        """
+        rows = [pending.values for pending in batch if pending.values is not None]
+        success = True
+        if rows:
+            try:
+                self._insert(rows)
+            except Exception as e:
+                success = False
+                logger.error(f"Error committing {len(rows)} journal event(s): {str(e)}")
+
+        for pending in batch:
+            pending.success = success
+            if pending.done is not None:
+                pending.done.set()
+
+    def stop_writer(self, timeout=FLUSH_TIMEOUT):
+        """
+        Commit everything queued and stop the group commit thread.
+
+        Args:
+            timeout: Maximum number of seconds to wait
+        """
+        with self._writer_lock:
+            thread = self._writer
+            self._writer = None
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("Journal writer stopped before all events were committed")
+
+    def read_after(self, event_id, limit=PROJECTION_BATCH_SIZE):
+        """
+        Read the events that follow an event.
+
+        Args:
+            event_id: Id of the last event already seen (0 for the start of the journal)
+            limit: Maximum number of events to return
+
+        Returns:
+            list: Events as dictionaries, oldest first
+        """
+        with self._lock:
+            rows = self._get_connection().execute(
+                'SELECT * FROM events WHERE id > ? ORDER BY id LIMIT ?',
+                (event_id, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def last_event_id(self):
+        """
+        Get the id of the newest event.
+
+        Returns:
+            int: Event id, or 0 if the journal is empty
+        """
+        with self._lock:
+            row = self._get_connection().execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()
+        return row[0]
+
+    def add_listener(self, listener):
+        """
+        Register a function called with the event id after every append.
+
+        Args:
+            listener: Function taking an event id
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def close(self):
+        """Commit the queued events and close the journal connection."""
+        self.stop_writer()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class Projection:
+    """
+    Base class for stores kept up to date from the journal.
+
+    A projection reports the last event it has applied and applies events
+    in order. apply() raises on failure, so the same events are offered
+    again later.
+    """
+
+    # Name of the projection (used for its cursor and in log messages)
+    name = None
+
+    # Number of events passed to apply() at once
+    batch_size = PROJECTION_BATCH_SIZE
+
+    def last_event_id(self):
+        """
+        Get the last event applied to the store.
+
+        Returns:
+            int: Event id, or 0 if nothing has been applied
+        """
+        raise NotImplementedError
+
+    def apply(self, events):
+        """
+        Apply events to the store and advance the cursor past them.
+
+        Args:
+            events: Events as dictionaries, oldest first
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the projection."""
+        pass
+
+class SqliteProjection(Projection):
+    """
+    Projection into a SQLite database.
+
+    The cursor is stored in the target database itself and updated in the
+    same transaction as the rows, so each event is applied exactly once
+    even if the application stops halfway through a batch.
+    """
+
+    def __init__(self, db_path):
+        """
+        Initialize the projection.
+
+        Args:
+            db_path: Path to the target database
+        """
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = None
+
+    def _initialize(self):
+        """Create the target tables if they don't exist."""
+        pass
+
+    def _get_connection(self):
+        """
+        Get the connection to the target database, creating it if needed.
+        Must be called with self._lock held.
+
+        Returns:
+            sqlite3.Connection: Database connection
+        """
+        if self._conn is None:
+            self._initialize()
+
+            # Written by the projector thread, read by threads waiting for it, guarded by self._lock
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            configure_connection(self._conn, self.db_path)
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS journal_cursors (
+                projection TEXT PRIMARY KEY,
+                last_event_id INTEGER NOT NULL
+            )
+            ''')
+            self._conn.commit()
+        return self._conn
+
+    def last_event_id(self):
+        with self._lock:
+            row = self._get_connection().execute(
+                'SELECT last_event_id FROM journal_cursors WHERE projection = ?',
+                (self.name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def apply(self, events):
+        with self._lock:
+            conn = self._get_connection()
+            with conn:
+                self._write(conn, events)
+                self._set_cursor(conn, events[-1]['id'])
+
+    def _set_cursor(self, conn, event_id):
+        """
+        Store the cursor (inside the caller's transaction).
+
+        Args:
+            conn: Target database connection
+            event_id: Id of the last applied event
+        """
+        conn.execute(
+            'INSERT OR REPLACE INTO journal_cursors (projection, last_event_id) VALUES (?, ?)',
+            (self.name, event_id)
+        )
+
+    def _write(self, conn, events):
+        """
+        Write events to the target tables (inside the caller's transaction).
+
+        Args:
+            conn: Target database connection
+            events: Events as dictionaries, oldest first
+        """
+        raise NotImplementedError
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class ShippingLogsProjection(SqliteProjection):
+    """
+    Projection into the shipping_logs table of logs/shipping_logs/shipping_logs.db.
+
+    Every scan appended since the last pass is inserted in one transaction
+    together with the cursor, so a burst of scans costs one commit here.
+    """
+
+    name = 'shipping_logs'
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path or get_logs_db_path()[1])
+
+    def _initialize(self):
+        initialize_logs_db()
+
+    def _write(self, conn, events):
+        conn.executemany(
+            """
+            INSERT INTO shipping_logs
+            (timestamp, tracking_number, sku, action, status, details, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [(event['timestamp'], event['tracking_number'], event['sku'], event['action'],
+              event['status'], event['details'], event['timestamp']) for event in events]
+        )
+
+class ShippingRecordsProjection(SqliteProjection):
+    """Projection into the shipping_records table shown in the Returns Data dialog."""
+
+    name = 'shipping_records'
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path or get_database_path()[1])
+
+    def _initialize(self):
+        initialize_database()
+
+    def _write(self, conn, events):
+        # The Records tab shows the scan details (e.g. "Label printed successfully") as the status
+        conn.executemany(
+            "INSERT INTO shipping_records (timestamp, tracking_number, sku, status, notes) VALUES (?, ?, ?, ?, ?)",
+            [(event['timestamp'], event['tracking_number'], event['sku'], event['details'] or event['status'], "")
+             for event in events if event['status'] == 'success']
+        )
+
+class JournalProjector:
+    """
+    Background thread that applies new journal events to every projection.
+
+    The thread wakes up as soon as an event is appended and also checks
+    the journal periodically, so events written before a crash are applied
+    on the next start. A projection that fails is retried with a growing
+    delay without holding up the other projections.
+    """
+
+    def __init__(self, journal, projections):
+        """
+        Initialize the projector.
+
+        Args:
+            journal: EventJournal to read from
+            projections: Projection objects to keep up to date
+        """
+        self.journal = journal
+        self.projections = list(projections)
+        self._wake = threading.Event()
+        self._caught_up = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._attempts = {}
+        self._retry_at = {}
+        self._listeners = []
+        journal.add_listener(lambda event_id: self._wake.set())
+
+    def start(self):
+        """Start the projector thread if it isn't running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="JournalProjector", daemon=True)
+                self._thread.start()
+
+    def get_projection(self, name):
+        """
+        Get a projection by name.
+
+        Args:
+            name: Projection name
+
+        Returns:
+            Projection: The projection, or None if there is none with that name
+        """
+        return next((projection for projection in self.projections if projection.name == name), None)
+
+    def add_listener(self, listener):
+        """
+        Register a function called with (message, color) for projection status messages.
+
+        Args:
+            listener: Function taking a message and a color
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Unregister a listener added with add_listener.
+
+        Args:
+            listener: Previously registered function
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def post_status(self, message, color='black'):
+        """
+        Pass a status message to every listener (called from the projector thread).
+
+        Args:
+            message: Status message
+            color: Message color
+        """
+        for listener in list(self._listeners):
+            try:
+                listener(message, color)
+            except Exception as e:
+                logger.error(f"Error in journal status listener: {str(e)}")
+
+    def _run(self):
+        """Projector thread loop: apply new events until stopped."""
+        while True:
+            self._wake.wait(PROJECTION_POLL_INTERVAL)
+            self._wake.clear()
+
+            # Read the flag first so events appended during the last pass are still applied
+            stopping = self._stopping
+            for projection in self.projections:
+                self._catch_up(projection)
+
+            with self._caught_up:
+                self._caught_up.notify_all()
+
+            if stopping:
+                break
+
+        for projection in self.projections:
+            projection.close()
+
+    def _catch_up(self, projection):
+        """
+        Apply every pending event to one projection, stopping at the first failure.
+
+        Args:
+            projection: Projection to bring up to date
+        """
+        if time.time() < self._retry_at.get(projection.name, 0):
+            return
+
+        while True:
+            try:
+                events = self.journal.read_after(projection.last_event_id(), projection.batch_size)
+                if not events:
+                    return
+                projection.apply(events)
+                self._attempts.pop(projection.name, None)
+                self._retry_at.pop(projection.name, None)
+            except Exception as e:
+                attempts = self._attempts.get(projection.name, 0) + 1
+                logger.error(f"Error applying journal events to {projection.name} (attempt {attempts}): {str(e)}")
+
+                # Wait longer after each failure before trying again
+                self._attempts[projection.name] = attempts
+                self._retry_at[projection.name] = time.time() + min(MAX_RETRY_DELAY, PROJECTION_POLL_INTERVAL * 2 ** attempts)
+                return
+
+    def wait_until_projected(self, event_id=None, timeout=STOP_TIMEOUT):
+        """
+        Wait until every projection has applied an event.
+
+        Args:
+            event_id: Event to wait for (defaults to the newest event)
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            bool: True if all projections caught up in time
+        """
+        if event_id is None:
+            # Events still waiting for their group commit count too
+            self.journal.flush(timeout)
+            event_id = self.journal.last_event_id()
+
+        deadline = time.time() + timeout
+        with self._caught_up:
+            while True:
+                try:
+                    # A projection waiting to retry after a failure doesn't hold up the caller
+                    if all(projection.last_event_id() >= event_id or self._retry_at.get(projection.name)
+                           for projection in self.projections):
+                        return True
+                except Exception:
+                    # A projection store is busy, check again after the next pass
+                    pass
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._wake.set()
+                self._caught_up.wait(remaining)
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """
+        Stop the projector thread after one last pass over the journal.
+
+        Args:
+            timeout: Maximum number of seconds to wait
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        self._stopping = True
+        self._wake.set()
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("Journal projector stopped before all events were applied")
+
+def get_event_journal():
+    """
+    Get the application event journal.
+
+    Returns:
+        EventJournal: Shared journal
+    """
+    global _journal
+
+    with _journal_lock:
+        if _journal is None:
+            _journal = EventJournal()
+        return _journal
+
+def get_journal_projector(config_manager=None):
+    """
+    Get the application journal projector, starting its thread if needed.
+
+    Args:
+        config_manager: Optional configuration manager for the Google Sheets
+            projection; the latest one passed in is used for later writes
+
+    Returns:
+        JournalProjector: Shared projector
+    """
+    global _projector
+
+    # Import here, the outbox is itself built on SqliteProjection
+    from src.utils.sheets_outbox import SheetsOutbox, get_sheets_sender
+
+    journal = get_event_journal()
+    if config_manager is not None:
+        journal.set_durability(getattr(config_manager.settings, 'log_durability', DURABILITY_GROUPED))
+    with _journal_lock:
+        if _projector is None:
+            outbox = SheetsOutbox(config_manager)
+            _projector = JournalProjector(journal, [
+                ShippingLogsProjection(),
+                ShippingRecordsProjection(),
+                outbox
+            ])
+            get_sheets_sender(outbox, config_manager, _projector.post_status)
+        elif config_manager is not None:
+            _projector.get_projection(SheetsOutbox.name).config_manager = config_manager
+            get_sheets_sender(config_manager=config_manager)
+        _projector.start()
+        return _projector
+
+def record_scan(config_manager, tracking_number, sku, action, details=None, status='success'):
+    """
+    Record a scan in the journal; the stores are updated in the background.
+
+    Args:
+        config_manager: Configuration manager (for the Google Sheets projection)
+        tracking_number: The tracking number (can be empty)
+        sku: The SKU (can be empty)
+        action: The action (e.g., 'print', 'log_only')
+        details: Additional details about the scan
+        status: The status (e.g., 'success', 'error')
+
+    Returns:
+        int: Id of the journal event, or None if it was queued for a group
+            commit or could not be written
+    """
+    try:
+        get_journal_projector(config_manager)
+        return get_event_journal().append(tracking_number, sku, action, status, details)
+    except Exception as e:
+        logger.error(f"Error recording scan in the journal: {str(e)}")
+        return None
+
+def flush_journal(timeout=FLUSH_TIMEOUT):
+    """
+    Commit every scan event queued for a group commit so far.
+
+    Args:
+        timeout: Maximum number of seconds to wait
+
+    Returns:
+        bool: True if all events are committed
+    """
+    with _journal_lock:
+        journal = _journal
+    if journal is None:
+        return True
+    return journal.flush(timeout)
+
+def stop_journal_projector():
+    """
+    Commit the queued scans, let the projections catch up and stop the
+    projector and the Google Sheets sender, if they were started.
+    """
+    global _projector
+
+    from src.utils.sheets_outbox import stop_sheets_sender
+
+    with _journal_lock:
+        journal = _journal
+        projector = _projector
+        _projector = None
+    if journal is not None:
+        journal.stop_writer()
+    if projector is not None:
+        projector.stop()
+
+    # Rows not sent yet stay in the outbox for the next start
+    stop_sheets_sender()
@@ -0,0 +1,207 @@
+"""
+Edit-distance index for label filename suggestions.
+This module provides an in-memory index that finds the keys within a small
+edit distance of a query, used to suggest labels for mistyped or partial scans.
+"""
+
+# Largest edit distance the index answers queries for
+MAX_DISTANCE = 2
+
+# Only the first characters of each key are expanded into deletes, which keeps
+# the index small without losing matches (candidates are verified in full)
+PREFIX_LENGTH = 6
+
+def edit_distance(a, b):
+    """
+    Get the Levenshtein distance between two strings.
+    Uses the bit-parallel algorithm (Myers/Hyyro), which needs one pass over
+    the longer string with a few integer operations per character.
+
+    Args:
+        a: First string
+        b: Second string
+
+    Returns:
+        int: Number of single-character insertions, deletions and substitutions
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    length = len(b)
+    if length == 0:
+        return len(a)
+
+    # Bit mask of the positions of each character in the shorter string
+    peq = {}
+    for i, char in enumerate(b):
+        peq[char] = peq.get(char, 0) | (1 << i)
+
+    mask = (1 << length) - 1
+    last = 1 << (length - 1)
+    pv = mask
+    mv = 0
+    score = length
+    for char in a:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+    return score
+
+def _deletes(text, max_distance):
+    """
+    Get every string reachable from text by deleting up to max_distance characters.
+
+    Args:
+        text: String to expand
+        max_distance: Maximum number of deleted characters
+
+    Returns:
+        set: The string itself and all of its deletes
+    """
+    result = {text}
+    frontier = {text}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for value in frontier:
+            for i in range(len(value)):
+                next_frontier.add(value[:i] + value[i + 1:])
+        next_frontier -= result
+        result |= next_frontier
+        frontier = next_frontier
+    return result
+
+class FuzzyIndex:
+    """
+    In-memory symmetric-delete index (SymSpell style) mapping items to keys.
+
+    Two strings within edit distance k always share a string obtained by
+    deleting at most k characters from each of them. The index stores the
+    deletes of every key prefix, a query looks up the deletes of its own
+    prefix, and the few candidate keys are verified with the real edit
+    distance. Each item may have several keys (e.g. the whole filename and
+    its parts); an item matches with the smallest distance of any of its keys.
+    """
+
+    def __init__(self, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+        """
+        Initialize an empty index.
+
+        Args:
+            max_distance: Largest edit distance that can be searched for
+            prefix_length: Number of leading key characters expanded into deletes
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._item_keys = {}
+        self._key_items = {}
+        self._deletes = {}
+
+    def __len__(self):
+        return len(self._item_keys)
+
+    def add(self, item, keys):
+        """
+        Add an item to the index, replacing any previous keys for it.
+
+        Args:
+            item: Item to return from searches (e.g. a filename)
+            keys: Iterable of normalized keys to match against
+        """
+        if item in self._item_keys:
+            self.remove(item)
+
+        keys = tuple(set(keys))
+        self._item_keys[item] = keys
+        for key in keys:
+            items = self._key_items.get(key)
+            if items is None:
+                # First item with this key, index its deletes
+                self._key_items[key] = {item}
+                for variant in _deletes(key[:self.prefix_length], self.max_distance):
+                    self._deletes.setdefault(variant, set()).add(key)
+            else:
+                items.add(item)
+
+    def add_many(self, pairs):
+        """
+        Add many items at once.
+
+        Args:
+            pairs: Iterable of (item, keys) tuples
+        """
+        for item, keys in pairs:
+            self.add(item, keys)
+
+    def remove(self, item):
+        """
+        Remove an item from the index.
+
+        Args:
+            item: Item to remove
+        """
+        keys = self._item_keys.pop(item, None)
+        if keys is None:
+            return
+
+        for key in keys:
+            items = self._key_items.get(key)
+            if items is None:
+                continue
+            items.discard(item)
+            if items:
+                continue
+
+            # Last item with this key, drop its deletes
+            del self._key_items[key]
+            for variant in _deletes(key[:self.prefix_length], self.max_distance):
+                variant_keys = self._deletes.get(variant)
+                if variant_keys is not None:
+                    variant_keys.discard(key)
+                    if not variant_keys:
+                        del self._deletes[variant]
+
+    def search(self, query, max_distance=None):
+        """
+        Find the items with a key within max_distance edits of the query.
+
+        Args:
+            query: Normalized string to search for
+            max_distance: Maximum edit distance (defaults to, and is capped at, the index distance)
+
+        Returns:
+            dict: Mapping of matching item to its smallest edit distance
+        """
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        if not query:
+            return {}
+
+        # Collect the keys sharing a delete with the query prefix
+        candidates = set()
+        for variant in _deletes(query[:self.prefix_length], max_distance):
+            keys = self._deletes.get(variant)
+            if keys:
+                candidates.update(keys)
+
+        results = {}
+        for key in candidates:
+            if abs(len(key) - len(query)) > max_distance:
+                continue
+            distance = edit_distance(query, key)
+            if distance > max_distance:
+                continue
+            for item in self._key_items[key]:
+                if distance < results.get(item, max_distance + 1):
+                    results[item] = distance
+        return results
@@ -0,0 +1,783 @@
+"""
+Persistent label file index for the Label Maker application.
+This module keeps a SQLite index of the label files in the labels directory so
+that SKU lookups do not have to list the whole directory on every scan.
+
+Check that indexed lookups return what a directory listing would, from the
+project root:
+
+    python -m src.utils.label_index
+    python -m src.utils.label_index --directory "C:\\Labels" --sku ABC-123 --sku 905
+"""
+import os
+import re
+import sys
+import sqlite3
+import argparse
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.file_utils import normalize_filename_for_match, directory_exists
+from src.utils.ngram_index import TrigramIndex
+from src.utils.fuzzy_index import FuzzyIndex, MAX_DISTANCE
+from src.utils.db_manager import configure_connection
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+# File extensions that are treated as label files
+LABEL_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff')
+
+# Directory timestamps newer than this (in seconds) are not trusted, because a
+# file created in the same timestamp tick as the scan would otherwise be missed
+MTIME_SAFETY_WINDOW = 2.0
+
+# Maximum number of label directories scanned at the same time
+MAX_SCAN_WORKERS = 8
+
+# Filename parts shorter than this are too ambiguous to suggest labels from
+MIN_SUGGESTION_KEY_LENGTH = 3
+
+# Separators between the parts of a label filename (SKUs themselves may contain dashes)
+FILENAME_PART_SEPARATORS = re.compile(r'[_\s]+')
+
+# Version of the stored match keys (PRAGMA user_version); older rows are rekeyed on open
+INDEX_KEY_VERSION = 1
+
+# Global index instance
+_label_index = None
+_label_index_lock = threading.Lock()
+
+# Thread pool used to scan several label directories concurrently
+_scan_executor = None
+
+def get_index_db_path():
+    """
+    Get the path to the label index database file.
+
+    Returns:
+        str: Path to the database file (stored next to labels.db)
+    """
+    # Get the project root directory
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+    # Define the database file path in the database directory
+    return os.path.join(project_root, 'database', 'label_index.db')
+
+def normalize_directory_key(directory):
+    """
+    Normalize a directory path so the same folder always maps to the same key.
+
+    Args:
+        directory: Directory path
+
+    Returns:
+        str: Normalized directory key
+    """
+    return os.path.normcase(os.path.abspath(directory))
+
+def _unique_directories(directories):
+    """
+    Remove empty entries and duplicates from a list of directories, keeping order.
+
+    Args:
+        directories: List of directory paths
+
+    Returns:
+        list: Unique directory paths
+    """
+    unique = []
+    seen = set()
+    for directory in directories:
+        if not directory:
+            continue
+        key = normalize_directory_key(directory)
+        if key not in seen:
+            seen.add(key)
+            unique.append(directory)
+    return unique
+
+def _get_scan_executor():
+    """
+    Get the thread pool used for directory scans, creating it if needed.
+
+    Returns:
+        ThreadPoolExecutor: Scan thread pool
+    """
+    global _scan_executor
+
+    with _label_index_lock:
+        if _scan_executor is None:
+            _scan_executor = ThreadPoolExecutor(max_workers=MAX_SCAN_WORKERS, thread_name_prefix='LabelScan')
+        return _scan_executor
+
+def get_match_key(filename):
+    """
+    Get the normalized key a SKU is matched against: the filename without
+    its extension, as in file_utils.find_files_by_sku.
+
+    Args:
+        filename: Label filename
+
+    Returns:
+        str: Normalized match key
+    """
+    return normalize_filename_for_match(os.path.splitext(filename)[0])
+
+def get_suggestion_keys(filename):
+    """
+    Get the normalized keys a label file can be suggested for: the whole name
+    without extension and each of its underscore or space separated parts.
+
+    Args:
+        filename: Label filename
+
+    Returns:
+        set: Normalized keys
+    """
+    stem = os.path.splitext(filename)[0]
+    keys = {normalize_filename_for_match(stem)}
+    keys.update(normalize_filename_for_match(part) for part in FILENAME_PART_SEPARATORS.split(stem))
+    return {key for key in keys if len(key) >= MIN_SUGGESTION_KEY_LENGTH}
+
+def get_label_directories(settings, primary_directory=None):
+    """
+    Get all configured label directories: the primary labels directory
+    followed by the additional label directories, without duplicates.
+
+    Args:
+        settings: Application settings
+        primary_directory: Optional directory to use instead of settings.last_directory
+
+    Returns:
+        list: Label directory paths
+    """
+    directories = [primary_directory or getattr(settings, 'last_directory', None)]
+    directories.extend(getattr(settings, 'label_directories', None) or [])
+    return _unique_directories(directories)
+
+class LabelIndex:
+    """
+    SQLite backed index of label files, keyed by normalized filename.
+
+    The index stores one row per label file together with its normalized match
+    key. Each directory is resynchronized incrementally: the directory is only
+    rescanned when its modification time changes, and the rescan only writes
+    the rows that were added or removed since the last sync. Directories that
+    are watched by label_watcher are kept current by change events instead and
+    are not checked at all on lookup.
+
+    Substring lookups are answered from an in-memory trigram index per
+    directory, loaded from the database on first use and updated together
+    with it. Suggestions for SKUs that match nothing come from an edit
+    distance index per directory, which is only built the first time a
+    suggestion is needed and is then kept current the same way.
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Initialize the label index.
+
+        Args:
+            db_path: Optional path to the index database (defaults to database/label_index.db)
+        """
+        self.db_path = db_path or get_index_db_path()
+        self._lock = threading.RLock()
+        self._conn = None
+        self._watched_directories = set()
+        self._trigrams = {}
+        self._fuzzy = {}
+
+    def _get_connection(self):
+        """
+        Get the shared connection to the index database, creating it if needed.
+
+        Returns:
+            sqlite3.Connection: Database connection
+        """
+        if self._conn is None:
+            # Ensure the database directory exists
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+            # The connection is shared between the UI and worker threads and is
+            # guarded by self._lock
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            configure_connection(self._conn, self.db_path)
+            self._initialize_schema(self._conn)
+        return self._conn
+
+    def _initialize_schema(self, conn):
+        """
+        Create the index tables if they don't exist.
+
+        Args:
+            conn: Database connection
+        """
+        cursor = conn.cursor()
+
+        # One row per label file
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS label_files (
+            directory TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            norm_key TEXT NOT NULL,
+            ext TEXT NOT NULL,
+            PRIMARY KEY (directory, filename)
+        )
+        ''')
+
+        # Rows written before the key left out the extension matched SKUs like "png"
+        if cursor.execute('PRAGMA user_version').fetchone()[0] < INDEX_KEY_VERSION:
+            cursor.execute('SELECT directory, filename FROM label_files')
+            cursor.executemany(
+                'UPDATE label_files SET norm_key = ? WHERE directory = ? AND filename = ?',
+                [(get_match_key(name), directory, name) for directory, name in cursor.fetchall()]
+            )
+            cursor.execute(f'PRAGMA user_version = {INDEX_KEY_VERSION}')
+
+        # Sync state for each indexed directory
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS indexed_directories (
+            directory TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            dir_mtime_ns INTEGER,
+            last_scan REAL
+        )
+        ''')
+
+        conn.commit()
+
+    def _get_trigram_index(self, key):
+        """
+        Get the in-memory trigram index for a directory, loading it if needed.
+        Must be called with self._lock held.
+
+        Args:
+            key: Normalized directory key
+
+        Returns:
+            TrigramIndex: Trigram index of the directory's normalized filenames
+        """
+        trigrams = self._trigrams.get(key)
+        if trigrams is None:
+            trigrams = TrigramIndex()
+            cursor = self._get_connection().cursor()
+            cursor.execute('SELECT filename, norm_key FROM label_files WHERE directory = ?', (key,))
+            trigrams.add_many(cursor.fetchall())
+            self._trigrams[key] = trigrams
+        return trigrams
+
+    def _get_fuzzy_index(self, key):
+        """
+        Get the in-memory edit distance index for a directory, building it if needed.
+        Must be called with self._lock held.
+
+        Args:
+            key: Normalized directory key
+
+        Returns:
+            FuzzyIndex: Edit distance index of the directory's filename keys
+        """
+        fuzzy = self._fuzzy.get(key)
+        if fuzzy is None:
+            fuzzy = FuzzyIndex()
+            cursor = self._get_connection().cursor()
+            cursor.execute('SELECT filename FROM label_files WHERE directory = ?', (key,))
+            fuzzy.add_many((name, get_suggestion_keys(name)) for (name,) in cursor.fetchall())
+            self._fuzzy[key] = fuzzy
+        return fuzzy
+
+    def _update_memory_indexes(self, key, added, removed):
+        """
+        Apply added and removed files to the in-memory indexes that are loaded.
+        Must be called with self._lock held.
+
+        Args:
+            key: Normalized directory key
+            added: Filenames that were added
+            removed: Filenames that were removed
+        """
+        trigrams = self._trigrams.get(key)
+        if trigrams is not None:
+            for name in removed:
+                trigrams.remove(name)
+            trigrams.add_many((name, get_match_key(name)) for name in added)
+
+        fuzzy = self._fuzzy.get(key)
+        if fuzzy is not None:
+            for name in removed:
+                fuzzy.remove(name)
+            fuzzy.add_many((name, get_suggestion_keys(name)) for name in added)
+
+    def _scan_directory(self, directory):
+        """
+        List the label files in a directory.
+
+        Args:
+            directory: Directory to scan
+
+        Returns:
+            dict: Mapping of filename to lowercase extension
+        """
+        files = {}
+        # os.scandir returns the file type with the listing, so no extra stat per file is needed
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                ext = os.path.splitext(entry.name)[1].lower()
+                if ext in LABEL_EXTENSIONS:
+                    files[entry.name] = ext
+        return files
+
+    def refresh(self, directory, force=False):
+        """
+        Bring the index for a directory up to date.
+        The directory listing runs outside the index lock, so several
+        directories can be refreshed concurrently (see refresh_many).
+
+        Args:
+            directory: Directory to synchronize
+            force: Rescan even if the directory modification time is unchanged
+
+        Returns:
+            bool: True if the index is usable for this directory, False otherwise
+        """
+        key = normalize_directory_key(directory)
+
+        # A watched directory is kept current by the watcher
+        if key in self._watched_directories and not force:
+            return True
+
+        if not directory_exists(directory):
+            return False
+
+        try:
+            dir_mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError as e:
+            logger.error(f"Error reading label directory {directory}: {e}")
+            return False
+
+        with self._lock:
+            try:
+                # Skip the scan if nothing changed since the last sync
+                cursor = self._get_connection().cursor()
+                cursor.execute(
+                    'SELECT dir_mtime_ns FROM indexed_directories WHERE directory = ?',
+                    (key,)
+                )
+                row = cursor.fetchone()
+                if row and row[0] == dir_mtime_ns and not force:
+                    return True
+            except Exception as e:
+                logger.error(f"Error reading label index state for {directory}: {e}")
+                return False
+
+        # List the directory without holding the lock (this is the network round trip)
+        scan_started = time.time()
+        try:
+            current = self._scan_directory(directory)
+        except OSError as e:
+            logger.error(f"Error scanning label directory {directory}: {e}")
+            return False
+
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                cursor = conn.cursor()
+
+                # Work out what changed since the last sync
+                cursor.execute('SELECT filename FROM label_files WHERE directory = ?', (key,))
+                indexed = {name for (name,) in cursor.fetchall()}
+                added = [name for name in current if name not in indexed]
+                removed = [name for name in indexed if name not in current]
+
+                cursor.executemany(
+                    'DELETE FROM label_files WHERE directory = ? AND filename = ?',
+                    [(key, name) for name in removed]
+                )
+                cursor.executemany(
+                    'INSERT OR REPLACE INTO label_files (directory, filename, norm_key, ext) VALUES (?, ?, ?, ?)',
+                    [(key, name, get_match_key(name), current[name]) for name in added]
+                )
+
+                # Don't trust a directory timestamp that is too close to the scan,
+                # a file written in the same tick would be invisible next time
+                stored_mtime = dir_mtime_ns
+                if dir_mtime_ns / 1e9 >= scan_started - MTIME_SAFETY_WINDOW:
+                    stored_mtime = None
+
+                cursor.execute(
+                    'INSERT OR REPLACE INTO indexed_directories (directory, path, dir_mtime_ns, last_scan) VALUES (?, ?, ?, ?)',
+                    (key, os.path.abspath(directory), stored_mtime, scan_started)
+                )
+                conn.commit()
+                self._update_memory_indexes(key, added, removed)
+
+                if added or removed:
+                    logger.info(f"Label index updated for {directory}: {len(added)} added, {len(removed)} removed")
+                return True
+            except Exception as e:
+                logger.error(f"Error refreshing label index for {directory}: {e}")
+                if self._conn is not None:
+                    self._conn.rollback()
+                return False
+
+    def refresh_many(self, directories, force=False):
+        """
+        Refresh several directories concurrently on the scan thread pool.
+
+        Args:
+            directories: Directories to synchronize
+            force: Rescan even if the directory modification times are unchanged
+
+        Returns:
+            list: The directories that are usable, in the order given
+        """
+        directories = _unique_directories(directories)
+        if len(directories) == 1:
+            return directories if self.refresh(directories[0], force) else []
+
+        results = _get_scan_executor().map(lambda directory: self.refresh(directory, force), directories)
+        return [directory for directory, ok in zip(directories, list(results)) if ok]
+
+    def get_indexed_filenames(self, directory):
+        """
+        Get the filenames currently indexed for a directory.
+
+        Args:
+            directory: Indexed directory
+
+        Returns:
+            set: Indexed filenames
+        """
+        with self._lock:
+            try:
+                cursor = self._get_connection().cursor()
+                cursor.execute(
+                    'SELECT filename FROM label_files WHERE directory = ?',
+                    (normalize_directory_key(directory),)
+                )
+                return {name for (name,) in cursor.fetchall()}
+            except Exception as e:
+                logger.error(f"Error reading label index for {directory}: {e}")
+                return set()
+
+    def apply_changes(self, directory, added, removed):
+        """
+        Apply file changes reported by the directory watcher.
+        Marks the directory as watched, so lookups skip the mtime check.
+
+        Args:
+            directory: Directory that changed
+            added: Filenames that were added
+            removed: Filenames that were removed
+        """
+        key = normalize_directory_key(directory)
+
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                cursor = conn.cursor()
+                cursor.executemany(
+                    'DELETE FROM label_files WHERE directory = ? AND filename = ?',
+                    [(key, name) for name in removed]
+                )
+                cursor.executemany(
+                    'INSERT OR REPLACE INTO label_files (directory, filename, norm_key, ext) VALUES (?, ?, ?, ?)',
+                    [(key, name, get_match_key(name), os.path.splitext(name)[1].lower()) for name in added]
+                )
+
+                # Forget the stored mtime, if the watcher stops the next lookup rescans
+                cursor.execute(
+                    'INSERT OR REPLACE INTO indexed_directories (directory, path, dir_mtime_ns, last_scan) VALUES (?, ?, NULL, ?)',
+                    (key, os.path.abspath(directory), time.time())
+                )
+                conn.commit()
+
+                # Load the trigram index here, in the watcher thread, so the
+                # first lookup on a scan doesn't have to build it
+                self._get_trigram_index(key)
+                self._update_memory_indexes(key, added, removed)
+                self._watched_directories.add(key)
+            except Exception as e:
+                logger.error(f"Error applying label changes for {directory}: {e}")
+                if self._conn is not None:
+                    self._conn.rollback()
+
+    def set_watched(self, directory, watched):
+        """
+        Mark whether a directory is kept current by a watcher.
+
+        Args:
+            directory: Indexed directory
+            watched: True if a watcher is feeding changes for the directory
+        """
+        key = normalize_directory_key(directory)
+        with self._lock:
+            if watched:
+                self._watched_directories.add(key)
+            else:
+                self._watched_directories.discard(key)
+
+    def find_files_by_sku(self, directories, sku, extensions=LABEL_EXTENSIONS):
+        """
+        Find files that contain the SKU in their filename.
+        Uses the same matching rules as file_utils.find_files_by_sku.
+
+        Args:
+            directories: Directory or list of label directories to search in
+            sku: SKU to search for in filenames
+            extensions: Tuple of file extensions to include
+
+        Returns:
+            list: Full paths of the matching files. With several directories the
+                results are merged; a filename present in more than one
+                directory is returned once, from the first directory listed
+        """
+        if not sku:
+            return []
+
+        if isinstance(directories, str):
+            directories = [directories]
+        directories = self.refresh_many(directories)
+
+        norm_sku = normalize_filename_for_match(sku)
+        extensions = tuple(ext.lower() for ext in extensions)
+
+        results = []
+        seen = set()
+        with self._lock:
+            try:
+                for directory in directories:
+                    # The trigram index returns exactly the names where norm_sku in norm_key
+                    matches = self._get_trigram_index(normalize_directory_key(directory)).search(norm_sku)
+                    found = set()
+                    for filename in sorted(matches, key=str.lower):
+                        if os.path.splitext(filename)[1].lower() not in extensions:
+                            continue
+                        # Only names already returned from an earlier directory are skipped
+                        if filename.lower() in seen:
+                            continue
+                        found.add(filename.lower())
+                        results.append(os.path.join(directory, filename))
+                    seen.update(found)
+                return results
+            except Exception as e:
+                logger.error(f"Error searching label index for SKU {sku}: {e}")
+                return []
+
+    def suggest_files_by_sku(self, directories, sku, max_distance=MAX_DISTANCE, limit=10):
+        """
+        Find the label files closest to a SKU that matched nothing, for
+        mistyped or partially scanned SKUs.
+
+        Args:
+            directories: Directory or list of label directories to search in
+            sku: SKU that was entered
+            max_distance: Maximum number of mistyped characters (at most 2)
+            limit: Maximum number of suggestions to return
+
+        Returns:
+            list: (full path, edit distance) tuples, closest first. A filename
+                present in more than one directory is returned once, from the
+                first directory listed
+        """
+        norm_sku = normalize_filename_for_match(sku or '')
+        if len(norm_sku) < MIN_SUGGESTION_KEY_LENGTH:
+            return []
+
+        if isinstance(directories, str):
+            directories = [directories]
+        directories = self.refresh_many(directories)
+
+        suggestions = {}
+        with self._lock:
+            try:
+                for directory in directories:
+                    matches = self._get_fuzzy_index(normalize_directory_key(directory)).search(norm_sku, max_distance)
+                    for filename, distance in matches.items():
+                        name_key = filename.lower()
+                        if name_key not in suggestions:
+                            suggestions[name_key] = (distance, os.path.join(directory, filename))
+            except Exception as e:
+                logger.error(f"Error finding label suggestions for SKU {sku}: {e}")
+                return []
+
+        # Closest first, then alphabetical like the exact lookup
+        ranked = sorted(suggestions.items(), key=lambda item: (item[1][0], item[0]))
+        return [(path, distance) for _, (distance, path) in ranked[:limit]]
+
+    def count_files(self, directories):
+        """
+        Count the distinct label files indexed for one or more directories.
+
+        Args:
+            directories: Directory or list of label directories to count
+
+        Returns:
+            int: Number of label files, or 0 if no directory is available
+        """
+        if isinstance(directories, str):
+            directories = [directories]
+        directories = self.refresh_many(directories)
+
+        with self._lock:
+            try:
+                if len(directories) == 1:
+                    return len(self._get_trigram_index(normalize_directory_key(directories[0])))
+
+                # Count a filename present in several roots once
+                names = set()
+                for directory in directories:
+                    trigrams = self._get_trigram_index(normalize_directory_key(directory))
+                    names.update(name.lower() for name in trigrams.items())
+                return len(names)
+            except Exception as e:
+                logger.error(f"Error counting indexed label files: {e}")
+                return 0
+
+    def close(self):
+        """Close the index database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._trigrams = {}
+            self._fuzzy = {}
+
+def get_label_index():
+    """
+    Get the application label index instance.
+
+    Returns:
+        LabelIndex: Shared label index
+    """
+    global _label_index
+
+    with _label_index_lock:
+        if _label_index is None:
+            _label_index = LabelIndex()
+        return _label_index
+
+def find_label_files(directories, sku):
+    """
+    Find label files for a SKU using the persistent label index.
+
+    Args:
+        directories: Directory or list of label directories to search in
+        sku: SKU to search for in filenames
+
+    Returns:
+        list: List of full file paths that match the SKU
+    """
+    return get_label_index().find_files_by_sku(directories, sku)
+
+def suggest_label_files(directories, sku):
+    """
+    Suggest label files for a SKU with no exact match, closest first.
+
+    Args:
+        directories: Directory or list of label directories to search in
+        sku: SKU that was entered
+
+    Returns:
+        list: (full path, edit distance) tuples
+    """
+    return get_label_index().suggest_files_by_sku(directories, sku)
+
+def count_label_files(directories):
+    """
+    Count the distinct label files in one or more label directories.
+
+    Args:
+        directories: Directory or list of label directories
+
+    Returns:
+        int: Number of label files
+    """
+    return get_label_index().count_files(directories)
+
+# Filenames and SKUs the built-in parity check runs against: extension letters,
+# dotted and short SKUs, separators and case
+PARITY_CHECK_FILES = (
+    'ABC-123.png', 'abc_123_small.PNG', 'XYZ 905.png', 'G-100.jpg', '905.pdf',
+    'dotted.sku.v2.png', 'readme.txt', 'nope.gif', 'Tiny.bmp', 'Label.tiff'
+)
+PARITY_CHECK_SKUS = (
+    'png', 'PNG', 'jpg', 'G', 'n', 'p', '.', '905.p', '905.png', 'abc123', 'ABC-123',
+    'x y z', 'dotted.sku', 'sku.v2', 'v2.png', 'txt', 'b', '-', 'label', 'tiff'
+)
+
+def check_parity(directory, skus, index=None):
+    """
+    Compare indexed lookups with file_utils.find_files_by_sku, which lists the directory.
+
+    Args:
+        directory: Label directory to search in
+        skus: SKUs to look up
+        index: Optional LabelIndex to check (defaults to a temporary one)
+
+    Returns:
+        list: (sku, files only the listing found, files only the index found) for every difference
+    """
+    from src.utils.file_utils import find_files_by_sku as list_files_by_sku
+
+    temp_dir = None
+    if index is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        index = LabelIndex(os.path.join(temp_dir.name, 'label_index.db'))
+
+    try:
+        differences = []
+        for sku in skus:
+            listed = {os.path.basename(path) for path in list_files_by_sku(directory, sku)}
+            indexed = {os.path.basename(path) for path in index.find_files_by_sku(directory, sku)}
+            if listed != indexed:
+                differences.append((sku, sorted(listed - indexed), sorted(indexed - listed)))
+        return differences
+    finally:
+        if temp_dir is not None:
+            index.close()
+            temp_dir.cleanup()
+
+def main(argv=None):
+    """
+    Command line entry point: run the parity check.
+
+    Args:
+        argv: Optional argument list (defaults to sys.argv)
+
+    Returns:
+        int: Exit code (0 if every lookup matched the directory listing)
+    """
+    parser = argparse.ArgumentParser(description="Check that indexed SKU lookups match a directory listing.")
+    parser.add_argument('--directory', help="label directory to check (defaults to built-in sample files)")
+    parser.add_argument('--sku', action='append', help="SKU to look up (repeatable, defaults to built-in samples)")
+    args = parser.parse_args(argv)
+
+    skus = args.sku or PARITY_CHECK_SKUS
+    if args.directory:
+        differences = check_parity(args.directory, skus)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            for name in PARITY_CHECK_FILES:
+                open(os.path.join(directory, name), 'wb').close()
+            differences = check_parity(directory, skus)
+
+    for sku, only_listed, only_indexed in differences:
+        print(f"{sku!r}: listing only {only_listed}, index only {only_indexed}")
+    print(f"{len(skus) - len(differences)} of {len(skus)} lookups match the directory listing")
+    return 1 if differences else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Label directory watcher for the Label Maker application.
+This module watches the labels directory in the background and feeds file
+create, rename and delete events into the label index and the label counters,
+so the directory never has to be relisted after a save or a scan. The
+change notifications come from directory_watcher, which the Label Maker
+sub-application uses too.
+"""
+import os
+import sys
+import threading
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.directory_watcher import DirectoryWatcher
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+# Active label directory watchers and change listeners
+_watchers = {}
+_listeners = []
+_watchers_lock = threading.Lock()
+
+def add_label_change_listener(listener):
+    """
+    Register a function to be called when label files change.
+
+    Args:
+        listener: Called as listener(directory, added, removed) from the watcher thread
+    """
+    with _watchers_lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+def remove_label_change_listener(listener):
+    """
+    Unregister a label change listener.
+
+    Args:
+        listener: Listener previously passed to add_label_change_listener
+    """
+    with _watchers_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+def _on_label_changes(directory, added, removed):
+    """
+    Feed label file changes into the label index and the registered listeners.
+
+    Args:
+        directory: Directory that changed
+        added: Filenames that were added
+        removed: Filenames that were removed
+    """
+    # Imported here to avoid a circular import with label_index
+    from src.utils.label_index import get_label_index
+
+    get_label_index().apply_changes(directory, added, removed)
+
+    with _watchers_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(directory, added, removed)
+        except Exception as e:
+            logger.error(f"Error in label change listener: {e}")
+
+def start_label_watcher(directory):
+    """
+    Start watching a labels directory, if it isn't watched already.
+
+    Args:
+        directory: Labels directory to watch
+
+    Returns:
+        bool: True if the directory is being watched, False otherwise
+    """
+    from src.utils.label_index import get_label_index, normalize_directory_key, LABEL_EXTENSIONS
+
+    if not directory or not os.path.isdir(directory):
+        return False
+
+    key = normalize_directory_key(directory)
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is not None and watcher.is_running():
+            return True
+
+        watcher = DirectoryWatcher(
+            directory,
+            lambda added, removed: _on_label_changes(directory, added, removed),
+            extensions=LABEL_EXTENSIONS,
+            known_files=get_label_index().get_indexed_filenames(directory)
+        )
+        _watchers[key] = watcher
+
+    watcher.start()
+    return True
+
+def stop_label_watcher(directory):
+    """
+    Stop watching a labels directory.
+
+    Args:
+        directory: Labels directory to stop watching
+    """
+    from src.utils.label_index import get_label_index, normalize_directory_key
+
+    with _watchers_lock:
+        watcher = _watchers.pop(normalize_directory_key(directory), None)
+
+    if watcher is not None:
+        watcher.stop()
+        get_label_index().set_watched(directory, False)
+
+def stop_all_label_watchers():
+    """Stop all label directory watchers (called on application exit)."""
+    with _watchers_lock:
+        directories = [watcher.directory for watcher in _watchers.values()]
+    for directory in directories:
+        stop_label_watcher(directory)
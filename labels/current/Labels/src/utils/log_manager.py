@@ -6,17 +6,16 @@ import os
 import sqlite3
 import datetime
 import threading
-from typing import Optional, Dict, List, Tuple, Any
+from typing import Optional, Dict, List, Tuple, Any, Callable
 
 # Import the application logger
 from src.utils.app_logger import get_app_logger
+from src.utils.db_manager import SHIPPING_LOGS_DB, register_database, get_db_manager, get_connection
+from src.utils.csv_export import write_cursor_to_csv
 
 # Get the application logger
 logger = get_app_logger()
 
-# Thread-local storage for database connections
-_local = threading.local()
-
 def get_logs_db_path() -> Tuple[str, str]:
     """
     Get the path to the logs database.
@@ -43,81 +42,58 @@ def get_logs_db_path() -> Tuple[str, str]:
 
 def get_db_connection() -> sqlite3.Connection:
     """
-    Get a thread-local database connection.
+    Get the calling thread's long-lived database connection.
     
     Returns:
-        sqlite3.Connection: Database connection
+        sqlite3.Connection: Database connection (rows behave like dictionaries)
     """
-    if not hasattr(_local, 'conn'):
-        # Initialize the database if needed
-        initialize_logs_db()
-        
-        # Get the database path
-        _, db_path = get_logs_db_path()
-        
-        # Create a new connection for this thread
-        _local.conn = sqlite3.connect(db_path)
-        
-        # Enable foreign keys
-        _local.conn.execute('PRAGMA foreign_keys = ON')
-        
-        # Configure connection to return rows as dictionaries
-        _local.conn.row_factory = sqlite3.Row
-    
-    return _local.conn
+    return get_connection(SHIPPING_LOGS_DB)
 
 def close_db_connection():
     """
-    Close the thread-local database connection if it exists.
+    Close the calling thread's database connection if it exists.
     """
-    if hasattr(_local, 'conn'):
-        _local.conn.close()
-        del _local.conn
+    get_db_manager().close_connection(SHIPPING_LOGS_DB)
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    """
+    Create the shipping_logs table and its indices if they don't exist.
+    
+    Args:
+        conn: Connection to the logs database
+    """
+    cursor = conn.cursor()
+    
+    # Create the shipping_logs table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS shipping_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        tracking_number TEXT,
+        sku TEXT,
+        action TEXT NOT NULL,
+        status TEXT NOT NULL,
+        details TEXT,
+        created_at TEXT NOT NULL
+    )
+    ''')
+    
+    # Create indices for faster queries
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_shipping_logs_timestamp ON shipping_logs(timestamp)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_shipping_logs_tracking ON shipping_logs(tracking_number)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_shipping_logs_sku ON shipping_logs(sku)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_shipping_logs_status ON shipping_logs(status)')
+
+register_database(SHIPPING_LOGS_DB, lambda: get_logs_db_path()[1], _create_schema)
 
 def initialize_logs_db() -> bool:
     """
-    Initialize the logs database with necessary tables.
+    Initialize the logs database with necessary tables (once per process).
     
     Returns:
         bool: True if initialization was successful, False otherwise
     """
-    try:
-        # Get the database path
-        _, db_path = get_logs_db_path()
-        
-        # Connect to the database
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Create the shipping_logs table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS shipping_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            tracking_number TEXT,
-            sku TEXT,
-            action TEXT NOT NULL,
-            status TEXT NOT NULL,
-            details TEXT,
-            created_at TEXT NOT NULL
-        )
-        ''')
-        
-        # Create indices for faster queries
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_shipping_logs_timestamp ON shipping_logs(timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_shipping_logs_tracking ON shipping_logs(tracking_number)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_shipping_logs_sku ON shipping_logs(sku)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_shipping_logs_status ON shipping_logs(status)')
-        
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
-        
-        return True
-    
-    except Exception as e:
-        logger.error(f"Error initializing logs database: {str(e)}")
-        return False
+    return get_db_manager().ensure_schema(SHIPPING_LOGS_DB)
 
 def log_shipping_event(
     tracking_number: str,
@@ -128,6 +104,8 @@ def log_shipping_event(
 ) -> bool:
     """
     Log a shipping-related event to the database.
+    Scans are recorded through the event journal instead, whose projector
+    inserts their shipping log rows in batches.
     
     Args:
         tracking_number: The tracking number (can be empty)
@@ -140,26 +118,21 @@ def log_shipping_event(
         bool: True if logging was successful, False otherwise
     """
     try:
-        # Get the database connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Get the current timestamp
         timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         created_at = timestamp  # For audit purposes
         
         # Insert the log entry
-        cursor.execute(
-            """
-            INSERT INTO shipping_logs 
-            (timestamp, tracking_number, sku, action, status, details, created_at) 
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (timestamp, tracking_number, sku, action, status, details, created_at)
-        )
-        
-        # Commit the changes
-        conn.commit()
+        conn = get_db_connection()
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO shipping_logs 
+                (timestamp, tracking_number, sku, action, status, details, created_at) 
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (timestamp, tracking_number, sku, action, status, details, created_at)
+            )
         
         return True
     
@@ -167,6 +140,51 @@ def log_shipping_event(
         logger.error(f"Error logging shipping event: {str(e)}")
         return False
 
+def _build_log_filters(
+    tracking_number: Optional[str] = None,
+    sku: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    status: Optional[str] = None
+) -> Tuple[str, List[Any]]:
+    """
+    Build the filter conditions shared by the shipping log queries.
+    
+    Args:
+        tracking_number: Filter by tracking number
+        sku: Filter by SKU
+        start_date: Filter by start date (YYYY-MM-DD)
+        end_date: Filter by end date (YYYY-MM-DD)
+        status: Filter by status
+        
+    Returns:
+        tuple: (conditions to append after "WHERE 1=1", list of parameters)
+    """
+    query = ""
+    params = []
+    
+    if tracking_number:
+        query += " AND tracking_number LIKE ?"
+        params.append(f"%{tracking_number}%")
+    
+    if sku:
+        query += " AND sku LIKE ?"
+        params.append(f"%{sku}%")
+    
+    if start_date:
+        query += " AND timestamp >= ?"
+        params.append(f"{start_date} 00:00:00")
+    
+    if end_date:
+        query += " AND timestamp <= ?"
+        params.append(f"{end_date} 23:59:59")
+    
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+    
+    return query, params
+
 def get_shipping_logs(
     limit: int = 100,
     offset: int = 0,
@@ -197,29 +215,8 @@ def get_shipping_logs(
         cursor = conn.cursor()
         
         # Build the query
-        query = "SELECT * FROM shipping_logs WHERE 1=1"
-        params = []
-        
-        # Add filters
-        if tracking_number:
-            query += " AND tracking_number LIKE ?"
-            params.append(f"%{tracking_number}%")
-        
-        if sku:
-            query += " AND sku LIKE ?"
-            params.append(f"%{sku}%")
-        
-        if start_date:
-            query += " AND timestamp >= ?"
-            params.append(f"{start_date} 00:00:00")
-        
-        if end_date:
-            query += " AND timestamp <= ?"
-            params.append(f"{end_date} 23:59:59")
-        
-        if status:
-            query += " AND status = ?"
-            params.append(status)
+        filters, params = _build_log_filters(tracking_number, sku, start_date, end_date, status)
+        query = "SELECT * FROM shipping_logs WHERE 1=1" + filters
         
         # Add ordering and limits
         query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
@@ -239,16 +236,103 @@ def get_shipping_logs(
         logger.error(f"Error getting shipping logs: {str(e)}")
         return []
 
+def get_most_printed_skus(limit: int = 100, days: int = 30) -> List[str]:
+    """
+    Get the SKUs printed most often in the recent logs.
+    
+    Args:
+        limit: Maximum number of SKUs to return
+        days: Number of days of logs to count
+        
+    Returns:
+        list: SKUs, most printed first
+    """
+    try:
+        # Get the database connection
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        # Count successful prints per SKU since the start date
+        start = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        cursor.execute(
+            """
+            SELECT sku, COUNT(*) AS prints
+            FROM shipping_logs
+            WHERE action = 'print' AND status = 'success' AND sku != '' AND timestamp >= ?
+            GROUP BY sku
+            ORDER BY prints DESC
+            LIMIT ?
+            """,
+            (start, limit)
+        )
+        
+        return [row['sku'] for row in cursor.fetchall()]
+    
+    except Exception as e:
+        logger.error(f"Error getting most printed SKUs: {str(e)}")
+        return []
+
+def get_sheet_scans(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    actions: Tuple[str, ...] = ('print', 'log_only')
+) -> List[Dict[str, Any]]:
+    """
+    Get the successful scans that belong on the Google Sheet, oldest first.
+    
+    Args:
+        start_date: Filter by start date (YYYY-MM-DD)
+        end_date: Filter by end date (YYYY-MM-DD)
+        actions: Actions that are written to the sheet
+        
+    Returns:
+        list: Scans as dictionaries with id, timestamp, tracking_number and sku
+    """
+    try:
+        # Get the database connection
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        # Build the query
+        placeholders = ', '.join('?' for _ in actions)
+        query = f"""
+            SELECT id, timestamp, tracking_number, sku
+            FROM shipping_logs
+            WHERE status = 'success' AND tracking_number != '' AND action IN ({placeholders})
+        """
+        params = list(actions)
+        
+        if start_date:
+            query += " AND timestamp >= ?"
+            params.append(f"{start_date} 00:00:00")
+        
+        if end_date:
+            query += " AND timestamp <= ?"
+            params.append(f"{end_date} 23:59:59")
+        
+        query += " ORDER BY timestamp, id"
+        
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+    
+    except Exception as e:
+        logger.error(f"Error getting sheet scans: {str(e)}")
+        return []
+
 def export_logs_to_csv(
     file_path: str,
     tracking_number: Optional[str] = None,
     sku: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    cancel_event: Optional[threading.Event] = None
 ) -> bool:
     """
     Export shipping logs to a CSV file with optional filtering.
+    Logs are streamed from the database in chunks, so the whole history can
+    be exported without holding it in memory.
     
     Args:
         file_path: Path to save the CSV file
@@ -257,44 +341,33 @@ def export_logs_to_csv(
         start_date: Filter by start date (YYYY-MM-DD)
         end_date: Filter by end date (YYYY-MM-DD)
         status: Filter by status
+        progress_callback: Optional function called with (logs written, total) after every chunk
+        cancel_event: Optional event that stops the export when set
         
     Returns:
-        bool: True if export was successful, False otherwise
+        bool: True if export was successful, False otherwise (including when cancelled)
     """
     try:
-        import csv
-        
-        # Get the logs
-        logs = get_shipping_logs(
-            limit=10000,  # High limit for export
-            tracking_number=tracking_number,
-            sku=sku,
-            start_date=start_date,
-            end_date=end_date,
-            status=status
-        )
+        conn = get_db_connection()
+        filters, params = _build_log_filters(tracking_number, sku, start_date, end_date, status)
         
         # Check if there are logs to export
-        if not logs:
+        total = conn.execute("SELECT COUNT(*) FROM shipping_logs WHERE 1=1" + filters, params).fetchone()[0]
+        if not total:
             return False
         
-        # Write to CSV
-        with open(file_path, 'w', newline='', encoding='utf-8') as f:
-            # Define the fieldnames
-            fieldnames = ['timestamp', 'tracking_number', 'sku', 'action', 'status', 'details']
-            
-            # Create the CSV writer
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            
-            # Write the header
-            writer.writeheader()
-            
-            # Write the rows
-            for log in logs:
-                # Only include the fields we want
-                row = {field: log.get(field, '') for field in fieldnames}
-                writer.writerow(row)
+        # Write to CSV straight from the cursor, only the fields we want
+        fieldnames = ['timestamp', 'tracking_number', 'sku', 'action', 'status', 'details']
+        cursor = conn.execute(
+            "SELECT timestamp, tracking_number, sku, action, status, details FROM shipping_logs WHERE 1=1"
+            + filters + " ORDER BY timestamp DESC",
+            params
+        )
+        written = write_cursor_to_csv(cursor, file_path, fieldnames, total, progress_callback, cancel_event)
         
+        if written is None:
+            logger.info("Shipping log export cancelled")
+            return False
         return True
     
     except Exception as e:
@@ -426,6 +499,8 @@ def migrate_from_text_log(archive_after_import: bool = True) -> Tuple[bool, int,
         return True, count, skipped
     
     except Exception as e:
+        # Don't leave a half-imported transaction open on the shared connection
+        get_db_manager().rollback(SHIPPING_LOGS_DB)
         logger.error(f"Error migrating from text log: {e}")
         return False, 0, 0
 
@@ -508,7 +583,9 @@ def migrate_from_shipping_records_db() -> Tuple[bool, int, int]:
         return True, count, skipped
     
     except Exception as e:
-        logging.error(f"Error migrating from shipping records database: {str(e)}")
+        # Don't leave a half-imported transaction open on the shared connection
+        get_db_manager().rollback(SHIPPING_LOGS_DB)
+        logger.error(f"Error migrating from shipping records database: {str(e)}")
         return False, 0, 0
 
 def run_migration_wizard(parent_window=None) -> bool:
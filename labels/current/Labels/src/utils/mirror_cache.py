@@ -0,0 +1,409 @@
+"""
+Persistent cache of mirrored label images for the Label Maker application.
+This module keeps mirrored copies of label images between sessions, limited
+in size with least-recently-used eviction, and warms them in the background
+for the most printed SKUs so mirror printing doesn't have to flip images at
+print time.
+"""
+import os
+import sys
+import time
+import hashlib
+import sqlite3
+import threading
+from PIL import Image
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.label_index import find_label_files, get_label_directories
+from src.utils.log_manager import get_most_printed_skus
+from src.utils.print_backends import is_raw_label_file
+from src.utils.db_manager import configure_connection
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+# Default size limit of the cache in megabytes
+DEFAULT_MAX_SIZE_MB = 200
+
+# Number of most printed SKUs mirrored in advance
+WARM_UP_SKU_COUNT = 100
+
+# Days of shipping logs used to find the most printed SKUs
+WARM_UP_DAYS = 30
+
+# Number of cache hits whose use time is kept in memory before it is written
+LAST_USED_FLUSH_COUNT = 50
+
+# Global cache instance
+_mirror_cache = None
+_mirror_cache_lock = threading.Lock()
+
+# Background warm-up thread (only one runs at a time)
+_warm_up_thread = None
+
+def get_mirror_cache_dir():
+    """
+    Get the directory the mirrored labels are stored in.
+
+    Returns:
+        str: Path to the cache directory (cache/mirrored_labels in the project root)
+    """
+    # Get the project root directory
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+    # Keep the cache out of labelmaker_temp, which is emptied on exit
+    return os.path.join(project_root, 'cache', 'mirrored_labels')
+
+def _source_key(source_path):
+    """
+    Normalize a label path so the same file always maps to the same cache entry.
+
+    Args:
+        source_path: Path to a label image
+
+    Returns:
+        str: Normalized path
+    """
+    return os.path.normcase(os.path.abspath(source_path))
+
+class MirrorCache:
+    """
+    Size-limited cache of mirrored label images.
+
+    Each entry records the size and modification time of the source label,
+    so an edited label is mirrored again the next time it is needed. Entries
+    are stamped on every use and the least recently used ones are deleted
+    once the cache grows past its size limit. Use stamps are kept in memory
+    and written in batches, so a cache hit doesn't commit to the database.
+    """
+
+    def __init__(self, cache_dir=None, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        """
+        Initialize the mirror cache.
+
+        Args:
+            cache_dir: Optional directory for the cached images (defaults to cache/mirrored_labels)
+            max_size_mb: Maximum total size of the cached images in megabytes
+        """
+        self.cache_dir = cache_dir or get_mirror_cache_dir()
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.RLock()
+        self._conn = None
+
+        # Use times of cache hits not written to the index yet, by source key
+        self._pending_last_used = {}
+
+    def _get_connection(self):
+        """
+        Get the connection to the cache index, creating it if needed.
+
+        Returns:
+            sqlite3.Connection: Database connection
+        """
+        if self._conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+            # Shared between the print worker and the warm-up thread, guarded by self._lock
+            db_path = os.path.join(self.cache_dir, 'mirror_cache.db')
+            self._conn = configure_connection(sqlite3.connect(db_path, check_same_thread=False), db_path)
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS mirrored_labels (
+                source TEXT PRIMARY KEY,
+                source_mtime_ns INTEGER NOT NULL,
+                source_size INTEGER NOT NULL,
+                cache_file TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_mirrored_labels_last_used ON mirrored_labels(last_used)')
+            self._conn.commit()
+        return self._conn
+
+    def _cache_filename(self, source_key, source_path):
+        """
+        Get the cache filename for a source label.
+
+        Args:
+            source_key: Normalized source path
+            source_path: Source label path (for the extension)
+
+        Returns:
+            str: Filename inside the cache directory
+        """
+        digest = hashlib.sha1(source_key.encode('utf-8')).hexdigest()
+        return f"{digest}{os.path.splitext(source_path)[1].lower()}"
+
+    def get(self, source_path):
+        """
+        Get the cached mirrored copy of a label if it is up to date.
+
+        Args:
+            source_path: Path to the original label image
+
+        Returns:
+            str: Path to the mirrored image, or None if it isn't cached or is stale
+        """
+        source_key = _source_key(source_path)
+        try:
+            source_stat = os.stat(source_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                row = conn.execute(
+                    'SELECT source_mtime_ns, source_size, cache_file FROM mirrored_labels WHERE source = ?',
+                    (source_key,)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                source_mtime_ns, source_size, cache_file = row
+                cache_path = os.path.join(self.cache_dir, cache_file)
+                if (source_mtime_ns != source_stat.st_mtime_ns or source_size != source_stat.st_size
+                        or not os.path.exists(cache_path)):
+                    return None
+
+                self._pending_last_used[source_key] = time.time()
+                if len(self._pending_last_used) >= LAST_USED_FLUSH_COUNT:
+                    self._flush_last_used()
+                return cache_path
+            except Exception as e:
+                logger.error(f"Error reading mirror cache for {source_path}: {e}")
+                return None
+
+    def get_or_create(self, source_path):
+        """
+        Get the mirrored copy of a label, mirroring it now if it isn't cached.
+
+        Args:
+            source_path: Path to the original label image
+
+        Returns:
+            str: Path to the mirrored image, or None if it could not be created
+        """
+        cache_path = self.get(source_path)
+        if cache_path is None:
+            cache_path = self._create(source_path)
+        return cache_path
+
+    def _create(self, source_path):
+        """
+        Mirror a label image into the cache.
+
+        Args:
+            source_path: Path to the original label image
+
+        Returns:
+            str: Path to the mirrored image, or None on error
+        """
+        source_key = _source_key(source_path)
+        cache_file = self._cache_filename(source_key, source_path)
+        cache_path = os.path.join(self.cache_dir, cache_file)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            source_stat = os.stat(source_path)
+
+            # Write to a temporary name first so a reader never sees a half written image
+            temp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+            with Image.open(source_path) as img:
+                img.transpose(Image.FLIP_LEFT_RIGHT).save(temp_path, format=img.format, optimize=True)
+            os.replace(temp_path, cache_path)
+            size = os.path.getsize(cache_path)
+        except Exception as e:
+            logger.error(f"Error mirroring {source_path}: {e}")
+            return None
+
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                conn.execute(
+                    'INSERT OR REPLACE INTO mirrored_labels (source, source_mtime_ns, source_size, cache_file, size, last_used) VALUES (?, ?, ?, ?, ?, ?)',
+                    (source_key, source_stat.st_mtime_ns, source_stat.st_size, cache_file, size, time.time())
+                )
+                conn.commit()
+                self._pending_last_used.pop(source_key, None)
+                self._evict(keep=source_key)
+            except Exception as e:
+                logger.error(f"Error updating mirror cache for {source_path}: {e}")
+        return cache_path
+
+    def _flush_last_used(self):
+        """
+        Write the use times of recent cache hits to the index.
+        Must be called with self._lock held.
+        """
+        if not self._pending_last_used:
+            return
+
+        conn = self._get_connection()
+        conn.executemany(
+            'UPDATE mirrored_labels SET last_used = ? WHERE source = ?',
+            [(last_used, source_key) for source_key, last_used in self._pending_last_used.items()]
+        )
+        conn.commit()
+        self._pending_last_used.clear()
+
+    def flush(self):
+        """Write the use times of recent cache hits to the index."""
+        with self._lock:
+            try:
+                self._flush_last_used()
+            except Exception as e:
+                logger.error(f"Error updating mirror cache use times: {e}")
+
+    def _evict(self, keep=None):
+        """
+        Delete least recently used entries until the cache fits its size limit.
+        Must be called with self._lock held.
+
+        Args:
+            keep: Optional source key that must not be evicted (the entry just added)
+        """
+        conn = self._get_connection()
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM mirrored_labels').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Eviction order depends on the use times, write the ones still in memory
+        self._flush_last_used()
+
+        evicted = 0
+        for source_key, cache_file, size in conn.execute(
+                'SELECT source, cache_file, size FROM mirrored_labels ORDER BY last_used').fetchall():
+            if total <= self.max_bytes:
+                break
+            if source_key == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, cache_file))
+            except OSError:
+                pass
+            conn.execute('DELETE FROM mirrored_labels WHERE source = ?', (source_key,))
+            total -= size
+            evicted += 1
+        conn.commit()
+        logger.info(f"Mirror cache evicted {evicted} label(s), {total // 1024} KB in use")
+
+    def set_max_size(self, max_size_mb):
+        """
+        Change the size limit, evicting entries if the cache is now too large.
+
+        Args:
+            max_size_mb: Maximum total size of the cached images in megabytes
+        """
+        with self._lock:
+            self.max_bytes = int(max_size_mb * 1024 * 1024)
+            try:
+                self._evict()
+            except Exception as e:
+                logger.error(f"Error resizing mirror cache: {e}")
+
+    def warm(self, source_paths):
+        """
+        Mirror every label in a list that isn't cached yet.
+
+        Args:
+            source_paths: Paths to label images, most important first
+
+        Returns:
+            int: Number of labels mirrored
+        """
+        created = 0
+        for source_path in source_paths:
+            if self.get(source_path) is None and self._create(source_path) is not None:
+                created += 1
+        self.flush()
+        return created
+
+    def close(self):
+        """Write the pending use times and close the cache index connection."""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._flush_last_used()
+                except Exception as e:
+                    logger.error(f"Error updating mirror cache use times: {e}")
+                self._conn.close()
+                self._conn = None
+
+def get_mirror_cache(settings=None):
+    """
+    Get the application mirror cache instance.
+
+    Args:
+        settings: Optional application settings (for the mirror_cache_max_mb limit)
+
+    Returns:
+        MirrorCache: Shared mirror cache
+    """
+    global _mirror_cache
+
+    max_size_mb = getattr(settings, 'mirror_cache_max_mb', None) or DEFAULT_MAX_SIZE_MB
+    with _mirror_cache_lock:
+        if _mirror_cache is None:
+            _mirror_cache = MirrorCache(max_size_mb=max_size_mb)
+        elif settings is not None and _mirror_cache.max_bytes != int(max_size_mb * 1024 * 1024):
+            _mirror_cache.set_max_size(max_size_mb)
+        return _mirror_cache
+
+def close_mirror_cache():
+    """Close the application mirror cache, writing its pending use times."""
+    global _mirror_cache
+
+    with _mirror_cache_lock:
+        cache = _mirror_cache
+        _mirror_cache = None
+    if cache is not None:
+        cache.close()
+
+def get_mirrored_label(source_path):
+    """
+    Get a mirrored copy of a label image from the cache, mirroring it if needed.
+
+    Args:
+        source_path: Path to the original label image
+
+    Returns:
+        str: Path to the mirrored image, or None if it could not be created
+    """
+    return get_mirror_cache().get_or_create(source_path)
+
+def warm_mirror_cache(settings):
+    """
+    Mirror the labels of the most printed SKUs in a background thread.
+    Does nothing if a warm-up is already running.
+
+    Args:
+        settings: Application settings (label directories and cache size)
+    """
+    global _warm_up_thread
+
+    directories = get_label_directories(settings)
+    cache = get_mirror_cache(settings)
+
+    def warm_up_task():
+        try:
+            started = time.time()
+            labels = []
+            for sku in get_most_printed_skus(WARM_UP_SKU_COUNT, WARM_UP_DAYS):
+                # The first match is the file print_barcode would print for the SKU
+                matches = find_label_files(directories, sku)
+                if matches and not is_raw_label_file(matches[0]):
+                    labels.append(matches[0])
+            created = cache.warm(labels)
+            logger.info(f"Mirror cache warm-up: {created} of {len(labels)} label(s) mirrored in {time.time() - started:.1f}s")
+        except Exception as e:
+            logger.error(f"Error warming mirror cache: {e}")
+
+    with _mirror_cache_lock:
+        if _warm_up_thread is not None and _warm_up_thread.is_alive():
+            return
+        _warm_up_thread = threading.Thread(target=warm_up_task, name="MirrorCacheWarmUp", daemon=True)
+        _warm_up_thread.start()
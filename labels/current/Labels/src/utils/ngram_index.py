@@ -0,0 +1,141 @@
+"""
+N-gram substring index for label filename matching.
+This module provides an in-memory trigram index that answers "which keys
+contain this substring" without testing every key.
+"""
+
+# Length of the n-grams stored in the index
+GRAM_SIZE = 3
+
+def _grams(text):
+    """
+    Get the set of trigrams in a string.
+
+    Args:
+        text: String to split
+
+    Returns:
+        set: Trigrams contained in the string
+    """
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+class TrigramIndex:
+    """
+    In-memory trigram index mapping items to searchable keys.
+
+    Every key is split into its trigrams and each trigram keeps the set of
+    items whose key contains it. A substring query intersects the posting sets
+    of its own trigrams (smallest first) and then verifies the few remaining
+    candidates with a plain substring test, so results are identical to
+    "query in key" for every item.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._keys = {}
+        self._postings = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def items(self):
+        """
+        Get all indexed items.
+
+        Returns:
+            KeysView: Indexed items
+        """
+        return self._keys.keys()
+
+    def add(self, item, key):
+        """
+        Add an item to the index, replacing any previous key for it.
+
+        Args:
+            item: Item to return from searches (e.g. a filename)
+            key: Normalized key to search in
+        """
+        if item in self._keys:
+            self.remove(item)
+
+        self._keys[item] = key
+        for gram in _grams(key):
+            self._postings.setdefault(gram, set()).add(item)
+
+    def add_many(self, pairs):
+        """
+        Add many items at once (much faster than repeated add() on large sets).
+
+        Args:
+            pairs: Iterable of (item, key) tuples
+        """
+        new_postings = {}
+        for item, key in pairs:
+            if item in self._keys:
+                self.remove(item)
+            self._keys[item] = key
+            for gram in _grams(key):
+                posting = new_postings.get(gram)
+                if posting is None:
+                    new_postings[gram] = [item]
+                else:
+                    posting.append(item)
+
+        # Merge the collected lists into the posting sets
+        for gram, items in new_postings.items():
+            posting = self._postings.get(gram)
+            if posting is None:
+                self._postings[gram] = set(items)
+            else:
+                posting.update(items)
+
+    def remove(self, item):
+        """
+        Remove an item from the index.
+
+        Args:
+            item: Item to remove
+        """
+        key = self._keys.pop(item, None)
+        if key is None:
+            return
+
+        for gram in _grams(key):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(item)
+                if not posting:
+                    del self._postings[gram]
+
+    def search(self, query):
+        """
+        Find the items whose key contains the query.
+
+        Args:
+            query: Normalized substring to search for
+
+        Returns:
+            set: Matching items
+        """
+        # Queries shorter than a trigram can't use the postings
+        if len(query) < GRAM_SIZE:
+            return {item for item, key in self._keys.items() if query in key}
+
+        # Intersect the posting sets, smallest first
+        postings = []
+        for gram in _grams(query):
+            posting = self._postings.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return set()
+
+        # Trigrams can match out of order, verify with the real substring test
+        keys = self._keys
+        return {item for item in candidates if query in keys[item]}
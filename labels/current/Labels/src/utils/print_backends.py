@@ -0,0 +1,556 @@
+"""
+Print backends for the Label Maker application.
+This module submits label files to a printer programmatically and can report
+when the job has left the print queue, so printing no longer depends on a
+shell "print" verb and a simulated Enter key press.
+"""
+import os
+import sys
+import re
+import time
+import shutil
+import datetime
+import itertools
+import subprocess
+import threading
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+# Label files that already contain printer commands (ZPL/EPL) and are sent
+# to the printer unchanged instead of being rendered as an image
+RAW_EXTENSIONS = ('.zpl', '.epl', '.prn', '.raw')
+
+# Default number of seconds to wait for a job to leave the print queue
+DEFAULT_JOB_TIMEOUT = 30.0
+
+# Interval (in seconds) between print queue checks while waiting for a job
+JOB_POLL_INTERVAL = 0.2
+
+# Names accepted for the print_backend setting
+BACKEND_NAMES = ('auto', 'spooler', 'lp', 'file', 'shell')
+
+# Values accepted for the label_output setting
+LABEL_FORMATS = ('image', 'zpl', 'epl')
+
+# Subdirectory of a labels directory where the Label Maker writes the ZPL/EPL
+# command files for each label, named <UPC>.zpl and <UPC>.epl
+PRINTER_COMMANDS_DIR = 'printer_commands'
+
+# Label filenames end with _label_<12-digit UPC>
+LABEL_UPC_PATTERN = re.compile(r'_label_(\d{12})$')
+
+# ZPL command that prints the whole label mirrored
+ZPL_MIRROR_COMMAND = '^PMY'
+
+# Cached backend instance and the settings it was created for
+_backend = None
+_backend_config = None
+_backend_lock = threading.Lock()
+
+def is_raw_label_file(path):
+    """
+    Check whether a label file holds raw printer commands.
+
+    Args:
+        path: Path to the label file
+
+    Returns:
+        bool: True for ZPL/EPL/printer command files, False for images
+    """
+    return os.path.splitext(path)[1].lower() in RAW_EXTENSIONS
+
+def find_printer_command_file(label_path, label_format, mirror_print=False):
+    """
+    Find the printer command file the Label Maker wrote for a label image.
+
+    Args:
+        label_path: Path to the label image
+        label_format: "zpl" or "epl" ("image" never has a command file)
+        mirror_print: Whether the label has to be printed mirrored
+
+    Returns:
+        str: Path to the command file, or None if the image has to be printed instead
+    """
+    if label_format not in ('zpl', 'epl') or is_raw_label_file(label_path):
+        return None
+
+    # The command files are named after the UPC at the end of the label filename
+    match = LABEL_UPC_PATTERN.search(os.path.splitext(os.path.basename(label_path))[0])
+    if not match:
+        return None
+
+    command_path = os.path.join(os.path.dirname(label_path), PRINTER_COMMANDS_DIR, f"{match.group(1)}.{label_format}")
+    if not os.path.exists(command_path):
+        return None
+
+    if not mirror_print:
+        return command_path
+
+    # EPL has no command for mirroring the whole label, print the mirrored image instead
+    if label_format != 'zpl':
+        return None
+    return get_mirrored_zpl(command_path)
+
+def get_mirrored_zpl(command_path):
+    """
+    Get a mirrored copy of a ZPL command file, writing it next to the original if needed.
+
+    Args:
+        command_path: Path to a <UPC>.zpl file
+
+    Returns:
+        str: Path to the <UPC>.mirrored.zpl file, or None on error
+    """
+    mirrored_path = f"{os.path.splitext(command_path)[0]}.mirrored.zpl"
+    try:
+        # Reuse the mirrored copy unless the original was regenerated since
+        if os.path.exists(mirrored_path) and os.path.getmtime(mirrored_path) >= os.path.getmtime(command_path):
+            return mirrored_path
+
+        with open(command_path, 'r', encoding='utf-8') as f:
+            commands = f.read()
+
+        # ^PMY goes right after the start of every label format
+        commands = commands.replace('^XA', f'^XA\n{ZPL_MIRROR_COMMAND}')
+
+        temp_path = f"{mirrored_path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(commands)
+        os.replace(temp_path, mirrored_path)
+        return mirrored_path
+    except Exception as e:
+        logger.error(f"Error mirroring printer commands {command_path}: {str(e)}")
+        return None
+
+class PrintBackend:
+    """
+    Base class for print backends.
+
+    A backend submits a file with print_file() and returns a job id that can
+    be passed to wait_for_job() to block until the printer has taken the job.
+    """
+
+    # Name used in the print_backend setting
+    name = None
+
+    # True if the backend opens a print dialog that has to be confirmed by the user
+    requires_dialog_confirmation = False
+
+    # False if the backend can only print images (printer command files need a raw path to the printer)
+    supports_raw = True
+
+    # Preferred label output: "image", or "zpl"/"epl" to send the Label Maker's command files
+    label_format = 'image'
+
+    # Multi-page document format used for batches of label images ("tiff" or "pdf")
+    batch_image_format = 'tiff'
+
+    def __init__(self, printer_name=None):
+        """
+        Initialize the backend.
+
+        Args:
+            printer_name: Printer to use, or None for the system default printer
+        """
+        self.printer_name = printer_name or None
+
+    @classmethod
+    def is_available(cls):
+        """
+        Check whether the backend can be used on this system.
+
+        Returns:
+            bool: True if the backend is usable
+        """
+        return False
+
+    def print_file(self, path, title=None):
+        """
+        Submit a label file to the printer.
+
+        Args:
+            path: Path to the label file (image or raw printer commands)
+            title: Optional document name shown in the print queue
+
+        Returns:
+            tuple: (success, message, job_id)
+        """
+        raise NotImplementedError
+
+    def wait_for_job(self, job_id, timeout=DEFAULT_JOB_TIMEOUT):
+        """
+        Wait until a submitted job has left the print queue.
+
+        Args:
+            job_id: Job id returned by print_file
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            tuple: (success, message), success is None if the job was still
+                in the queue when the timeout ran out
+        """
+        return True, "Label sent to printer"
+
+    def describe(self):
+        """
+        Get a short description of the backend for status messages.
+
+        Returns:
+            str: Backend name, printer and label output
+        """
+        return f"{self.name} ({self.printer_name or 'default printer'}, {self.label_format})"
+
+class ShellPrintBackend(PrintBackend):
+    """
+    Legacy backend that prints through the Windows shell "print" verb.
+    The associated application shows a print dialog that must be confirmed.
+    """
+
+    name = 'shell'
+    requires_dialog_confirmation = True
+    supports_raw = False
+
+    @classmethod
+    def is_available(cls):
+        return hasattr(os, 'startfile')
+
+    def print_file(self, path, title=None):
+        try:
+            os.startfile(path, "print")
+            return True, "Label sent to printer", None
+        except Exception as e:
+            return False, f"Error printing label: {str(e)}", None
+
+class WindowsSpoolerBackend(PrintBackend):
+    """
+    Backend that writes jobs directly to the Windows print spooler.
+    Raw printer command files are spooled unchanged (RAW datatype); images are
+    drawn on the printer device context, scaled to the printable area.
+    """
+
+    name = 'spooler'
+
+    @classmethod
+    def is_available(cls):
+        if sys.platform != 'win32':
+            return False
+        try:
+            import win32print
+            return True
+        except ImportError:
+            return False
+
+    def _get_printer_name(self):
+        """
+        Get the printer to print to.
+
+        Returns:
+            str: Configured printer, or the system default printer
+        """
+        import win32print
+        return self.printer_name or win32print.GetDefaultPrinter()
+
+    def print_file(self, path, title=None):
+        try:
+            printer_name = self._get_printer_name()
+            title = title or os.path.basename(path)
+            if is_raw_label_file(path):
+                job_id = self._print_raw(printer_name, path, title)
+            else:
+                job_id = self._print_image(printer_name, path, title)
+            return True, f"Label sent to {printer_name}", job_id
+        except Exception as e:
+            logger.error(f"Error spooling {path}: {str(e)}")
+            return False, f"Error printing label: {str(e)}", None
+
+    def _print_raw(self, printer_name, path, title):
+        """
+        Spool a raw printer command file.
+
+        Args:
+            printer_name: Printer to print to
+            path: Path to the command file
+            title: Document name
+
+        Returns:
+            int: Spooler job id
+        """
+        import win32print
+
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        handle = win32print.OpenPrinter(printer_name)
+        try:
+            job_id = win32print.StartDocPrinter(handle, 1, (title, None, "RAW"))
+            try:
+                win32print.StartPagePrinter(handle)
+                win32print.WritePrinter(handle, data)
+                win32print.EndPagePrinter(handle)
+            finally:
+                win32print.EndDocPrinter(handle)
+        finally:
+            win32print.ClosePrinter(handle)
+        return job_id
+
+    def _print_image(self, printer_name, path, title):
+        """
+        Print an image through the printer device context.
+        Every frame of a multi-page image (a batch) is printed on its own page
+        of the same job.
+
+        Args:
+            printer_name: Printer to print to
+            path: Path to the image
+            title: Document name
+
+        Returns:
+            int: Spooler job id
+        """
+        import win32ui
+        import win32con
+        from PIL import Image, ImageWin, ImageSequence
+
+        hdc = win32ui.CreateDC()
+        hdc.CreatePrinterDC(printer_name)
+        try:
+            printable_width = hdc.GetDeviceCaps(win32con.HORZRES)
+            printable_height = hdc.GetDeviceCaps(win32con.VERTRES)
+
+            with Image.open(path) as document:
+                job_id = hdc.StartDoc(title)
+                try:
+                    for frame in ImageSequence.Iterator(document):
+                        image = frame if frame.mode in ('RGB', 'L', '1') else frame.convert('RGB')
+
+                        # Scale the label to the printable area, keeping its aspect ratio
+                        scale = min(printable_width / image.size[0], printable_height / image.size[1])
+                        width = int(image.size[0] * scale)
+                        height = int(image.size[1] * scale)
+
+                        hdc.StartPage()
+                        ImageWin.Dib(image).draw(hdc.GetHandleOutput(), (0, 0, width, height))
+                        hdc.EndPage()
+                finally:
+                    hdc.EndDoc()
+        finally:
+            hdc.DeleteDC()
+        return job_id
+
+    def wait_for_job(self, job_id, timeout=DEFAULT_JOB_TIMEOUT):
+        if not job_id:
+            return True, "Label sent to printer"
+
+        import win32print
+        import pywintypes
+
+        # Job states that mean the printer needs attention
+        failed_states = (
+            getattr(win32print, 'JOB_STATUS_ERROR', 0x2) |
+            getattr(win32print, 'JOB_STATUS_OFFLINE', 0x20) |
+            getattr(win32print, 'JOB_STATUS_PAPEROUT', 0x40) |
+            getattr(win32print, 'JOB_STATUS_BLOCKED_DEVQ', 0x200) |
+            getattr(win32print, 'JOB_STATUS_USER_INTERVENTION', 0x400)
+        )
+
+        printer_name = self._get_printer_name()
+        handle = win32print.OpenPrinter(printer_name)
+        try:
+            deadline = time.time() + timeout
+            while True:
+                try:
+                    job = win32print.GetJob(handle, job_id, 1)
+                except pywintypes.error:
+                    # The job is no longer in the queue, the printer has it
+                    return True, f"Label printed on {printer_name}"
+
+                if job['Status'] & failed_states:
+                    return False, f"Printer {printer_name} reported an error (status {job['Status']:#x})"
+                if time.time() >= deadline:
+                    return None, f"Timed out waiting for {printer_name}"
+                time.sleep(JOB_POLL_INTERVAL)
+        finally:
+            win32print.ClosePrinter(handle)
+
+class LpPrintBackend(PrintBackend):
+    """
+    Backend that submits jobs with the CUPS lp command.
+    Raw printer command files are sent with "-o raw" so CUPS doesn't filter them.
+    """
+
+    name = 'lp'
+
+    # CUPS prints every page of a PDF but only the first frame of a TIFF
+    batch_image_format = 'pdf'
+
+    # lp prints "request id is <printer>-<number> (1 file(s))"
+    REQUEST_ID_PATTERN = re.compile(r'request id is (\S+)')
+
+    @classmethod
+    def is_available(cls):
+        return shutil.which('lp') is not None
+
+    def print_file(self, path, title=None):
+        command = ['lp']
+        if self.printer_name:
+            command += ['-d', self.printer_name]
+        command += ['-t', title or os.path.basename(path)]
+        if is_raw_label_file(path):
+            command += ['-o', 'raw']
+        command.append(path)
+
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=DEFAULT_JOB_TIMEOUT)
+        except Exception as e:
+            return False, f"Error running lp: {str(e)}", None
+
+        if result.returncode != 0:
+            error = (result.stderr or result.stdout).strip()
+            return False, f"Error printing label: {error}", None
+
+        match = self.REQUEST_ID_PATTERN.search(result.stdout)
+        return True, "Label sent to printer", match.group(1) if match else None
+
+    def wait_for_job(self, job_id, timeout=DEFAULT_JOB_TIMEOUT):
+        if not job_id:
+            return True, "Label sent to printer"
+
+        deadline = time.time() + timeout
+        while True:
+            # lpstat -o only lists jobs that have not completed yet
+            try:
+                result = subprocess.run(['lpstat', '-o'], capture_output=True, text=True, timeout=5)
+                pending = result.stdout.split()
+            except Exception as e:
+                return False, f"Error checking print queue: {str(e)}"
+
+            if job_id not in pending:
+                return True, "Label printed"
+            if time.time() >= deadline:
+                return None, f"Timed out waiting for print job {job_id}"
+            time.sleep(JOB_POLL_INTERVAL)
+
+class FileSinkBackend(PrintBackend):
+    """
+    Backend that copies every job into a directory instead of printing it.
+    Used for testing the print path without a printer.
+    """
+
+    name = 'file'
+
+    def __init__(self, printer_name=None, directory=None, fallback=False):
+        """
+        Initialize the backend.
+
+        Args:
+            printer_name: Ignored, kept for a uniform constructor
+            directory: Directory to write jobs to (defaults to labelmaker_print_sink in the temp directory)
+            fallback: True if it was only chosen because no printing backend is available
+        """
+        super().__init__(printer_name)
+        self.directory = directory or os.path.join(os.environ.get('TEMP', os.getcwd()), 'labelmaker_print_sink')
+        self.fallback = fallback
+        self._counter = itertools.count(1)
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def print_file(self, path, title=None):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+
+            # Prefix the name so jobs keep their order and never overwrite each other
+            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            job_path = os.path.join(self.directory, f"{timestamp}_{next(self._counter):04d}_{os.path.basename(path)}")
+            shutil.copyfile(path, job_path)
+            if self.fallback:
+                # Nothing was printed, the operator has to know
+                return False, f"No printer is available, label saved to {job_path} instead", job_path
+            return True, f"Label written to {job_path}", job_path
+        except Exception as e:
+            return False, f"Error writing label to print sink: {str(e)}", None
+
+    def describe(self):
+        if self.fallback:
+            return f"{self.name} ({self.directory}, {self.label_format}, no printer available)"
+        return f"{self.name} ({self.directory}, {self.label_format})"
+
+# Backends tried, in order, when print_backend is "auto"
+AUTO_BACKENDS = (WindowsSpoolerBackend, LpPrintBackend, ShellPrintBackend)
+
+# Backend classes by setting name
+BACKENDS = {backend.name: backend for backend in (WindowsSpoolerBackend, LpPrintBackend, FileSinkBackend, ShellPrintBackend)}
+
+def create_print_backend(backend_name='auto', printer_name=None, sink_directory=None, label_format='image'):
+    """
+    Create a print backend.
+
+    Args:
+        backend_name: One of BACKEND_NAMES; "auto" picks the best available backend
+        printer_name: Printer to use, or None for the default printer
+        sink_directory: Output directory for the file backend
+        label_format: One of LABEL_FORMATS, ignored by backends that can only print images
+
+    Returns:
+        PrintBackend: The backend, falling back to the file backend if nothing else is
+            available (its jobs then report failure, since nothing is printed)
+    """
+    backend_class = BACKENDS.get(backend_name)
+    if backend_class is not None and not backend_class.is_available():
+        logger.warning(f"Print backend '{backend_name}' is not available, choosing automatically")
+        backend_class = None
+
+    fallback = False
+    if backend_class is None:
+        backend_class = next((backend for backend in AUTO_BACKENDS if backend.is_available()), None)
+        if backend_class is None:
+            logger.warning("No print backend is available, labels will only be saved to the print sink directory")
+            backend_class = FileSinkBackend
+            fallback = True
+
+    if backend_class is FileSinkBackend:
+        backend = FileSinkBackend(printer_name, sink_directory, fallback)
+    else:
+        backend = backend_class(printer_name)
+
+    if label_format in LABEL_FORMATS and backend.supports_raw:
+        backend.label_format = label_format
+    return backend
+
+def get_print_backend(settings=None):
+    """
+    Get the print backend configured in the application settings.
+    The backend is created once and reused until the settings change.
+
+    Args:
+        settings: Application settings, or None for the backend configured last
+            (the default backend if none was configured yet)
+
+    Returns:
+        PrintBackend: Configured print backend
+    """
+    global _backend, _backend_config
+
+    config = (
+        getattr(settings, 'print_backend', 'auto') or 'auto',
+        getattr(settings, 'printer_name', None) or None,
+        getattr(settings, 'print_sink_directory', None) or None,
+        getattr(settings, 'label_output', 'image') or 'image'
+    )
+
+    with _backend_lock:
+        # Callers without settings (helpers, the batch printer) use whatever was configured last
+        if settings is None and _backend is not None:
+            return _backend
+        if _backend is None or config != _backend_config:
+            _backend = create_print_backend(*config)
+            _backend_config = config
+            logger.info(f"Using print backend: {_backend.describe()}")
+        return _backend
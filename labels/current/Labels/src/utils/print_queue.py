@@ -0,0 +1,282 @@
+"""
+Background print queue for the Label Maker application.
+This module prints labels and runs the follow-up logging on a worker thread,
+so the operator can scan the next return while the previous label prints.
+"""
+import os
+import sys
+import queue
+import datetime
+import itertools
+import threading
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.barcode_operations import print_barcode
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+# Print job states
+JOB_QUEUED = 'queued'
+JOB_SENT = 'sent'
+JOB_FAILED = 'failed'
+# Sent, but the printer didn't confirm it before the wait timed out
+JOB_UNCONFIRMED = 'unconfirmed'
+
+# Number of seconds to wait for queued jobs when the application closes
+STOP_TIMEOUT = 5.0
+
+# Global print queue instance
+_print_queue = None
+_print_queue_lock = threading.Lock()
+
+# Job ids are unique for the whole session
+_job_ids = itertools.count(1)
+
+class PrintJob:
+    """A label waiting to be printed, and what happened to it."""
+
+    def __init__(self, label_path, tracking_number='', sku='', mirror_print=False, backend=None, after_print_callback=None):
+        """
+        Initialize a print job.
+
+        Args:
+            label_path: Path to the label file to print
+            tracking_number: Tracking number the label was scanned for
+            sku: SKU the label was scanned for
+            mirror_print: Whether to print a mirrored copy of the label
+            backend: Print backend to use (defaults to the automatically chosen backend)
+            after_print_callback: Optional function called with the job on the worker
+                thread after the label was printed or left unconfirmed (logging, Google Sheets)
+        """
+        self.job_id = next(_job_ids)
+        self.label_path = label_path
+        self.tracking_number = tracking_number
+        self.sku = sku
+        self.mirror_print = mirror_print
+        self.backend = backend
+        self.after_print_callback = after_print_callback
+        self.state = JOB_QUEUED
+        self.message = "Waiting to print"
+        self.created_at = datetime.datetime.now()
+        self.finished_at = None
+
+    def describe(self):
+        """
+        Get a short description of the job for lists and status messages.
+
+        Returns:
+            str: SKU (or tracking number) and label filename
+        """
+        return f"{self.sku or self.tracking_number} ({os.path.basename(self.label_path)})"
+
+class PrintQueue:
+    """
+    First-in first-out queue of print jobs served by one worker thread.
+
+    Jobs are printed in the order they were submitted. Listeners are called
+    from the worker thread every time a job changes state, so UI listeners
+    must hand the update over to the Tk thread (e.g. with widget.after).
+    """
+
+    def __init__(self, wait_for_completion=True):
+        """
+        Initialize the print queue.
+
+        Args:
+            wait_for_completion: Wait for each job to leave the printer queue
+                before reporting it as sent and starting the next one
+        """
+        self.wait_for_completion = wait_for_completion
+        self._queue = queue.Queue()
+        self._listeners = []
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def start(self):
+        """Start the worker thread if it isn't running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="PrintQueue", daemon=True)
+                self._thread.start()
+
+    def submit(self, job):
+        """
+        Add a job to the end of the queue.
+
+        Args:
+            job: PrintJob to print
+
+        Returns:
+            int: Number of jobs waiting, including this one
+        """
+        with self._lock:
+            self._pending += 1
+            pending = self._pending
+        job.state = JOB_QUEUED
+        job.message = "Waiting to print"
+        job.finished_at = None
+        self.start()
+        self._queue.put(job)
+        self._notify(job)
+        return pending
+
+    def retry(self, job):
+        """
+        Queue a failed job again.
+        Unconfirmed jobs are not retried, the printer may still print them.
+
+        Args:
+            job: PrintJob that failed
+
+        Returns:
+            int: Number of jobs waiting, including this one
+        """
+        if job.state == JOB_UNCONFIRMED:
+            raise ValueError(f"Print job {job.job_id} may still print and can't be retried")
+        logger.info(f"Retrying print job {job.job_id}: {job.describe()}")
+        return self.submit(job)
+
+    def pending_count(self):
+        """
+        Get the number of jobs that have not finished yet.
+
+        Returns:
+            int: Queued jobs, including the one being printed
+        """
+        with self._lock:
+            return self._pending
+
+    def add_listener(self, listener):
+        """
+        Register a function called with the job whenever a job changes state.
+
+        Args:
+            listener: Function taking a PrintJob
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Unregister a listener added with add_listener.
+
+        Args:
+            listener: Previously registered function
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, job):
+        """
+        Call every listener with a job.
+
+        Args:
+            job: PrintJob that changed state
+        """
+        for listener in list(self._listeners):
+            try:
+                listener(job)
+            except Exception as e:
+                logger.error(f"Error in print queue listener: {str(e)}")
+
+    def _run(self):
+        """Worker thread loop: print jobs until a stop marker is queued."""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            try:
+                self._process(job)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                self._notify(job)
+
+    def _process(self, job):
+        """
+        Print a job and run its follow-up callback.
+
+        Args:
+            job: PrintJob to print
+        """
+        try:
+            success, message = print_barcode(
+                job.label_path,
+                job.mirror_print,
+                None,
+                job.backend,
+                wait_for_completion=self.wait_for_completion
+            )
+        except Exception as e:
+            success, message = False, f"Error printing label: {str(e)}"
+
+        job.finished_at = datetime.datetime.now()
+        if success is None:
+            # The printer still has the job, so the scan is recorded but the
+            # operator has to check the printer instead of printing it again
+            job.state = JOB_UNCONFIRMED
+            job.message = message
+            logger.warning(f"Print job {job.job_id} unconfirmed ({job.describe()}): {message}")
+        elif not success:
+            job.state = JOB_FAILED
+            job.message = message
+            logger.error(f"Print job {job.job_id} failed ({job.describe()}): {message}")
+            return
+        else:
+            job.state = JOB_SENT
+            job.message = message
+            logger.info(f"Print job {job.job_id} sent: {job.describe()}")
+
+        # The label was sent, a failure in the follow-up work doesn't change that
+        if job.after_print_callback:
+            try:
+                job.after_print_callback(job)
+            except Exception as e:
+                logger.error(f"Error after printing job {job.job_id}: {str(e)}")
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """
+        Stop the worker thread after the jobs already queued.
+
+        Args:
+            timeout: Maximum number of seconds to wait for the queue to drain
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(f"Print queue stopped with {self.pending_count()} job(s) still waiting")
+
+def get_print_queue():
+    """
+    Get the application print queue, starting its worker thread if needed.
+
+    Returns:
+        PrintQueue: Shared print queue
+    """
+    global _print_queue
+
+    with _print_queue_lock:
+        if _print_queue is None:
+            _print_queue = PrintQueue()
+        _print_queue.start()
+        return _print_queue
+
+def stop_print_queue():
+    """Stop the application print queue, if it was started."""
+    global _print_queue
+
+    with _print_queue_lock:
+        print_queue = _print_queue
+        _print_queue = None
+    if print_queue is not None:
+        print_queue.stop()
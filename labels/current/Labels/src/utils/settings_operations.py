@@ -8,6 +8,7 @@ from tkinter import ttk, filedialog, messagebox
 from src.config.config_manager import ConfigManager
 from src.utils.ui_utils import center_window, create_button, make_window_modal
 from src.ui.log_migration_dialog import show_log_migration_dialog
+from src.utils.print_backends import BACKEND_NAMES, LABEL_FORMATS
 
 def create_settings_dialog(parent, config_manager, update_label_count_callback, open_sheets_dialog_callback, save_settings_callback):
     """
@@ -135,6 +136,125 @@ def create_settings_dialog(parent, config_manager, update_label_count_callback,
     # Update label count
     update_label_count_callback(directory_var.get())
     
+    # Additional Label Directories Section
+    extra_dirs_section = tk.LabelFrame(content_frame, text="Additional Label Directories", font=("Arial", 12, "bold"), bg='white', padx=10, pady=10)
+    extra_dirs_section.pack(fill='x', pady=(0, 15))
+    
+    tk.Label(
+        extra_dirs_section,
+        text="Labels are also looked up in these folders (e.g. other product line shares).",
+        font=("Arial", 8, "italic"),
+        fg='gray',
+        bg='white'
+    ).pack(anchor='w', pady=(0, 5))
+    
+    # List of additional directories
+    extra_dirs_listbox = tk.Listbox(extra_dirs_section, font=("Arial", 10), height=4)
+    extra_dirs_listbox.pack(fill='x', pady=(0, 5))
+    for extra_dir in getattr(config_manager.settings, 'label_directories', []) or []:
+        extra_dirs_listbox.insert(tk.END, extra_dir)
+    
+    def add_extra_directory():
+        directory = filedialog.askdirectory(
+            initialdir=directory_var.get() or os.path.expanduser("~"),
+            title="Select Additional Labels Directory"
+        )
+        if directory and directory not in extra_dirs_listbox.get(0, tk.END):
+            extra_dirs_listbox.insert(tk.END, directory)
+    
+    def remove_extra_directory():
+        for index in reversed(extra_dirs_listbox.curselection()):
+            extra_dirs_listbox.delete(index)
+    
+    extra_dirs_buttons = tk.Frame(extra_dirs_section, bg='white')
+    extra_dirs_buttons.pack(fill='x')
+    
+    create_button(
+        extra_dirs_buttons,
+        text="Remove",
+        command=remove_extra_directory,
+        bg='#F44336',
+        padx=10,
+        pady=5
+    ).pack(side='right')
+    
+    create_button(
+        extra_dirs_buttons,
+        text="Add",
+        command=add_extra_directory,
+        bg='#2196F3',
+        padx=10,
+        pady=5
+    ).pack(side='right', padx=(0, 10))
+    
+    # Printing Section
+    printing_section = tk.LabelFrame(content_frame, text="Printing", font=("Arial", 12, "bold"), bg='white', padx=10, pady=10)
+    printing_section.pack(fill='x', pady=(0, 15))
+    
+    # Print backend selection
+    backend_frame = tk.Frame(printing_section, bg='white')
+    backend_frame.pack(fill='x', pady=(0, 5))
+    
+    tk.Label(
+        backend_frame,
+        text="Print method:",
+        font=("Arial", 10),
+        bg='white'
+    ).pack(side='left')
+    
+    print_backend_var = tk.StringVar(value=getattr(config_manager.settings, 'print_backend', 'auto') or 'auto')
+    ttk.Combobox(
+        backend_frame,
+        textvariable=print_backend_var,
+        values=BACKEND_NAMES,
+        state='readonly',
+        width=10
+    ).pack(side='left', padx=(10, 0))
+    
+    # Printer name
+    printer_frame = tk.Frame(printing_section, bg='white')
+    printer_frame.pack(fill='x', pady=(0, 5))
+    
+    tk.Label(
+        printer_frame,
+        text="Printer:",
+        font=("Arial", 10),
+        bg='white'
+    ).pack(side='left')
+    
+    printer_name_var = tk.StringVar(value=getattr(config_manager.settings, 'printer_name', None) or "")
+    tk.Entry(printer_frame, textvariable=printer_name_var, font=("Arial", 10), width=30).pack(side='left', padx=(10, 0))
+    
+    # Label output (image or native thermal printer commands)
+    label_output_frame = tk.Frame(printing_section, bg='white')
+    label_output_frame.pack(fill='x', pady=(0, 5))
+    
+    tk.Label(
+        label_output_frame,
+        text="Label format:",
+        font=("Arial", 10),
+        bg='white'
+    ).pack(side='left')
+    
+    label_output_var = tk.StringVar(value=getattr(config_manager.settings, 'label_output', 'image') or 'image')
+    ttk.Combobox(
+        label_output_frame,
+        textvariable=label_output_var,
+        values=LABEL_FORMATS,
+        state='readonly',
+        width=10
+    ).pack(side='left', padx=(10, 0))
+    
+    # Helper text
+    tk.Label(
+        printing_section,
+        text="(auto = print spooler or lp, file = save jobs to a folder, shell = legacy print dialog;\n leave Printer empty for the default printer;\n zpl/epl = send the Label Maker's printer command files to a thermal printer)",
+        font=("Arial", 8, "italic"),
+        fg='gray',
+        bg='white',
+        justify='left'
+    ).pack(anchor='w', pady=(0, 5))
+    
     # Transparency Settings Section
     transparency_section = tk.LabelFrame(content_frame, text="Transparency Settings", font=("Arial", 12, "bold"), bg='white', padx=10, pady=10)
     transparency_section.pack(fill='x', pady=(0, 15))
@@ -325,7 +445,11 @@ def create_settings_dialog(parent, config_manager, update_label_count_callback,
             settings_dialog, 
             directory_var.get(),
             transparency_enabled_var.get(),
-            float(transparency_level_var.get()) / 10.0  # Convert from 1-10 to 0.1-1.0
+            float(transparency_level_var.get()) / 10.0,  # Convert from 1-10 to 0.1-1.0
+            list(extra_dirs_listbox.get(0, tk.END)),
+            print_backend_var.get(),
+            printer_name_var.get().strip(),
+            label_output_var.get()
         ),
         bg='#4CAF50',
         padx=15,
@@ -0,0 +1,320 @@
+"""
+Google Sheets reconciliation for the Label Maker application.
+This module finds scans that are in the shipping logs but never reached the
+Google Sheet (because it was misconfigured or offline) and writes them at the
+end of the sheet. The sheet's tracking and SKU columns are read with one range
+request and matched against the logs in memory.
+
+Run it from the project root while the application is closed:
+
+    python -m src.utils.sheet_reconcile --start 2026-09-01 --end 2026-09-30
+    python -m src.utils.sheet_reconcile --start 2026-09-01 --end 2026-09-30 --push
+"""
+import os
+import sys
+import argparse
+import datetime
+from collections import Counter
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.log_manager import get_sheet_scans
+from src.utils.sheets_utils import get_sheets_session, validate_sheet_url
+from src.utils.sheets_operations import write_rows_to_google_sheet
+from src.utils.sheets_outbox import SheetsOutbox, get_outbox_db_path
+from src.utils.sheets_scheduler import get_sheets_scheduler, sheets_read, PRIORITY_BACKFILL
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+# First sheet row holding scans (the row "Reset Rows to Default" goes back to)
+DEFAULT_FIRST_ROW = 3
+
+# Number of missing rows written to the sheet per batch update
+PUSH_CHUNK_SIZE = 500
+
+# Days checked when no start date is given
+DEFAULT_DAYS = 30
+
+# Missing rows listed in a report before it is shortened
+REPORT_ROW_LIMIT = 20
+
+class ReconcileReport:
+    """Result of comparing the shipping logs with the Google Sheet."""
+
+    def __init__(self, start_date, end_date):
+        """
+        Initialize an empty report.
+
+        Args:
+            start_date: First day compared (YYYY-MM-DD), or None
+            end_date: Last day compared (YYYY-MM-DD), or None
+        """
+        self.start_date = start_date
+        self.end_date = end_date
+        self.sheet_rows = 0
+        self.log_scans = 0
+        self.matched = 0
+        self.pending = 0
+        self.missing = []
+        self.pushed = 0
+
+    def summary(self, row_limit=REPORT_ROW_LIMIT):
+        """
+        Get a readable description of the differences.
+
+        Args:
+            row_limit: Maximum number of missing rows to list
+
+        Returns:
+            str: Multi-line report
+        """
+        period = f"{self.start_date or 'the beginning'} to {self.end_date or 'today'}"
+        lines = [
+            f"Scans logged from {period}: {self.log_scans}",
+            f"Rows on the sheet: {self.sheet_rows}",
+            f"Already on the sheet: {self.matched}",
+            f"Waiting to be sent: {self.pending}",
+            f"Missing from the sheet: {len(self.missing)}"
+        ]
+        for scan in self.missing[:row_limit]:
+            lines.append(f"  {scan['timestamp']}  {scan['tracking_number']}  {scan['sku'] or ''}")
+        if len(self.missing) > row_limit:
+            lines.append(f"  ... and {len(self.missing) - row_limit} more")
+        if self.pushed:
+            lines.append(f"Written to the sheet: {self.pushed}")
+        return "\n".join(lines)
+
+def _column_index(column):
+    """
+    Convert a column letter to a zero-based index.
+
+    Args:
+        column: Column letters (e.g. "D" or "AB")
+
+    Returns:
+        int: Zero-based column index
+    """
+    index = 0
+    for letter in column.upper():
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+def _scan_key(tracking_number, sku):
+    """
+    Get the key a scan is matched on.
+
+    Args:
+        tracking_number: Tracking number
+        sku: SKU
+
+    Returns:
+        tuple: Normalized (tracking number, SKU)
+    """
+    return (str(tracking_number or '').strip(), str(sku or '').strip())
+
+def read_sheet_keys(config_manager, first_row=DEFAULT_FIRST_ROW):
+    """
+    Read the tracking numbers and SKUs already on the sheet in one range request.
+
+    Args:
+        config_manager: The application's configuration manager
+        first_row: First row holding scans
+
+    Returns:
+        Counter: Number of sheet rows per (tracking number, SKU)
+
+    Raises:
+        ValueError: If the sheet settings are incomplete
+    """
+    settings = config_manager.settings
+    is_valid, result = validate_sheet_url(settings.google_sheet_url)
+    if not is_valid:
+        raise ValueError(result)
+    if not settings.google_sheet_name or not settings.google_sheet_tracking_column:
+        raise ValueError("Google Sheets not configured")
+
+    tracking_col = settings.google_sheet_tracking_column
+    sku_col = settings.google_sheet_sku_column or tracking_col
+    tracking_index = _column_index(tracking_col)
+    sku_index = _column_index(sku_col)
+    left = min(tracking_index, sku_index)
+    left_col, right_col = sorted((tracking_col, sku_col), key=_column_index)
+
+    # One request for both columns, from the first scan row to the end of the sheet
+    sheet_name = settings.google_sheet_name.replace("'", "''")
+    spreadsheet = get_sheets_session().get_spreadsheet(result, PRIORITY_BACKFILL)
+    response = sheets_read(
+        spreadsheet.values_get, f"'{sheet_name}'!{left_col}{first_row}:{right_col}", priority=PRIORITY_BACKFILL
+    )
+
+    keys = Counter()
+    for values in response.get('values', []):
+        tracking_number = values[tracking_index - left] if len(values) > tracking_index - left else ''
+        sku = values[sku_index - left] if settings.google_sheet_sku_column and len(values) > sku_index - left else ''
+        if str(tracking_number).strip():
+            keys[_scan_key(tracking_number, sku)] += 1
+    return keys
+
+def get_pending_keys():
+    """
+    Get the scans queued in the Google Sheets outbox but not sent yet.
+
+    Returns:
+        Counter: Number of queued rows per (tracking number, SKU)
+    """
+    keys = Counter()
+    if not os.path.exists(get_outbox_db_path()):
+        return keys
+
+    outbox = SheetsOutbox()
+    try:
+        for row in outbox.peek(outbox.pending_count()):
+            keys[_scan_key(row['tracking_number'], row['sku'])] += 1
+    finally:
+        outbox.close()
+    return keys
+
+def find_missing_rows(scans, sheet_keys, pending_keys=None, use_sku=True):
+    """
+    Match logged scans against the sheet rows.
+
+    Every sheet (or queued) row accounts for one scan with the same tracking
+    number and SKU, so a package scanned twice needs two rows.
+
+    Args:
+        scans: Logged scans, oldest first
+        sheet_keys: Counter of rows on the sheet
+        pending_keys: Optional Counter of rows queued in the outbox
+        use_sku: Match on the SKU as well as the tracking number
+
+    Returns:
+        tuple: (matched count, pending count, list of missing scans)
+    """
+    available = Counter(sheet_keys)
+    pending = Counter()
+    for (tracking_number, sku), count in (pending_keys or {}).items():
+        pending[(tracking_number, sku if use_sku else '')] += count
+    matched = 0
+    queued = 0
+    missing = []
+    for scan in scans:
+        key = _scan_key(scan['tracking_number'], scan['sku'] if use_sku else '')
+        if available[key] > 0:
+            available[key] -= 1
+            matched += 1
+        elif pending[key] > 0:
+            pending[key] -= 1
+            queued += 1
+        else:
+            missing.append(scan)
+    return matched, queued, missing
+
+def push_missing_rows(config_manager, rows, status_callback=None):
+    """
+    Write missing scans at the end of the sheet in chunked batch updates.
+
+    Args:
+        config_manager: The application's configuration manager
+        rows: Scans to write, oldest first
+        status_callback: Optional callback function to update status messages
+
+    Returns:
+        tuple: (number of rows written, error message or None)
+    """
+    written = 0
+    for start in range(0, len(rows), PUSH_CHUNK_SIZE):
+        chunk = rows[start:start + PUSH_CHUNK_SIZE]
+
+        # Backfilled rows keep the date they were scanned on
+        success, message = write_rows_to_google_sheet(
+            config_manager, chunk, status_callback, use_sheet_date=False, priority=PRIORITY_BACKFILL
+        )
+        if not success:
+            return written, message
+        written += len(chunk)
+    return written, None
+
+def reconcile_sheet(config_manager, start_date=None, end_date=None, push=False,
+                    first_row=DEFAULT_FIRST_ROW, status_callback=None):
+    """
+    Compare the shipping logs with the Google Sheet and optionally write the missing rows.
+
+    Args:
+        config_manager: The application's configuration manager
+        start_date: First day to check (YYYY-MM-DD), defaults to DEFAULT_DAYS ago
+        end_date: Last day to check (YYYY-MM-DD), defaults to today
+        push: Write the missing rows to the sheet (False only reports them)
+        first_row: First sheet row holding scans
+        status_callback: Optional callback function to update status messages
+
+    Returns:
+        tuple: (success, ReconcileReport or error message)
+    """
+    if start_date is None:
+        start_date = (datetime.date.today() - datetime.timedelta(days=DEFAULT_DAYS)).strftime('%Y-%m-%d')
+
+    report = ReconcileReport(start_date, end_date)
+
+    # Apply the per-minute budgets from the settings
+    get_sheets_scheduler(config_manager.settings)
+
+    try:
+        # Read both sides first, the join itself happens in memory
+        scans = get_sheet_scans(start_date, end_date)
+        sheet_keys = read_sheet_keys(config_manager, first_row)
+        pending_keys = get_pending_keys()
+    except Exception as e:
+        logger.error(f"Error reading data for sheet reconciliation: {str(e)}")
+        return False, f"Error reading data: {str(e)}"
+
+    report.log_scans = len(scans)
+    report.sheet_rows = sum(sheet_keys.values())
+    report.matched, report.pending, report.missing = find_missing_rows(
+        scans, sheet_keys, pending_keys, use_sku=bool(config_manager.settings.google_sheet_sku_column)
+    )
+    logger.info(f"Sheet reconciliation {start_date} to {end_date or 'today'}: "
+                f"{report.matched} matched, {report.pending} queued, {len(report.missing)} missing")
+
+    if push and report.missing:
+        report.pushed, error = push_missing_rows(config_manager, report.missing, status_callback)
+        if error:
+            logger.error(f"Sheet reconciliation stopped after {report.pushed} row(s): {error}")
+            return False, f"Wrote {report.pushed} of {len(report.missing)} missing row(s), then failed: {error}"
+
+    return True, report
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Args:
+        argv: Optional argument list (defaults to sys.argv)
+
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(description="Find scans missing from the Google Sheet and optionally write them.")
+    parser.add_argument('--start', help="first day to check (YYYY-MM-DD), defaults to 30 days ago")
+    parser.add_argument('--end', help="last day to check (YYYY-MM-DD), defaults to today")
+    parser.add_argument('--first-row', type=int, default=DEFAULT_FIRST_ROW, help="first sheet row holding scans")
+    parser.add_argument('--push', action='store_true', help="write the missing rows (default is a dry run)")
+    parser.add_argument('--all', action='store_true', help="list every missing row in the report")
+    args = parser.parse_args(argv)
+
+    from src.config.config_manager import ConfigManager
+
+    success, result = reconcile_sheet(ConfigManager(), args.start, args.end, args.push, args.first_row)
+    if not success:
+        print(result)
+        return 1
+
+    print(result.summary(row_limit=len(result.missing) if args.all else REPORT_ROW_LIMIT))
+    if result.missing and not args.push:
+        print("\nDry run, nothing was written. Run again with --push to write the missing rows.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,11 @@ Utility functions for Google Sheets operations specific to the Label Maker appli
 
 import os
 import re
+import datetime
+import threading
 from src.utils.file_utils import file_exists, get_credentials_file_path
-from src.utils.sheets_utils import get_authorized_client, validate_sheet_url
+from src.utils.sheets_utils import get_authorized_client, get_sheets_session, invalidate_sheets_session, validate_sheet_url
+from src.utils.sheets_scheduler import get_sheets_scheduler, sheets_write, PRIORITY_SCAN, PRIORITY_UI
 
 def write_to_google_sheet(config_manager, tracking_number, sku, status_callback=None):
     """
@@ -20,12 +23,140 @@ def write_to_google_sheet(config_manager, tracking_number, sku, status_callback=
     Returns:
         tuple: (success, message)
     """
+    timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return write_rows_to_google_sheet(
+        config_manager,
+        [{'timestamp': timestamp, 'tracking_number': tracking_number, 'sku': sku}],
+        status_callback
+    )
+
+# Sheet holding the shift date in Q1
+STEPS_SHEET_NAME = "Steps❗️"
+
+# Range of the shift date, read without listing the worksheets first
+STEPS_DATE_RANGE = f"'{STEPS_SHEET_NAME}'!Q1"
+
+# Default number of seconds the shift date is reused between reads
+DEFAULT_STEPS_DATE_TTL = 600
+
+# Writes move the shared row counters, so only one runs at a time
+_write_lock = threading.Lock()
+
+def _date_from_values(values):
+    """
+    Get the shift date from the values read from Steps❗️!Q1.
+    
+    Args:
+        values: Rows of values returned for the range
+        
+    Returns:
+        str: The date, or None if Q1 is empty or holds the zero date
+    """
+    date_cell = values[0][0] if values and values[0] else None
+    if date_cell and date_cell != "12/30/1899":
+        return date_cell
+    return None
+
+def _get_steps_date(sheet_id, max_age=0, status_callback=None, priority=PRIORITY_SCAN):
+    """
+    Get the date from cell Q1 of the Steps sheet.
+    The date changes at most once per shift, so a recent read is reused.
+    
+    Args:
+        sheet_id: Google Sheet ID of the spreadsheet holding the Steps sheet
+        max_age: Seconds an earlier read stays valid (0 always reads the sheet)
+        status_callback: Optional callback function to update status messages
+        priority: Scheduler priority of the read
+        
+    Returns:
+        str: Date from the sheet, or None if it isn't set
+    """
+    try:
+        # Read Q1 by A1 range, a missing Steps❗️ sheet shows up as an error
+        date_cell = _date_from_values(get_sheets_session().get_values(sheet_id, STEPS_DATE_RANGE, max_age, priority))
+        if date_cell:
+            if status_callback:
+                status_callback(f"Found date in {STEPS_SHEET_NAME}!Q1: {date_cell}", 'green')
+            return date_cell
+    except Exception as e:
+        if status_callback:
+            status_callback(f"Error accessing {STEPS_SHEET_NAME} sheet: {str(e)}", 'orange')
+    return None
+
+def refresh_steps_date(config_manager):
+    """
+    Read the date from Steps❗️!Q1 again instead of waiting for the cached one to expire.
+    
+    Args:
+        config_manager: The application's configuration manager
+        
+    Returns:
+        tuple: (success, date or message)
+    """
+    is_valid, result = validate_sheet_url(config_manager.settings.google_sheet_url)
+    if not is_valid:
+        return False, result
+    
+    try:
+        session = get_sheets_session()
+        session.forget_values(result, STEPS_DATE_RANGE)
+        values = session.get_values(result, STEPS_DATE_RANGE, priority=PRIORITY_UI)
+    except Exception as e:
+        return False, f"Error reading {STEPS_SHEET_NAME}!Q1: {str(e)}"
+    
+    return True, _date_from_values(values)
+
+def _get_steps_value(row, date_from_sheet):
+    """
+    Build the Steps value for a scan: the sheet date (or the scan date) and the scan time.
+    
+    Args:
+        row: Scan row with a 'timestamp' (YYYY-MM-DD HH:MM:SS)
+        date_from_sheet: Date from Steps❗️!Q1, or None
+        
+    Returns:
+        str: Steps value (MM/DD/YYYY HH:MM:SS)
+    """
+    try:
+        scanned_at = datetime.datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S')
+    except (KeyError, TypeError, ValueError):
+        scanned_at = datetime.datetime.now()
+    
+    date_only = date_from_sheet or scanned_at.strftime("%m/%d/%Y")
+    return f"{date_only} {scanned_at.strftime('%H:%M:%S')}"
+
+def write_rows_to_google_sheet(config_manager, rows, status_callback=None, use_sheet_date=True, priority=PRIORITY_SCAN):
+    """
+    Write queued scans to Google Sheets in one batch update.
+    The configured row numbers only advance after the update succeeded.
+    
+    Args:
+        config_manager: The application's configuration manager
+        rows: Scans in order, as dictionaries with timestamp, tracking_number and sku
+        status_callback: Optional callback function to update status messages
+        use_sheet_date: Use the shift date from Steps❗️!Q1 (False keeps each scan's own date)
+        priority: Scheduler priority of the Sheets requests
+        
+    Returns:
+        tuple: (success, message)
+    """
+    with _write_lock:
+        return _write_rows(config_manager, rows, status_callback, use_sheet_date, priority)
+
+def _write_rows(config_manager, rows, status_callback, use_sheet_date, priority):
+    """Write rows to the sheet; see write_rows_to_google_sheet."""
     if not (config_manager.settings.google_sheet_url and 
             config_manager.settings.google_sheet_name):
         if status_callback:
             status_callback("Google Sheets not configured", 'red')
         return False, "Google Sheets not configured"
     
+    if not rows:
+        return True, "Nothing to write"
+    
+    # Apply the per-minute budgets from the settings
+    get_sheets_scheduler(config_manager.settings)
+    
     try:
         # Check for credentials file
         creds_file = get_credentials_file_path()
@@ -50,13 +181,8 @@ def write_to_google_sheet(config_manager, tracking_number, sku, status_callback=
                 status_callback(f"Failed to authorize Google Sheets client: {client_result}", 'red')
             return False, f"Failed to authorize Google Sheets client: {client_result}"
         
-        client = client_result
-        
-        # Open the spreadsheet
-        spreadsheet = client.open_by_key(sheet_id)
-        
-        # Get the worksheet
-        worksheet = spreadsheet.worksheet(config_manager.settings.google_sheet_name)
+        # Get the worksheet (opened once and reused for later scans)
+        worksheet = get_sheets_session().get_worksheet(sheet_id, config_manager.settings.google_sheet_name, priority)
         
         # Get the configured row and column
         tracking_col = config_manager.settings.google_sheet_tracking_column
@@ -66,117 +192,56 @@ def write_to_google_sheet(config_manager, tracking_number, sku, status_callback=
         steps_col = config_manager.settings.google_sheet_steps_column
         steps_row = config_manager.settings.google_sheet_steps_row
         
-        # Get the current date and time from Python
-        import datetime
-        now = datetime.datetime.now()
-        
-        # Try to detect the format of the target column by checking existing values
-        try:
-            # Check if there's any existing data in the column to determine format
-            existing_format = "time"  # Default to time-only format
-            
-            # Try to get a sample value from the column (a few rows above current position)
-            if steps_row > 3:  # Only check if we're not at the beginning
-                sample_row = max(1, steps_row - 2)  # Look 2 rows above or at row 1
-                sample_value = worksheet.acell(f"{steps_col}{sample_row}").value
-                
-                if sample_value and len(sample_value) > 0:
-                    # If sample has date (contains /) and time, use full format
-                    if "/" in sample_value and ":" in sample_value:
-                        existing_format = "datetime"
-                    # If sample only has time (no /), use time-only format
-                    elif ":" in sample_value and "/" not in sample_value:
-                        existing_format = "time"
-        except Exception:
-            # If any error occurs during format detection, use the default format
-            existing_format = "time"
-        
-        # Get the date and time from cells Q1 and R1 in the Steps sheet
-        try:
-            # Try to get date from Q1 and time from R1
-            date_from_sheet = None
-            time_from_sheet = None
-            
-            try:
-                # Get the Steps❗️ sheet specifically
-                steps_sheet = None
-                for sheet in worksheet.spreadsheet.worksheets():
-                    if sheet.title == "Steps❗️":
-                        steps_sheet = sheet
-                        break
-                
-                if steps_sheet:
-                    # Get the date from Q1 on the Steps❗️ sheet
-                    date_cell = steps_sheet.acell("Q1").value
-                    if date_cell and date_cell != "12/30/1899":
-                        date_from_sheet = date_cell
-                        if status_callback:
-                            status_callback(f"Found date in Steps❗️!Q1: {date_from_sheet}", 'green')
-                    
-                    # Get the time from R1 on the Steps❗️ sheet
-                    time_cell = steps_sheet.acell("R1").value
-                    if time_cell:
-                        time_from_sheet = time_cell
-                        if status_callback:
-                            status_callback(f"Found time in Steps❗️!R1: {time_from_sheet}", 'green')
-                else:
-                    if status_callback:
-                        status_callback("Could not find Steps❗️ sheet", 'orange')
-            except Exception as e:
-                if status_callback:
-                    status_callback(f"Error accessing Steps❗️ sheet: {str(e)}", 'orange')
-            
-            # Get the current time
-            time_only = now.strftime("%H:%M:%S")
-            
-            # Check if we have a date from the sheet (not the default date)
-            if date_from_sheet and date_from_sheet != "12/30/1899":
-                # Use the date from the sheet with the current time
-                steps_value = f"{date_from_sheet} {time_only}"
-            else:
-                # Use current date with current time
-                date_only = now.strftime("%m/%d/%Y")
-                steps_value = f"{date_only} {time_only}"
-            
-            # Only display the time in the status message
-            if status_callback:
-                status_callback(f"Using current time: {time_only}", 'green')
-        except Exception as e:
-            # If anything goes wrong, use current date and time
-            date_only = now.strftime("%m/%d/%Y")
-            time_only = now.strftime("%H:%M:%S")
-            steps_value = f"{date_only} {time_only}"
+        if not (tracking_col or sku_col or steps_col):
             if status_callback:
-                status_callback(f"Error reading from sheet, using current time: {time_only}", 'orange')
+                status_callback("No Google Sheets columns configured", 'red')
+            return False, "No Google Sheets columns configured"
         
-        # Write tracking number
-        worksheet.update_acell(f"{tracking_col}{tracking_row}", tracking_number)
+        # The Steps value uses the date from Steps❗️!Q1 with the time of each scan
+        date_ttl = getattr(config_manager.settings, 'google_sheet_steps_date_ttl', DEFAULT_STEPS_DATE_TTL)
+        date_from_sheet = _get_steps_date(sheet_id, date_ttl, status_callback, priority) if steps_col and use_sheet_date else None
         
-        # Write SKU
-        worksheet.update_acell(f"{sku_col}{sku_row}", sku)
+        # One range per configured column covering all the queued scans
+        count = len(rows)
+        columns = [
+            (tracking_col, tracking_row, [row['tracking_number'] for row in rows]),
+            (sku_col, sku_row, [row['sku'] for row in rows]),
+            (steps_col, steps_row, [_get_steps_value(row, date_from_sheet) for row in rows])
+        ]
+        data = [
+            {
+                'range': f"{column}{start_row}:{column}{start_row + count - 1}",
+                'values': [[value] for value in values]
+            }
+            for column, start_row, values in columns if column
+        ]
         
-        # Write Steps value as a string
-        worksheet.update_acell(f"{steps_col}{steps_row}", steps_value)
+        # Write every column of every queued scan in a single values.batchUpdate
+        # request, parsed as if typed in (like update_acell)
+        sheets_write(worksheet.batch_update, data, value_input_option='USER_ENTERED', priority=priority)
         
-        if status_callback:
-            status_callback(f"Time written to cell {steps_col}{steps_row}", 'green')
+        if status_callback and steps_col:
+            status_callback(f"Time written to cell {steps_col}{steps_row + count - 1}", 'green')
         
         # Increment row numbers for next entry
-        config_manager.settings.google_sheet_tracking_row += 1
-        config_manager.settings.google_sheet_sku_row += 1
-        config_manager.settings.google_sheet_steps_row += 1
+        config_manager.settings.google_sheet_tracking_row += count
+        config_manager.settings.google_sheet_sku_row += count
+        config_manager.settings.google_sheet_steps_row += count
         config_manager.save_settings()
         
+        message = "Data written to Google Sheets" if count == 1 else f"{count} rows written to Google Sheets"
         if status_callback:
-            status_callback("Data written to Google Sheets", 'green')
+            status_callback(message, 'green')
         
-        return True, "Data written to Google Sheets"
+        return True, message
         
     except ImportError:
         if status_callback:
             status_callback("Google Sheets libraries not installed", 'red')
         return False, "Google Sheets libraries not installed"
     except Exception as e:
+        # The cached handles may be stale (sheet renamed, token revoked), open them again next time
+        invalidate_sheets_session()
         error_msg = str(e)
         if status_callback:
             status_callback(f"Error writing to Google Sheets: {error_msg}", 'red')
@@ -0,0 +1,345 @@
+"""
+Google Sheets outbox for the Label Maker application.
+Scans bound for Google Sheets are queued in a SQLite outbox, filled from the
+event journal, and a background sender writes them to the sheet in order,
+several rows per API call, retrying with exponential backoff until they
+get through. Queued rows survive a network outage or a restart.
+"""
+import os
+import sys
+import sqlite3
+import threading
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.event_journal import SqliteProjection, get_journal_db_path
+from src.utils.db_manager import configure_connection
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+# Largest number of queued rows written to the sheet in one API call
+SEND_BATCH_SIZE = 50
+
+# Delay (in seconds) before the first retry; it doubles after every failure
+INITIAL_RETRY_DELAY = 2.0
+
+# Longest delay (in seconds) between retries
+MAX_RETRY_DELAY = 300.0
+
+# Seconds between checks of the outbox when nothing wakes the sender
+SEND_POLL_INTERVAL = 5.0
+
+# Global sender instance
+_sender = None
+_sender_lock = threading.Lock()
+
+def get_outbox_db_path():
+    """
+    Get the path to the Google Sheets outbox database.
+
+    Returns:
+        str: Path to sheets_outbox.db next to the event journal
+    """
+    journal_dir, _ = get_journal_db_path()
+    return os.path.join(journal_dir, 'sheets_outbox.db')
+
+def is_sheet_configured(config_manager):
+    """
+    Check whether a Google Sheet is configured.
+
+    Args:
+        config_manager: Configuration manager with the Google Sheets settings
+
+    Returns:
+        bool: True if a sheet URL and name are set
+    """
+    settings = getattr(config_manager, 'settings', None)
+    return bool(getattr(settings, 'google_sheet_url', None) and getattr(settings, 'google_sheet_name', None))
+
+class SheetsOutbox(SqliteProjection):
+    """
+    Journal projection that queues successful scans for Google Sheets.
+
+    Rows are added in the same transaction that advances the projection's
+    cursor, so every scan is queued exactly once. The sender removes rows
+    only after the sheet accepted them.
+    """
+
+    name = 'google_sheets'
+
+    def __init__(self, config_manager=None, db_path=None):
+        """
+        Initialize the outbox.
+
+        Args:
+            config_manager: Configuration manager with the Google Sheets settings
+            db_path: Optional path to the outbox database (defaults to sheets_outbox.db)
+        """
+        super().__init__(db_path or get_outbox_db_path())
+        self.config_manager = config_manager
+        self._listeners = []
+
+    def _initialize(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            configure_connection(conn, self.db_path)
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS sheet_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id INTEGER UNIQUE,
+                timestamp TEXT NOT NULL,
+                tracking_number TEXT,
+                sku TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _write(self, conn, events):
+        # Scans made while no sheet is configured are not sent later
+        if not is_sheet_configured(self.config_manager):
+            return
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO sheet_outbox (event_id, timestamp, tracking_number, sku) VALUES (?, ?, ?, ?)",
+            [(event['id'], event['timestamp'], event['tracking_number'], event['sku'])
+             for event in events if event['status'] == 'success']
+        )
+
+    def apply(self, events):
+        super().apply(events)
+        for listener in list(self._listeners):
+            listener()
+
+    def add_listener(self, listener):
+        """
+        Register a function called after rows may have been queued.
+
+        Args:
+            listener: Function taking no arguments
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def peek(self, limit=SEND_BATCH_SIZE):
+        """
+        Get the oldest queued rows without removing them.
+
+        Args:
+            limit: Maximum number of rows to return
+
+        Returns:
+            list: Rows as dictionaries, oldest first
+        """
+        with self._lock:
+            cursor = self._get_connection().execute(
+                'SELECT id, event_id, timestamp, tracking_number, sku, attempts FROM sheet_outbox ORDER BY id LIMIT ?',
+                (limit,)
+            )
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def remove(self, row_ids):
+        """
+        Remove rows the sheet has accepted.
+
+        Args:
+            row_ids: Outbox row ids
+        """
+        with self._lock:
+            conn = self._get_connection()
+            with conn:
+                conn.executemany('DELETE FROM sheet_outbox WHERE id = ?', [(row_id,) for row_id in row_ids])
+
+    def record_failure(self, row_ids, error):
+        """
+        Count a failed attempt to send rows.
+
+        Args:
+            row_ids: Outbox row ids
+            error: Error message
+        """
+        with self._lock:
+            conn = self._get_connection()
+            with conn:
+                conn.executemany(
+                    'UPDATE sheet_outbox SET attempts = attempts + 1, last_error = ? WHERE id = ?',
+                    [(error, row_id) for row_id in row_ids]
+                )
+
+    def pending_count(self):
+        """
+        Get the number of rows waiting to be sent.
+
+        Returns:
+            int: Queued rows
+        """
+        with self._lock:
+            return self._get_connection().execute('SELECT COUNT(*) FROM sheet_outbox').fetchone()[0]
+
+class SheetsSender:
+    """
+    Background thread that drains the outbox into Google Sheets.
+
+    Rows are always sent oldest first and a batch is only removed from the
+    outbox after the writer reports success, so rows are never reordered or
+    lost. After a failure the same batch is retried with exponential backoff.
+    """
+
+    def __init__(self, outbox, config_manager, writer=None, status_callback=None):
+        """
+        Initialize the sender.
+
+        Args:
+            outbox: SheetsOutbox to drain
+            config_manager: Configuration manager with the Google Sheets settings
+            writer: Function (config_manager, rows, status_callback) -> (success, message)
+                that writes rows to the sheet (defaults to write_rows_to_google_sheet)
+            status_callback: Optional callback function to update status messages
+        """
+        self.outbox = outbox
+        self.config_manager = config_manager
+        self.writer = writer
+        self.status_callback = status_callback
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._failures = 0
+        self.last_error = None
+        outbox.add_listener(self.wake)
+
+    def start(self):
+        """Start the sender thread if it isn't running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="SheetsSender", daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        """Check the outbox now instead of at the next poll."""
+        self._wake.set()
+
+    def _get_writer(self):
+        """
+        Get the function that writes rows to the sheet.
+
+        Returns:
+            callable: The injected writer, or write_rows_to_google_sheet
+        """
+        if self.writer is None:
+            # Import here so the outbox works without the Google libraries installed
+            from src.utils.sheets_operations import write_rows_to_google_sheet
+            self.writer = write_rows_to_google_sheet
+        return self.writer
+
+    def _run(self):
+        """Sender thread loop: send queued rows until stopped."""
+        while not self._stop.is_set():
+            delay = self.send_pending()
+            if not delay:
+                continue
+            if self._failures:
+                # Back off for the full delay, new scans don't cut it short
+                self._stop.wait(delay)
+            else:
+                self._wake.wait(delay)
+                self._wake.clear()
+
+    def send_pending(self):
+        """
+        Send one batch of queued rows.
+
+        Returns:
+            float: Seconds to wait before the next attempt (0 to continue at once)
+        """
+        try:
+            rows = self.outbox.peek(SEND_BATCH_SIZE)
+        except Exception as e:
+            logger.error(f"Error reading Google Sheets outbox: {str(e)}")
+            return SEND_POLL_INTERVAL
+
+        if not rows:
+            return SEND_POLL_INTERVAL
+        if not is_sheet_configured(self.config_manager):
+            # Keep the rows until a sheet is configured again
+            return SEND_POLL_INTERVAL
+
+        row_ids = [row['id'] for row in rows]
+        try:
+            success, message = self._get_writer()(self.config_manager, rows, self.status_callback)
+        except Exception as e:
+            success, message = False, f"Error writing to Google Sheets: {str(e)}"
+
+        if success:
+            self.outbox.remove(row_ids)
+            self._failures = 0
+            self.last_error = None
+            logger.info(f"Sent {len(rows)} row(s) to Google Sheets")
+            return 0
+
+        self._failures += 1
+        self.last_error = message
+        try:
+            self.outbox.record_failure(row_ids, message)
+        except Exception as e:
+            logger.error(f"Error updating Google Sheets outbox: {str(e)}")
+
+        delay = min(MAX_RETRY_DELAY, INITIAL_RETRY_DELAY * 2 ** (self._failures - 1))
+        logger.warning(f"Google Sheets write failed ({message}), {len(rows)} row(s) kept, retrying in {delay:.0f}s")
+        return delay
+
+    def stop(self, timeout=5.0):
+        """
+        Stop the sender thread; queued rows stay in the outbox for the next start.
+
+        Args:
+            timeout: Maximum number of seconds to wait for a send in progress
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        self._stop.set()
+        self._wake.set()
+        thread.join(timeout)
+
+def get_sheets_sender(outbox=None, config_manager=None, status_callback=None):
+    """
+    Get the application Google Sheets sender, starting its thread if needed.
+
+    Args:
+        outbox: SheetsOutbox to drain (required the first time)
+        config_manager: Optional configuration manager; the latest one passed in is used
+        status_callback: Optional callback function to update status messages
+
+    Returns:
+        SheetsSender: Shared sender
+    """
+    global _sender
+
+    with _sender_lock:
+        if _sender is None:
+            _sender = SheetsSender(outbox, config_manager, status_callback=status_callback)
+        elif config_manager is not None:
+            _sender.config_manager = config_manager
+        _sender.start()
+        return _sender
+
+def stop_sheets_sender():
+    """Stop the Google Sheets sender, if it was started."""
+    global _sender
+
+    with _sender_lock:
+        sender = _sender
+        _sender = None
+    if sender is not None:
+        sender.stop()
@@ -0,0 +1,337 @@
+"""
+Google Sheets request scheduler for the Label Maker application.
+Every Sheets API call goes through a token bucket per kind of request, so the
+desks sharing a service account stay under Google's per-minute read and
+write quotas. Waiting calls are served by priority (scan writes before
+backfills before dialog refreshes) and quota errors (HTTP 429) are retried
+after an exponential backoff shared by all callers.
+"""
+import os
+import sys
+import time
+import random
+import heapq
+import itertools
+import threading
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.app_logger import get_app_logger
+
+# Get logger
+logger = get_app_logger()
+
+# Kinds of requests, each with its own budget
+REQUEST_READ = 'read'
+REQUEST_WRITE = 'write'
+
+# Priorities, lower numbers are served first
+PRIORITY_SCAN = 0
+PRIORITY_BACKFILL = 1
+PRIORITY_UI = 2
+
+# Default budgets in requests per minute (Google's default per-user quota)
+DEFAULT_READS_PER_MINUTE = 60
+DEFAULT_WRITES_PER_MINUTE = 60
+
+# Number of times a call is retried after a quota error
+MAX_QUOTA_RETRIES = 5
+
+# Delay (in seconds) after the first quota error; it doubles after every further one
+INITIAL_QUOTA_BACKOFF = 2.0
+
+# Longest delay (in seconds) after a quota error
+MAX_QUOTA_BACKOFF = 64.0
+
+# Queue depth above which the scheduler is reported as saturated
+SATURATION_DEPTH = 5
+
+# Global scheduler instance
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def is_quota_error(error):
+    """
+    Check whether an exception is a Sheets API quota error.
+
+    Args:
+        error: Exception raised by a gspread call
+
+    Returns:
+        bool: True for HTTP 429 / RESOURCE_EXHAUSTED responses
+    """
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    message = str(error)
+    return '429' in message or 'RESOURCE_EXHAUSTED' in message or 'Quota exceeded' in message
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Requests allowed per minute (also the largest burst)
+        """
+        self.per_minute = max(1, int(per_minute))
+        self.tokens = float(self.per_minute)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.failures = 0
+
+    def _refill(self, now):
+        """Add the tokens earned since the last update."""
+        self.tokens = min(self.per_minute, self.tokens + (now - self.updated) * self.per_minute / 60.0)
+        self.updated = now
+
+    def wait_time(self, now):
+        """
+        Get how long until a token can be taken.
+
+        Args:
+            now: Current time.monotonic() value
+
+        Returns:
+            float: Seconds to wait (0 if a token is available now)
+        """
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * 60.0 / self.per_minute
+
+    def take(self):
+        """Take a token; only call after wait_time returned 0."""
+        self.tokens -= 1
+
+    def set_rate(self, per_minute):
+        """
+        Change the budget, keeping the tokens already earned.
+
+        Args:
+            per_minute: Requests allowed per minute
+        """
+        self._refill(time.monotonic())
+        self.per_minute = max(1, int(per_minute))
+        self.tokens = min(self.tokens, self.per_minute)
+
+class SheetsScheduler:
+    """
+    Rate limiter and priority queue in front of the Sheets API.
+
+    A call waits in the queue of its kind until it is the most urgent one
+    and a token is available, then runs in the caller's thread.
+    """
+
+    def __init__(self, reads_per_minute=DEFAULT_READS_PER_MINUTE, writes_per_minute=DEFAULT_WRITES_PER_MINUTE):
+        """
+        Initialize the scheduler.
+
+        Args:
+            reads_per_minute: Read requests allowed per minute
+            writes_per_minute: Write requests allowed per minute
+        """
+        self._condition = threading.Condition()
+        self._buckets = {
+            REQUEST_READ: TokenBucket(reads_per_minute),
+            REQUEST_WRITE: TokenBucket(writes_per_minute)
+        }
+        self._queues = {REQUEST_READ: [], REQUEST_WRITE: []}
+        self._sequence = itertools.count()
+        self._saturated = False
+
+    def set_rates(self, reads_per_minute, writes_per_minute):
+        """
+        Change the per-minute budgets.
+
+        Args:
+            reads_per_minute: Read requests allowed per minute
+            writes_per_minute: Write requests allowed per minute
+        """
+        with self._condition:
+            self._buckets[REQUEST_READ].set_rate(reads_per_minute)
+            self._buckets[REQUEST_WRITE].set_rate(writes_per_minute)
+            self._condition.notify_all()
+
+    def _acquire(self, kind, priority):
+        """
+        Wait until a call of this kind and priority may be made.
+
+        Args:
+            kind: REQUEST_READ or REQUEST_WRITE
+            priority: Priority of the call
+        """
+        queue = self._queues[kind]
+        bucket = self._buckets[kind]
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(queue, ticket)
+            self._check_saturation()
+            try:
+                while True:
+                    if queue[0] == ticket:
+                        wait = bucket.wait_time(time.monotonic())
+                        if wait <= 0:
+                            bucket.take()
+                            return
+                    else:
+                        # Someone more urgent is first, wake up when it leaves the queue
+                        wait = None
+                    self._condition.wait(wait)
+            finally:
+                queue.remove(ticket)
+                heapq.heapify(queue)
+                self._check_saturation()
+                self._condition.notify_all()
+
+    def _check_saturation(self):
+        """Log when the queues grow past SATURATION_DEPTH and when they drain again."""
+        saturated = sum(len(queue) for queue in self._queues.values()) > SATURATION_DEPTH
+        if saturated != self._saturated:
+            self._saturated = saturated
+            if saturated:
+                logger.warning(f"Google Sheets requests are queueing: {self.queue_depth()}")
+            else:
+                logger.info("Google Sheets request queue drained")
+
+    def _record_quota_error(self, kind):
+        """
+        Make every caller of this kind wait after a quota error.
+
+        Args:
+            kind: REQUEST_READ or REQUEST_WRITE
+
+        Returns:
+            float: Seconds until calls of this kind are allowed again
+        """
+        with self._condition:
+            bucket = self._buckets[kind]
+            bucket.failures += 1
+            delay = min(MAX_QUOTA_BACKOFF, INITIAL_QUOTA_BACKOFF * 2 ** (bucket.failures - 1))
+
+            # Jitter keeps the desks sharing the account from retrying in lockstep
+            delay += random.uniform(0, delay / 4)
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+            bucket.tokens = 0
+            return delay
+
+    def _record_success(self, kind):
+        """Reset the quota backoff of a kind after a successful call."""
+        with self._condition:
+            self._buckets[kind].failures = 0
+
+    def call(self, kind, func, *args, priority=PRIORITY_SCAN, **kwargs):
+        """
+        Make a Sheets API call within the budget of its kind.
+
+        Args:
+            kind: REQUEST_READ or REQUEST_WRITE
+            func: Function making one API request
+            *args: Positional arguments for func
+            priority: PRIORITY_SCAN, PRIORITY_BACKFILL or PRIORITY_UI
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The return value of func
+
+        Raises:
+            Exception: The last error once the quota retries are used up, or any other error
+        """
+        attempt = 0
+        while True:
+            self._acquire(kind, priority)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_quota_error(e) or attempt >= MAX_QUOTA_RETRIES:
+                    raise
+                attempt += 1
+                delay = self._record_quota_error(kind)
+                logger.warning(f"Google Sheets {kind} quota exceeded, retrying in {delay:.1f}s (attempt {attempt} of {MAX_QUOTA_RETRIES})")
+                continue
+            self._record_success(kind)
+            return result
+
+    def queue_depth(self):
+        """
+        Get the number of calls waiting for their turn.
+
+        Returns:
+            dict: Waiting calls per kind ('read' and 'write')
+        """
+        with self._condition:
+            return {kind: len(queue) for kind, queue in self._queues.items()}
+
+    def describe(self):
+        """
+        Get a short description of the scheduler state for status displays.
+
+        Returns:
+            str: Budgets and queue depths
+        """
+        with self._condition:
+            now = time.monotonic()
+            parts = []
+            for kind, bucket in self._buckets.items():
+                text = f"{kind}s {len(self._queues[kind])} waiting ({bucket.per_minute}/min)"
+                if bucket.blocked_until > now:
+                    text += f", backing off {bucket.blocked_until - now:.0f}s"
+                parts.append(text)
+            return "; ".join(parts)
+
+def get_sheets_scheduler(settings=None):
+    """
+    Get the application Sheets scheduler.
+
+    Args:
+        settings: Optional application settings (for the per-minute budgets)
+
+    Returns:
+        SheetsScheduler: Shared scheduler
+    """
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SheetsScheduler()
+        if settings is not None:
+            _scheduler.set_rates(
+                getattr(settings, 'google_sheets_reads_per_minute', None) or DEFAULT_READS_PER_MINUTE,
+                getattr(settings, 'google_sheets_writes_per_minute', None) or DEFAULT_WRITES_PER_MINUTE
+            )
+        return _scheduler
+
+def sheets_read(func, *args, priority=PRIORITY_SCAN, **kwargs):
+    """
+    Make a Sheets API read request through the scheduler.
+
+    Args:
+        func: Function making one read request
+        *args: Positional arguments for func
+        priority: Priority of the call
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The return value of func
+    """
+    return get_sheets_scheduler().call(REQUEST_READ, func, *args, priority=priority, **kwargs)
+
+def sheets_write(func, *args, priority=PRIORITY_SCAN, **kwargs):
+    """
+    Make a Sheets API write request through the scheduler.
+
+    Args:
+        func: Function making one write request
+        *args: Positional arguments for func
+        priority: Priority of the call
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The return value of func
+    """
+    return get_sheets_scheduler().call(REQUEST_WRITE, func, *args, priority=priority, **kwargs)
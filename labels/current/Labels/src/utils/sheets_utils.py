@@ -3,9 +3,12 @@ Google Sheets utility functions for the Label Maker application.
 """
 import os
 import re
+import time
+import threading
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 from .file_utils import get_credentials_file_path, file_exists
+from .sheets_scheduler import sheets_read, sheets_write, PRIORITY_SCAN, PRIORITY_UI
 
 def validate_sheet_url(url):
     """
@@ -28,6 +31,245 @@ def validate_sheet_url(url):
     
     return True, match.group(1)
 
+# Scopes requested for the service account
+SHEETS_SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+
+# Global session instance
+_session = None
+_session_lock = threading.Lock()
+
+class SheetsSession:
+    """
+    Process-wide cache of the authorized Google Sheets client and the
+    spreadsheet and worksheet handles opened with it.
+
+    The credentials file is only read again when it changes, the OAuth
+    token is reused until it expires, and open_by_key/worksheet lookups are
+    made once per (sheet_id, sheet_name). Values read with get_values can be
+    reused for a given number of seconds. The lock only guards the cached
+    state: requests, including their scheduler waits and backoff, run
+    outside it, so a UI read never queues behind a background sync.
+    """
+
+    def __init__(self):
+        """Initialize an empty session."""
+        self._lock = threading.RLock()
+        self._auth_lock = threading.Lock()
+        self._creds_key = None
+        self._credentials = None
+        self._client = None
+        self._spreadsheets = {}
+        self._worksheets = {}
+        self._values = {}
+
+        # Bumped whenever handles are dropped, so a request that started
+        # before doesn't put a stale handle back in the cache
+        self._generation = 0
+
+    def _clear_handles(self, sheet_id=None):
+        """
+        Drop cached spreadsheet and worksheet handles.
+        Must be called with self._lock held.
+
+        Args:
+            sheet_id: Optional sheet ID to drop the handles of (defaults to all)
+        """
+        self._generation += 1
+        if sheet_id is None:
+            self._spreadsheets.clear()
+            self._worksheets.clear()
+            self._values.clear()
+            return
+        self._spreadsheets.pop(sheet_id, None)
+        for cache in (self._worksheets, self._values):
+            for key in [key for key in cache if key[0] == sheet_id]:
+                del cache[key]
+
+    def _store(self, cache, key, value, generation):
+        """
+        Add a fetched value to a cache unless the handles were dropped meanwhile.
+
+        Args:
+            cache: Cache dictionary to fill
+            key: Cache key
+            value: Value to store
+            generation: self._generation read before the fetch started
+        """
+        with self._lock:
+            if generation == self._generation:
+                cache[key] = value
+
+    def get_client(self):
+        """
+        Get the authorized client, authorizing again only when needed.
+
+        Returns:
+            tuple: (success, client or error_message)
+        """
+        # Check for credentials file
+        creds_file = get_credentials_file_path()
+        if not file_exists(creds_file):
+            self.invalidate()
+            return False, f"Credentials file not found at:\n{creds_file}\n\nPlease create a service account and download the credentials file."
+
+        # Only one thread authorizes at a time, readers of the cache don't wait for it
+        with self._auth_lock:
+            try:
+                # A replaced credentials file means a different account
+                creds_key = (creds_file, os.path.getmtime(creds_file))
+                with self._lock:
+                    client, credentials = self._client, self._credentials
+                    current_key = self._creds_key
+
+                if client is None or creds_key != current_key:
+                    credentials = ServiceAccountCredentials.from_json_keyfile_name(creds_file, SHEETS_SCOPE)
+                    client = gspread.authorize(credentials)
+                    with self._lock:
+                        self._clear_handles()
+                        self._credentials = credentials
+                        self._client = client
+                        self._creds_key = creds_key
+                elif getattr(credentials, 'access_token_expired', False):
+                    # Refresh the token in place so the cached handles keep working
+                    if hasattr(client, 'login'):
+                        client.login()
+                    else:
+                        client = gspread.authorize(credentials)
+                        with self._lock:
+                            self._clear_handles()
+                            self._client = client
+                return True, client
+            except Exception as e:
+                with self._lock:
+                    self._client = None
+                    self._creds_key = None
+                return False, f"Failed to authorize Google Sheets client: {str(e)}"
+
+    def get_spreadsheet(self, sheet_id, priority=PRIORITY_SCAN):
+        """
+        Get a spreadsheet handle, opening it on first use.
+
+        Args:
+            sheet_id (str): Google Sheet ID
+            priority: Scheduler priority of the request opening it
+
+        Returns:
+            Spreadsheet: gspread spreadsheet
+
+        Raises:
+            RuntimeError: If the client could not be authorized
+        """
+        success, client_or_error = self.get_client()
+        if not success:
+            raise RuntimeError(client_or_error)
+
+        with self._lock:
+            spreadsheet = self._spreadsheets.get(sheet_id)
+            generation = self._generation
+        if spreadsheet is None:
+            spreadsheet = sheets_read(client_or_error.open_by_key, sheet_id, priority=priority)
+            self._store(self._spreadsheets, sheet_id, spreadsheet, generation)
+        return spreadsheet
+
+    def get_worksheet(self, sheet_id, sheet_name, priority=PRIORITY_SCAN):
+        """
+        Get a worksheet handle, looking it up on first use.
+
+        Args:
+            sheet_id (str): Google Sheet ID
+            sheet_name (str): Worksheet name
+            priority: Scheduler priority of the requests opening it
+
+        Returns:
+            Worksheet: gspread worksheet
+
+        Raises:
+            RuntimeError: If the client could not be authorized
+        """
+        spreadsheet = self.get_spreadsheet(sheet_id, priority)
+        with self._lock:
+            worksheet = self._worksheets.get((sheet_id, sheet_name))
+            generation = self._generation
+        if worksheet is None:
+            worksheet = sheets_read(spreadsheet.worksheet, sheet_name, priority=priority)
+            self._store(self._worksheets, (sheet_id, sheet_name), worksheet, generation)
+        return worksheet
+
+    def get_values(self, sheet_id, a1_range, max_age=0, priority=PRIORITY_SCAN):
+        """
+        Read a range of values, reusing an earlier read that is recent enough.
+
+        Args:
+            sheet_id (str): Google Sheet ID
+            a1_range (str): Range in A1 notation, including the sheet name
+            max_age: Seconds an earlier read of the range stays valid (0 always reads)
+            priority: Scheduler priority of the read
+
+        Returns:
+            list: Rows of values (empty cells at the end of a row are left out)
+
+        Raises:
+            RuntimeError: If the client could not be authorized
+        """
+        with self._lock:
+            cached = self._values.get((sheet_id, a1_range))
+            generation = self._generation
+        if cached is not None and max_age > 0 and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+
+        response = sheets_read(self.get_spreadsheet(sheet_id, priority).values_get, a1_range, priority=priority)
+        values = response.get('values', [])
+        self._store(self._values, (sheet_id, a1_range), (time.monotonic(), values), generation)
+        return values
+
+    def forget_values(self, sheet_id, a1_range):
+        """
+        Drop an earlier read of a range so the next get_values reads it again.
+
+        Args:
+            sheet_id (str): Google Sheet ID
+            a1_range (str): Range in A1 notation, including the sheet name
+        """
+        with self._lock:
+            self._values.pop((sheet_id, a1_range), None)
+
+    def invalidate(self, sheet_id=None):
+        """
+        Forget cached handles so the next call opens them again.
+
+        Args:
+            sheet_id: Optional sheet ID to forget; without it the client is dropped too
+        """
+        with self._lock:
+            self._clear_handles(sheet_id)
+            if sheet_id is None:
+                self._client = None
+                self._credentials = None
+                self._creds_key = None
+
+def get_sheets_session():
+    """
+    Get the application Google Sheets session.
+
+    Returns:
+        SheetsSession: Shared session
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = SheetsSession()
+        return _session
+
+def invalidate_sheets_session(sheet_id=None):
+    """
+    Forget the cached Google Sheets client and handles, e.g. after the settings changed.
+
+    Args:
+        sheet_id: Optional sheet ID to forget (defaults to everything)
+    """
+    get_sheets_session().invalidate(sheet_id)
+
 def get_authorized_client():
     """
     Get an authorized Google Sheets client.
@@ -35,23 +277,7 @@ def get_authorized_client():
     Returns:
         tuple: (success, client or error_message)
     """
-    # Check for credentials file
-    creds_file = get_credentials_file_path()
-    if not file_exists(creds_file):
-        return False, f"Credentials file not found at:\n{creds_file}\n\nPlease create a service account and download the credentials file."
-    
-    try:
-        # Define the scope
-        scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        
-        # Add credentials to the account
-        creds = ServiceAccountCredentials.from_json_keyfile_name(creds_file, scope)
-        
-        # Authorize the clientsheet
-        client = gspread.authorize(creds)
-        return True, client
-    except Exception as e:
-        return False, f"Failed to authorize Google Sheets client: {str(e)}"
+    return get_sheets_session().get_client()
 
 def get_sheet_names(sheet_id):
     """
@@ -69,12 +295,13 @@ def get_sheet_names(sheet_id):
     
     try:
         # Get the sheet
-        spreadsheet = client_or_error.open_by_key(sheet_id)
+        spreadsheet = get_sheets_session().get_spreadsheet(sheet_id, PRIORITY_UI)
         
-        # Get the available sheet names
-        sheet_names = [sheet.title for sheet in spreadsheet.worksheets()]
+        # Get the available sheet names (always fresh, sheets may have been added)
+        sheet_names = [sheet.title for sheet in sheets_read(spreadsheet.worksheets, priority=PRIORITY_UI)]
         return True, sheet_names
     except Exception as e:
+        invalidate_sheets_session(sheet_id)
         return False, f"Failed to fetch sheet names: {str(e)}"
 
 def test_sheet_connection(sheet_id, sheet_name):
@@ -94,21 +321,23 @@ def test_sheet_connection(sheet_id, sheet_name):
     
     try:
         # Get the sheet
-        spreadsheet = client_or_error.open_by_key(sheet_id)
+        session = get_sheets_session()
+        spreadsheet = session.get_spreadsheet(sheet_id, PRIORITY_UI)
         
         # Get all sheet names
-        all_sheets = [sheet.title for sheet in spreadsheet.worksheets()]
+        all_sheets = [sheet.title for sheet in sheets_read(spreadsheet.worksheets, priority=PRIORITY_UI)]
         
         # Check if the specified sheet exists
         if sheet_name in all_sheets:
-            # Try to open the worksheet
-            worksheet = spreadsheet.worksheet(sheet_name)
+            # Try to open the worksheet (cached for later writes)
+            session.get_worksheet(sheet_id, sheet_name, PRIORITY_UI)
             return True, "Connected"
         else:
             # Sheet not found
             sheet_list = "\n".join(all_sheets)
             return False, f"Sheet '{sheet_name}' not found.\n\nAvailable sheets:\n{sheet_list}"
     except Exception as e:
+        invalidate_sheets_session(sheet_id)
         return False, f"Failed to connect to Google Sheet: {str(e)}"
 
 def update_sheet_cell(sheet_id, sheet_name, cell, value):
@@ -129,14 +358,12 @@ def update_sheet_cell(sheet_id, sheet_name, cell, value):
         return False, client_or_error
     
     try:
-        # Get the sheet
-        spreadsheet = client_or_error.open_by_key(sheet_id)
-        
         # Get the worksheet
-        worksheet = spreadsheet.worksheet(sheet_name)
+        worksheet = get_sheets_session().get_worksheet(sheet_id, sheet_name, PRIORITY_UI)
         
         # Update the cell
-        worksheet.update_acell(cell, value)
+        sheets_write(worksheet.update_acell, cell, value, priority=PRIORITY_UI)
         return True, "Cell updated"
     except Exception as e:
+        invalidate_sheets_session(sheet_id)
         return False, f"Failed to update cell: {str(e)}"